@@ -11,16 +11,9 @@
 #  relevant descriptions in a video stream.
 #
 
-import image, gvision
-import time, signal
+import image, gvision, pipeline, detector, cache, tracker, presenter, mailer, incident, clip, metrics, tracing, responder
+import os, time, signal
 import pygame
-import tkinter as tk
-import smtplib,ssl
-from email.mime.multipart import MIMEMultipart  
-from email.mime.base import MIMEBase  
-from email.mime.text import MIMEText  
-from email.utils import formatdate  
-from email import encoders
 
 
 # __exit
@@ -46,35 +39,29 @@ def callpolice():
     pygame.mixer.music.load("/home/student/Desktop/Classwork/CW4/siren.wav")
     pygame.mixer.music.play()
 
-def send_an_email():
-    toaddr = 'amruth1999@gmail.com'      # To id 
-    me = 'amruth1999@gmail.com'          # your id
-    subject = "Weapon Detection"              # Subject
-    msg = MIMEMultipart()  
-    msg['Subject'] = subject  
-    msg['From'] = me  
-    msg['To'] = toaddr  
-    msg.preamble = "test "   
-    #msg.attach(MIMEText(text))  
-    part = MIMEBase('application', "octet-stream")  
-    part.set_payload(open("/home/student/Desktop/Classwork/CW4/detectedgun.jpg", "rb").read())  
-    encoders.encode_base64(part)  
-    part.add_header('Content-Disposition', 'attachment; filename="detectedgun.jpg"')   # File name and format name
-    msg.attach(part)  
-    try:  
-       s = smtplib.SMTP('smtp.gmail.com', 587)  # Protocol
-       s.ehlo()  
-       s.starttls()  
-       s.ehlo()  
-       s.login(user = 'amruth1999@gmail.com', password = 'amruthraghav')  # User id & password
-       #s.send_message(msg)  
-       s.sendmail(me, toaddr, msg.as_string())  
-       s.quit()  
-    #except:  
-    #   print ("Error: unable to send email")    
-    except SMTPException as error:  
-          print ("Error")                # Exception
-   
+# Alert emails are sent by `mailer' in the background. It stays logged in to
+#  Gmail between emails and gathers alerts of a few seconds into one email.
+#
+# The account is never written into the program, where anyone reading it would
+#  find the password. It is taken from the environment instead, e.g.,
+#
+#   export LIFELINE_SMTP_USER=someone@gmail.com
+#   export LIFELINE_SMTP_PASSWORD=an-app-password
+#   export LIFELINE_MAIL_TO=guard@example.com,office@example.com
+#
+#  No email is sent when no account is given.
+#
+SMTP_HOST = os.environ.get("LIFELINE_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("LIFELINE_SMTP_PORT", "587"))
+SMTP_USER = os.environ.get("LIFELINE_SMTP_USER")
+SMTP_PASSWORD = os.environ.get("LIFELINE_SMTP_PASSWORD")
+
+if SMTP_USER is not None :
+    mail = mailer.Mailer(SMTP_HOST, SMTP_PORT, SMTP_USER, os.environ.get("LIFELINE_MAIL_TO", SMTP_USER).split(","),
+        user = SMTP_USER, password = SMTP_PASSWORD).start()
+else :
+    mail = None
+
 #
 # USER LOGIC
 #
@@ -87,113 +74,172 @@ def send_an_email():
 #  you can not handle the case, why would you think your computer knows how to
 #  handle non-existing objects? (wink)
 #
-SAMPLE_SEP = 20
 detect_sel = 0
 
-ret = []
-
 agg = 0
 ent = time.time()
 
-# A loop that runs forever without stopping
+# Lifeline 2.0 identifies objects on the Raspberry Pi itself when our own model
+#  is installed. No frame leaves the device, so there is no network delay and
+#  detection keeps working when the Internet is down.
 #
-while True :
-	# Capture a video frame by calling `record_video()' in `image' module.
-	#
-    logoimg=image.load_image("/home/student/Desktop/Classwork/CW4/lifelogo.jpg")
-    frm = image.record_video()
-    frm = image.overlay_text(frm,"LifeLine 1.0 ",(10,20),(0,0,0),False)
+MODEL_PATH = "/home/student/Desktop/LifeLine/model"
 
-    # If the counter `detect_sel' is divisible by 20, i.e., 0, 20, 40, ...,
-    #  call `gvision()' in the `gvision' module and gives the video frame as an
-    #  argument for `object' identification.
-    #
-    # As the submission of a video frame over the WiFi, through the Internet to
-    #  distant Google Vision API incurs heavy latency, aka., delay, the choice
-    #  of sending 1 video frame in every 20 frames captured is an engineering
-    #  compromise for perceived smoother user experience over actual smoothness
-    #  in captioning following identifiable objects.
+if os.path.isfile(MODEL_PATH + "/frozen_inference_graph.pb") :
+    gvision.set_backend(detector.DnnDetector(MODEL_PATH + "/frozen_inference_graph.pb", MODEL_PATH + "/graph.pbtxt", MODEL_PATH + "/labels.txt", scale = 1 / 127.5, mean = (127.5, 127.5, 127.5)))
+else :
+    # Connect to Google Vision API before the first frame is captured. The client
+    #  session is shared by every `gvision()' call below, so the credentials and
+    #  the secure connection are set up once here instead of once per frame.
     #
-    # !!!Engineering is an art of compromise between theoretical science and
-    #  realistics constraints!!!
-    #
-    # The result returned from the `gvision' function is a long list of objects
-    #  distinguishable by the Google Vision with their locations and recognised
-    #  object type descriptions.
-    #
-    # Recall above, if we have not give meaning to `detect_sel', how possible
-    #  the computer can divide non-existence with 20 and know the results? It is
-    #  non-existence! Not ZERO!
+    gvision.client_session()
+
+# A camera fixed in place sees nearly the same picture most of the time. Results
+#  of a frame looking alike a frame identified a few seconds ago can be reused
+#  from `results' instead of asking Google Vision again, by setting `USE_CACHE'.
+#
+# It is off, and should stay off while LifeLine looks for weapons. A small gun
+#  drawn in an otherwise unchanged scene hardly changes how the frame looks as
+#  a whole, the frame is taken as looking alike the frame before and the answer
+#  given for the frame before, with no gun in it, is used for a few seconds more.
+#  Saving Google Vision requests is not worth a weapon being missed. `image.
+#  MotionGate' saves the requests for a still scene safely instead.
+#
+USE_CACHE = False
+
+results = cache.ResultCache() if USE_CACHE is True else None
+
+# One alert window for the whole run, opened now and shown when a weapon is found.
+#
+alerts = presenter.AlertPresenter(action = callpolice).start()
+
+# DETECT
+# ====================
+#
+# Inference stage of the pipeline. The video frame is given to `gvision()' in
+#  the `gvision' module as an argument for `object' identification.
+#
+# As the submission of a video frame over the WiFi, through the Internet to
+#  distant Google Vision API incurs heavy latency, aka., delay, the stage runs
+#  in its own thread. While a frame is away, newly captured frames keep being
+#  displayed and only the newest of them is sent once the result comes back.
+#  Google Vision is therefore asked as often as the network allows, no more.
+#
+# The result returned from the `gvision' function is a long list of objects
+#  distinguishable by the Google Vision with their locations and recognised
+#  object type descriptions.
+#
+# @param frm     A video frame captured by `record_frame()'
+#
+# @ret           The list of objects identified by Google Vision
+#
+def detect(frm) :
+    return gvision.gvision(frm, "object", cache = results)
+
+# Objects identified by Google Vision are followed from result to result by
+#  `incidents'. A weapon has to be seen twice in a row before an alert is raised
+#  and only one alert is raised for as long as it stays in view, no matter how
+#  many results it is found in. Two guns in view are two incidents.
+#
+incidents = incident.IncidentEngine(responder.WEAPON_KINDS)
+
+# The last few seconds of video are kept in memory by `clips'. When a weapon is
+#  found, they are saved as a clip together with the few seconds that follow.
+#
+clips = clip.ClipRecorder().start()
+
+# CAPTURE
+# ====================
+#
+# Capture stage of the pipeline. The video frame is captured by `record_frame()'
+#  in `image' module and kept by `clips' as the camera saw it, before anything
+#  is drawn on the screen copy of it, so clips are true footage for evidence.
+#
+# @ret           The video frame captured
+#
+def capture() :
+    frm = image.record_frame()
+
+    if frm is not None :
+        clips.record(frm)
+
+    return frm
+
+# How the program is doing is kept by `metrics', i.e., how long each stage takes
+#  and how many frames and alerts went through it. It is served at
+#  http://localhost:9915/metrics for Prometheus or a browser, and written to a
+#  file every minute so it can be looked at after the Raspberry Pi is collected.
+#
+# Another port is taken from the environment should 9915 be in use, e.g.,
+#
+#   export LIFELINE_METRICS_PORT=9916
+#
+#  If the port is taken all the same, the program carries on without serving
+#  the metrics.
+#
+metrics.REGISTRY.serve(int(os.environ.get("LIFELINE_METRICS_PORT", str(metrics.METRICS_PORT))))
+metrics.REGISTRY.log("/home/student/Desktop/LifeLine/metrics.prom")
+
+# One in `tracing.SAMPLE_EVERY' frames sent to Google Vision is followed from
+#  the moment it is captured to the alert it raises, how long each step took is
+#  written to a trace file. `python tracing.py traces.log' tells where the time
+#  between a weapon appearing on camera and the alert went.
+#
+tracing.TRACER.start("/home/student/Desktop/LifeLine/traces.log")
+
+FRAME_RATE = metrics.REGISTRY.gauge("lifeline_frame_rate", "Frames rendered per second, averaged since start.")
+
+# Alerts for weapons found among the objects identified by Google Vision are
+#  raised by `respond', as are the frames rendered, with the caption, snapshot
+#  file, message and icon of every kind of weapon in `responder.WEAPONS'.
+#
+# Alerts are handed to `alerts', which shows them in a window of its own in a
+#  thread of its own. Unlike a new Tk window waiting in `mainloop' for someone to
+#  close it, the video and Google Vision carry on while an alert is on screen.
+#  The snapshot shown and saved is the very frame the weapon is found in, kept
+#  by the pipeline in `lifeline.detected' until the alerts are raised, not the
+#  frame on screen at the time, and no separate picture is taken by the camera.
+#
+# `benchmark.py' measures alerts and rendering with `responder' as well, so what
+#  is measured there is what runs here.
+#
+respond = responder.Responder(incidents, alerts = alerts, clips = clips, mail = mail)
+
+# The logo is read from the SD card once only.
+#
+logoimg = image.load_asset("/home/student/Desktop/Classwork/CW4/lifelogo.jpg")
+
+# RENDER
+# ====================
+#
+# Render stage of the pipeline, called for every captured video frame.
+#
+# @param frm     A video frame captured by `record_frame()'
+# @param ret     The most recent list of objects identified by Google Vision
+# @param fresh   True if `ret' has just come back from Google Vision
+#
+def render(frm, ret, fresh) :
+    global detect_sel, agg, ent
+
+    # Results from Google Vision are accounted for once each, not once for every
+    #  frame that is framed with the same result. The alerts of a new result are
+    #  raised on the frame Google Vision has looked at, with the objects where
+    #  Google Vision found them, rather than on the newer frame being rendered now.
     #
-    
-    if detect_sel % SAMPLE_SEP == 0 :
-        ret = gvision.gvision(frm, "object")
-        #print("Number of Objects Found : " .format(len(ret)))
-        for object_ in ret:
-            name1= format(object_.name)
-            if name1 == "Handgun" :
-                a = image.record_image()
-                a = image.overlay_text(a,"GUN Detected", (10,20), (0,0,0) , False)
-                image.replay_image(a)
-                print("Gun Detected...")
-                image.save_image(a,"/home/student/Desktop/LifeLine/detectedgun.jpg")
-                root = tk.Tk()
-                logo = tk.PhotoImage(file="/home/student/Desktop/Classwork/CW4/gun.png")
-                one = tk.Label(root,text="GUN ALERT!!! A gun has been detected in LE4 HKU. Click the button to call for Backup!!",bg="red", fg="white",font ="Times 28 bold")
-                button= tk.Button(root,text="Call Backup", command=callpolice, font ="Times 28 bold")
-                theLabel = tk.Label(root, image=logo)
-                one.pack()
-                button.pack()
-                theLabel.pack()
-                tk.mainloop()
-            if  name1 == "Rifle" or name1 == "Shot gun":
-                a = image.record_image()
-                a = image.overlay_text(a,"Rifle/SHotgun Detected", (10,20), (0,0,0) , False)
-                image.replay_image(a)
-                print("Rifle/ShotGun Detected...")
-                image.save_image(a,"/home/student/Desktop/LifeLine/detectedshotgun.jpg")
-                root = tk.Tk()
-                logo = tk.PhotoImage(file="/home/student/Desktop/Classwork/CW4/rifle.png")
-                one = tk.Label(root,text="Rifle/ShotGun ALERT!!! A Rifle/ShotGun has been detected in LE4 HKU. Click the button to call for Backup!!",bg="red", fg="white",font ="Times 28 bold")
-                button= tk.Button(root,text="Call Backup", command=callpolice, font ="Times 28 bold")
-                theLabel = tk.Label(root, image=logo)
-                one.pack()
-                button.pack()
-                theLabel.pack()
-                tk.mainloop()
-                #send_an_email() 
-            if name1 == "Kitchen knife" or name1 == "Knife" or name1 == "Tableware knife":
-                print("Knife Detected")
-                a = image.record_image()
-                a = image.overlay_text(a,"Knife Detected", (10,20), (0,0,0) , False)
-                image.replay_image(a)
-                image.save_image(a,"/home/student/Desktop/Classwork/CW4/detectedknife.jpg")
-                root = tk.Tk()
-                button= tk.Button(root,text="Call Backup", command=callpolice, font ="Times 28 bold")
-                logo = tk.PhotoImage(file="/home/student/Desktop/Classwork/CW4/knife.png")
-                one = tk.Label(root,text="Knife Alert. A Knife has been detected in LE4 HKU. Click the Button to call for Backup!!",bg="red", fg="white", font ="Times 28 bold")
-                theLabel = tk.Label(root, image=logo)
-                one.pack()
-                button.pack()
-                theLabel.pack()
-                tk.mainloop()
-                
-
-    # The original captured video frame with the Google Vision result list is
-    #  put as argument to `highlight_image' function in `image' module for
-    #  image rendering, i.e., framing identified objects and caption the type
-    #  an object is identified as. The result from `highlight_image' is directly
-    #  feed as an argument to `replay_video' function in `image' module to
-    #  trigger a display window or update an existing triggered display window.
+    if fresh is True :
+        respond.alert(lifeline.detected, lifeline.result, lifeline.origin)
+
+    # The captured video frame with the Google Vision result list is put as
+    #  argument to `render' of `respond' for image rendering, i.e., framing
+    #  identified objects and caption the type an object is identified as. The
+    #  rendered frame is then given to `replay_video' function in `image' module
+    #  to trigger a display window or update an existing triggered display window.
     #
-    # Note that, if `gvision' is not run in current step, e.g., in counter 1, 2,
-    #  ..., 19 and 21, 22, ..., 39 and ..., the stagnant result is used to frame
-    #  and tag objects. Therefore, if the up-to-date image shifted from previous
-    #  frame too much, the framing will mis-align for sure. But it is again,
-    #  a compromise for tolerable user experience.
+    # Note that, while `gvision' is working on a newer frame, the objects of the
+    #  last result are followed to the current frame by the tracker of the
+    #  pipeline, therefore, the framing moves along with the objects.
     #
-    image.replay_video(image.highlight_image(frm, ret, txttag = "name"))
-        
+    respond.render(frm, ret)
 
     # We advance the counter by 1, this counter will overflow if the program is
     #  executed for infinite time. But for sure, this will not happen, you have
@@ -220,9 +266,39 @@ while True :
     agg += dlt
 
     #print("Frame Rate: " + str(1 / dlt) + " FPS (Average: " + str(1 / (agg / detect_sel)) + " FPS)")
+    FRAME_RATE.set(detect_sel / agg)
 
     ent = time.time()
 
+# A pipeline that runs forever without stopping. Video frames are captured by
+#  calling `record_frame()' in `image' module in one thread, identified by
+#  `detect' in another and rendered by `render' in this thread.
+#
+# A frame from `record_frame()' is encoded as JPEG once only, however many
+#  times the JPEG content is needed. The camera can encode every frame into
+#  JPEG with its own hardware as well, by `image.CAMERA.hardware_jpeg = True',
+#  sparing the Raspberry Pi processor the encoding. It is left off until the
+#  JPEG images are checked to be paired with the right RGB frames on the
+#  camera, as they come from two different outputs of the camera.
+#
+# Instead of a fixed 1 in 20 frames, frames are sampled about as often as Google
+#  Vision answers, measured as the program runs, but not more than `MAX_RATE'
+#  nor less than `MIN_RATE' frames a second.
+#
+# Only frames with something moving in the scene are identified. An empty
+#  corridor at night is looked at once every `image.HEARTBEAT' seconds only.
+#
+# In between results, objects are followed from frame to frame by `tracker', so
+#  the frames drawn stay on moving objects instead of where they were last seen.
+#
+MIN_RATE = 0.5
+MAX_RATE = 4
+
+lifeline = pipeline.Pipeline(capture, detect, render, result = [], gate = image.MotionGate(),
+    scheduler = pipeline.SampleScheduler(MIN_RATE, MAX_RATE), tracker = tracker.FlowTracker(norm = True), pool = image.FRAME_POOL)
+
+lifeline.run()
+
 # Destroy opened video windows.
 #
 cv2.destroyAllWindows()
@@ -0,0 +1,399 @@
+#
+# Name: benchmark.py
+#
+# Description: Benchmark of the whole capture, identification, render and alert
+#  path of LifeLine. Frames are taken from synthetic frames or recorded footage
+#  and identified by the real Google Vision client of `gvision', talking over
+#  gRPC to a local stand-in of Google Vision API, `standin.VisionServer', which
+#  answers with a configurable latency, failure rate and rate of corrupted
+#  images. Frames are rendered and alerts raised by `responder', the very code
+#  LifeLine runs, clips are recorded by `clip', emails are sent by `mailer' to a
+#  local SMTP stand-in and, with --display, alerts are shown by `presenter'.
+#  Runs are repeatable and need no credentials, network or API quota, but the
+#  google-cloud-vision (1.x) and grpcio packages LifeLine itself uses have to be
+#  installed. Throughput, stage latency percentiles and allocations are reported
+#  and compared against a stored baseline to flag regressions.
+#
+#  Usage: python benchmark.py [--source synthetic|FILE|FOLDER] [--frames N] [--fps F]
+#          [--latency S] [--failure P] [--corrupt P] [--batch] [--baseline FILE]
+#          [--save-baseline FILE]
+#
+
+import argparse, json, os, shutil, tempfile, time, sys, gc, tracemalloc, threading
+import numpy
+import image, pipeline, source, cache, tracker, incident, clip, mailer, standin, tracing, responder
+
+try :
+    import gvision
+    from google.api_core import exceptions
+except ImportError as err :
+    sys.exit("[ERROR] " + str(err) + ". The benchmark drives the Google Vision client, install google-cloud-vision 1.x and grpcio first.")
+
+# PARAMETERS
+# ====================
+#
+FRAMES = 600               # NUMBER OF FRAMES PLAYED BY DEFAULT
+FPS = 30                   # FRAMES PER SECOND THE SOURCE IS PACED AT BY DEFAULT, AS THE CAMERA
+LATENCY = 0.3              # MEDIAN ROUND TRIP TIME (IN SECOND) OF THE STAND-IN SERVICE
+JITTER = 0.5               # SPREAD (SIGMA OF LOG-NORMAL) OF THE ROUND TRIP TIME
+FAILURE = 0.0              # PORTION (0-1) OF REQUESTS FAILING
+CORRUPT = 0.0              # PORTION (0-1) OF IMAGES FAILING ON THEIR OWN
+WEAPON_EVERY = 5           # EVERY N-TH ANSWER CONTAINS A HANDGUN, EXERCISING THE ALERT PATH
+TOLERANCE = 0.1            # PORTION (0-1) A METRIC MAY WORSEN BY BEFORE IT IS A REGRESSION
+MAIL_TIMEOUT = 30          # TIMEOUT (IN SECOND) FOR THE EMAILS PENDING TO BE SENT AT THE END
+
+#
+# BENCHMARK ROUTINES
+#
+
+# STAGETIMER
+# ====================
+#
+# Samples of the time taken by each stage, summarised as percentiles.
+#
+class StageTimer :
+    def __init__(self) :
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, value) :
+        with self.lock :
+            self.samples.setdefault(stage, []).append(value)
+
+    # SUMMARY
+    # ====================
+    #
+    # @ret           A dictionary mapping stage names to dictionaries of the count and
+    #                 the mean, p50, p95 and p99 (in millisecond) of the samples.
+    #
+    def summary(self) :
+        ret = {}
+
+        with self.lock :
+            for stage, values in self.samples.items() :
+                p50, p95, p99 = numpy.percentile(values, [50, 95, 99]) * 1000
+
+                ret[stage] = {"count" : len(values), "mean" : float(numpy.mean(values)) * 1000, "p50" : float(p50), "p95" : float(p95), "p99" : float(p99)}
+
+        return ret
+
+# OPEN_SOURCE
+# ====================
+#
+# @param spec    A string of "synthetic", a video file location path or an image
+#                 folder location path.
+# @param frames  An integer of the number of frames played.
+# @param fps     None or a number of frames per second the source is paced at.
+#
+# @ret           A source.CaptureSource object.
+#
+def open_source(spec, frames, fps = None) :
+    if spec == "synthetic" :
+        return source.SyntheticSource(fps = fps, count = frames)
+    elif os.path.isdir(spec) :
+        return source.ImageFolderSource(spec, fps = fps, loop = True)
+    else :
+        return source.VideoFileSource(spec, realtime = fps is not None, loop = True)
+
+# RUN_BENCHMARK
+# ====================
+#
+# Drive the pipeline over a capture source with the stand-in service and measure it.
+#
+# @param src     A capture source, e.g., as returned by open_source().
+# @param vision  A standin.VisionServer object, not yet started.
+# @param frames  An integer of the number of frames played.
+# @param use_cache A boolean variable of whether results are cached by image hash.
+# @param use_gate A boolean variable of whether frames pass a motion gate.
+# @param use_tracker A boolean variable of whether objects are tracked in between.
+# @param use_batch A boolean variable of whether frames are sent by gvision_batch()
+#                 rather than gvision().
+# @param display A boolean variable of whether frames are shown in a video window
+#                 and alerts in an alert window.
+# @param trace_alloc A boolean variable of whether Python allocations are traced,
+#                 which slows the run down.
+#
+# @ret           A dictionary of the measurements.
+#
+def run_benchmark(src, vision, frames = FRAMES, use_cache = False, use_gate = False, use_tracker = False, use_batch = False, display = False, trace_alloc = False) :
+    timer = StageTimer()
+    counts = {"captured" : 0, "rendered" : 0, "failures" : 0, "corrupt" : 0, "alerts" : 0}
+    stamps = {}
+
+    image.set_source(src)
+
+    vision.start()
+
+    gvision.set_endpoint(vision.endpoint(), secure = False)
+    gvision.client_session()
+
+    # Snapshots and clips of alerts are written to a scratch folder, emails are sent
+    #  to the SMTP stand-in.
+    #
+    outdir = tempfile.mkdtemp(prefix = "lifeline-benchmark-")
+
+    smtp = standin.SmtpServer()
+    smtp.start()
+
+    mail = mailer.Mailer(standin.STANDIN_HOST, smtp.port, "lifeline@localhost", ["guard@localhost"], user = "lifeline", password = "benchmark", starttls = False).start()
+    clips = clip.ClipRecorder().start()
+
+    if display is True :
+        import presenter
+
+        alerts = presenter.AlertPresenter().start()
+    else :
+        alerts = None
+
+    results = cache.ResultCache() if use_cache is True else None
+
+    # Render and alert stages are those of LifeLine, with an incident opened on the
+    #  first sighting of a weapon so the alert path is exercised often.
+    #
+    respond = responder.Responder(incident.IncidentEngine(responder.WEAPON_KINDS, open_hits = 1, close_misses = 1, cooldown = 0),
+        alerts = alerts, clips = clips, mail = mail, folder = outdir, display = display, verbose = False)
+
+    def capture() :
+        ent = time.perf_counter()
+
+        frm = image.record_frame() if counts["captured"] < frames else None
+
+        if frm is not None :
+            clips.record(frm)
+
+            # Frames dropped before inference leave their time of capture behind,
+            #  only the most recent ones are kept.
+            #
+            if len(stamps) >= 64 :
+                del stamps[next(iter(stamps))]
+
+            stamps[id(frm)] = ent
+            counts["captured"] += 1
+
+            timer.record("capture", time.perf_counter() - ent)
+
+        return frm
+
+    def infer(frm) :
+        ent = time.perf_counter()
+
+        try :
+            if use_batch is True :
+                ret = gvision.gvision_batch([frm], ["object"])[0]
+
+                # An image failing on its own comes back in its slot of the batch.
+                #
+                if isinstance(ret, exceptions.GoogleAPICallError) is True :
+                    counts["corrupt"] += 1
+
+                    ret = []
+                else :
+                    ret = ret["object"]
+            else :
+                ret = gvision.gvision(frm, "object", cache = results)
+        except exceptions.GoogleAPICallError :
+            counts["failures"] += 1
+
+            ret = []
+
+        end = time.perf_counter()
+
+        timer.record("infer", end - ent)
+
+        if id(frm) in stamps :
+            timer.record("detect", end - stamps.pop(id(frm)))
+
+        return ret
+
+    def render(frm, ret, fresh) :
+        if fresh is True :
+            ent = time.perf_counter()
+
+            events = respond.alert(runner.detected, runner.result, runner.origin)
+
+            timer.record("alert", time.perf_counter() - ent)
+
+            counts["alerts"] += len([event for event, _ in events if event == "open"])
+
+        ent = time.perf_counter()
+
+        respond.render(frm, ret)
+
+        timer.record("render", time.perf_counter() - ent)
+
+        counts["rendered"] += 1
+
+    runner = pipeline.Pipeline(capture, infer, render, result = [], gate = image.MotionGate() if use_gate is True else None,
+        scheduler = pipeline.SampleScheduler(), tracker = tracker.FlowTracker(norm = True) if use_tracker is True else None, pool = image.FRAME_POOL)
+
+    misses = image.FRAME_POOL.misses
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+
+    if trace_alloc is True :
+        tracemalloc.start()
+
+    ent = time.perf_counter()
+
+    runner.run()
+
+    elapsed = time.perf_counter() - ent
+
+    ret = {
+        "elapsed" : elapsed,
+        "captured" : counts["captured"],
+        "rendered" : counts["rendered"],
+        "dropped" : runner.dropped,
+        "capture_fps" : counts["captured"] / elapsed,
+        "render_fps" : counts["rendered"] / elapsed,
+        "api_calls" : vision.calls,
+        "api_calls_per_hour" : vision.calls / elapsed * 3600,
+        "api_failures" : vision.failures,
+        "failures" : counts["failures"],
+        "corrupt" : counts["corrupt"],
+        "alerts" : counts["alerts"],
+        "pool_misses" : image.FRAME_POOL.misses - misses,
+        "gc_collections" : sum(stat["collections"] for stat in gc.get_stats()) - collections,
+        "stages" : timer.summary()
+    }
+
+    if trace_alloc is True :
+        current, peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.stop()
+
+        ret["alloc_peak_kb"] = peak / 1024.0
+
+    if results is not None :
+        ret["cache_hits"] = results.hits
+
+    # Clips pending are written out as they are and emails pending are sent before
+    #  the stand-ins go away.
+    #
+    clips.stop()
+    mail.stop(MAIL_TIMEOUT)
+
+    if alerts is not None :
+        alerts.stop()
+
+    ret["emails"] = len(smtp.messages)
+
+    smtp.stop()
+    shutil.rmtree(outdir, ignore_errors = True)
+
+    image.set_source(None)
+    gvision.set_endpoint()
+    vision.stop()
+
+    return ret
+
+# COMPARE
+# ====================
+#
+# Compare measurements against a baseline.
+#
+# @param result  A dictionary of measurements, as returned by run_benchmark().
+# @param baseline A dictionary of measurements of the baseline.
+# @param tolerance A float (0-1) of the portion a metric may worsen by.
+#
+# @ret           A list of strings describing the regressions found.
+#
+def compare(result, baseline, tolerance = TOLERANCE) :
+    ret = []
+
+    # Higher is better for rates, lower is better for latencies and allocations.
+    #
+    for key in "capture_fps", "render_fps" :
+        if key in baseline and result[key] < baseline[key] * (1 - tolerance) :
+            ret.append(key + " " + format(result[key], ".1f") + " < baseline " + format(baseline[key], ".1f"))
+
+    for key in "pool_misses", "alloc_peak_kb" :
+        if key in baseline and key in result and result[key] > baseline[key] * (1 + tolerance) + 1 :
+            ret.append(key + " " + format(result[key], ".1f") + " > baseline " + format(baseline[key], ".1f"))
+
+    for stage, stats in result["stages"].items() :
+        if stage in baseline.get("stages", {}) :
+            for key in "p50", "p95", "p99" :
+                if stats[key] > baseline["stages"][stage][key] * (1 + tolerance) :
+                    ret.append(stage + " " + key + " " + format(stats[key], ".2f") + " ms > baseline " + format(baseline["stages"][stage][key], ".2f") + " ms")
+
+    return ret
+
+# REPORT
+# ====================
+#
+# Print measurements in a human readable form.
+#
+def report(result) :
+    print("Frames     : " + str(result["captured"]) + " captured, " + str(result["rendered"]) + " rendered, " + str(result["dropped"]) + " dropped in " + format(result["elapsed"], ".2f") + " s")
+    print("Throughput : " + format(result["capture_fps"], ".1f") + " FPS captured, " + format(result["render_fps"], ".1f") + " FPS rendered")
+    print("API Calls  : " + str(result["api_calls"]) + " (" + format(result["api_calls_per_hour"], ".0f") + " per hour), " + str(result["api_failures"]) + " failed at the service, " + str(result["failures"]) + " failed after retries, " + str(result["corrupt"]) + " images failed")
+    print("Alerts     : " + str(result["alerts"]) + " raised, " + str(result["emails"]) + " emails sent")
+    print("Allocation : " + str(result["pool_misses"]) + " frames outside pool, " + str(result["gc_collections"]) + " GC collections" + (", peak " + format(result["alloc_peak_kb"], ".0f") + " KB" if "alloc_peak_kb" in result else ""))
+
+    for stage, stats in sorted(result["stages"].items()) :
+        print("  " + stage.ljust(8) + " n=" + str(stats["count"]).ljust(6) + " p50 " + format(stats["p50"], "8.2f") + " ms  p95 " + format(stats["p95"], "8.2f") + " ms  p99 " + format(stats["p99"], "8.2f") + " ms")
+
+#
+# (END OF) BENCHMARK ROUTINES
+#
+
+#
+# USER ROUTINES
+#
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser(description = "Benchmark the LifeLine pipeline against a local stand-in of Google Vision API.")
+    parser.add_argument("--source", default = "synthetic", help = "synthetic, a video file or an image folder")
+    parser.add_argument("--frames", type = int, default = FRAMES)
+    parser.add_argument("--fps", type = float, default = FPS, help = "pace of the source, 0 for as fast as frames are read")
+    parser.add_argument("--latency", type = float, default = LATENCY)
+    parser.add_argument("--jitter", type = float, default = JITTER)
+    parser.add_argument("--failure", type = float, default = FAILURE)
+    parser.add_argument("--corrupt", type = float, default = CORRUPT)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--cache", action = "store_true")
+    parser.add_argument("--gate", action = "store_true")
+    parser.add_argument("--tracker", action = "store_true")
+    parser.add_argument("--batch", action = "store_true", help = "send frames by gvision_batch() rather than gvision()")
+    parser.add_argument("--display", action = "store_true", help = "show frames in a video window and alerts in an alert window")
+    parser.add_argument("--trace-alloc", action = "store_true")
+    parser.add_argument("--trace", default = None, help = "trace log every identified frame is traced to, see tracing.py")
+    parser.add_argument("--json", action = "store_true", help = "print the measurements as JSON")
+    parser.add_argument("--baseline", default = None, help = "baseline file to compare against")
+    parser.add_argument("--save-baseline", default = None, help = "file to store the measurements in as a baseline")
+    parser.add_argument("--tolerance", type = float, default = TOLERANCE)
+
+    args = parser.parse_args()
+
+    if args.trace is not None :
+        tracing.TRACER.start(args.trace, every = 1)
+
+    vision = standin.VisionServer(args.latency, args.jitter, args.failure, args.corrupt, WEAPON_EVERY, args.seed)
+
+    result = run_benchmark(open_source(args.source, args.frames, args.fps if args.fps > 0 else None), vision, args.frames,
+        args.cache, args.gate, args.tracker, args.batch, args.display, args.trace_alloc)
+
+    if args.trace is not None :
+        tracing.TRACER.stop()
+
+    if args.json is True :
+        print(json.dumps(result, indent = 2, sort_keys = True))
+    else :
+        report(result)
+
+    if args.save_baseline is not None :
+        with open(args.save_baseline, "w") as basefile :
+            json.dump(result, basefile, indent = 2, sort_keys = True)
+
+    if args.baseline is not None :
+        with open(args.baseline) as basefile :
+            regressions = compare(result, json.load(basefile), args.tolerance)
+
+        for regression in regressions :
+            print("REGRESSION: " + regression)
+
+        sys.exit(1 if len(regressions) > 0 else 0)
+
+#
+# (END OF) USER ROUTINES
+#
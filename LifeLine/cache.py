@@ -0,0 +1,150 @@
+#
+# Name: cache.py
+#
+# Description: Library caching image processing results by the look of the image.
+#  A camera fixed in place sees near identical frames most of the time, the
+#  results of an earlier frame can be reused for a frame looking alike without
+#  another Google Vision API round trip.
+#
+
+import time, threading, collections
+import image
+
+# PARAMETERS
+# ====================
+#
+DISTANCE = 4               # MAXIMUM NUMBER OF DIFFERING HASH BITS FOR FRAMES TO LOOK ALIKE
+CAPACITY = 32              # MAXIMUM NUMBER OF RESULTS KEPT
+TTL = 5                    # PERIOD (IN SECOND) A RESULT REMAINS VALID
+
+#
+# CACHING ROUTINES
+#
+
+# RESULTCACHE
+# ====================
+#
+# A least recently used cache of results keyed by the difference hash of the image
+#  they were computed from. A lookup hits when a result for the same request tag is
+#  found whose image hash is within distance bits of the hash of the new image and
+#  which is not older than ttl seconds.
+#
+# The cache trades accuracy for requests. A hash summarises the look of the whole
+#  image, a small object appearing in an otherwise unchanged scene, e.g., a weapon
+#  drawn, changes few bits, if any, and the result of the image before is returned
+#  for up to ttl seconds. A cache is therefore to be used where such a miss is
+#  harmless, not for spotting small objects, and is not used by gvision() unless
+#  passed to it.
+#
+# @param distance An integer of the maximum Hamming distance between image hashes.
+# @param capacity An integer of the maximum number of results kept. The least
+#                 recently used result is evicted first.
+# @param ttl     A number of seconds a result remains valid since it was computed.
+#
+class ResultCache :
+    def __init__(self, distance = DISTANCE, capacity = CAPACITY, ttl = TTL) :
+        if distance is not None and type(distance) is int and capacity is not None and type(capacity) is int :
+            if distance < 0 or capacity < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        if ttl is not None and (type(ttl) is float or type(ttl) is int) :
+            pass
+        else :
+            raise TypeError
+
+        self.distance = distance
+        self.capacity = capacity
+        self.ttl = ttl
+
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # LOOKUP
+    # ====================
+    #
+    # Search for a valid result computed from an image looking alike.
+    #
+    # @param key     An integer of the image hash, as returned by image.dhash().
+    # @param tag     A hashable object identifying the request, e.g., the op_type.
+    # @param now     None or a number of seconds of the current time.
+    #
+    # @ret           A tuple of a boolean value of whether a result is found and
+    #                 the result found or None.
+    #
+    def lookup(self, key, tag, now = None) :
+        if now is None :
+            now = time.time()
+
+        with self.lock :
+            for entry in list(self.entries) :
+                stamp, result = self.entries[entry]
+
+                if now - stamp > self.ttl :
+                    del self.entries[entry]
+                elif entry[0] == tag and bin(entry[1] ^ key).count("1") <= self.distance :
+                    self.entries.move_to_end(entry)
+
+                    self.hits += 1
+
+                    return True, result
+
+            self.misses += 1
+
+            return False, None
+
+    # STORE
+    # ====================
+    #
+    # Keep a result computed from an image, evicting the least recently used result
+    #  should the cache be full.
+    #
+    # @param key     An integer of the image hash, as returned by image.dhash().
+    # @param tag     A hashable object identifying the request, e.g., the op_type.
+    # @param result  The result to be kept.
+    # @param now     None or a number of seconds of the time the result is computed.
+    #
+    def store(self, key, tag, result, now = None) :
+        if now is None :
+            now = time.time()
+
+        with self.lock :
+            self.entries[(tag, key)] = (now, result)
+            self.entries.move_to_end((tag, key))
+
+            while len(self.entries) > self.capacity :
+                self.entries.popitem(last = False)
+
+    # FETCH
+    # ====================
+    #
+    # Return the result for an image from the cache, or compute and keep it when no
+    #  image looking alike has a valid result.
+    #
+    # @param img     A PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object containing JPEG format image
+    # @param tag     A hashable object identifying the request, e.g., the op_type.
+    # @param call    A function computing the result on a miss.
+    # @param args    Arguments passed to call.
+    #
+    # @ret           The result found or computed.
+    #
+    def fetch(self, img, tag, call, *args) :
+        key = image.dhash(img)
+
+        found, result = self.lookup(key, tag)
+
+        if found is not True :
+            result = call(*args)
+
+            self.store(key, tag, result)
+
+        return result
+
+#
+# (END OF) CACHING ROUTINES
+#
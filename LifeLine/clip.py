@@ -0,0 +1,263 @@
+#
+# Name: clip.py
+#
+# Description: Library keeping the last few seconds of video in memory, JPEG
+#  compressed, and writing them out as a clip when an event takes place, along
+#  with the few seconds following the event. Evidence of what happened before
+#  and after an alert is kept without the camera being asked for another picture.
+#
+
+import threading, queue, time, collections
+import numpy, cv2
+from frame import Frame
+from pipeline import put_latest
+
+# PARAMETERS
+# ====================
+#
+PRE_EVENT = 5              # PERIOD (IN SECOND) OF VIDEO KEPT BEFORE AN EVENT
+POST_EVENT = 5             # PERIOD (IN SECOND) OF VIDEO KEPT AFTER AN EVENT
+RING_RATE = 10             # MAXIMUM NUMBER OF FRAMES KEPT PER SECOND
+BACKLOG = 4                # NUMBER OF FRAMES ALLOWED TO WAIT FOR COMPRESSION BEFORE THE OLDEST IS DROPPED
+
+#
+# CLIP RECORDING ROUTINES
+#
+
+# CLIPRECORDER
+# ====================
+#
+# A recorder keeping a ring of JPEG compressed frames of the last pre seconds. Upon
+#  trigger(), the frames in the ring and those recorded in the following post
+#  seconds are written to a clip file. Compression and writing take place in
+#  threads of the recorder, the caller only copies the frame. Frames are to be
+#  recorded as captured, e.g., by the capture stage, before anything is drawn on
+#  them, so the clips are footage of the scene without overlays.
+#
+# A clip file ending in ".mjpeg" or ".mjpg" is a stream of the very JPEG content
+#  kept in the ring, written without being decoded or encoded again. A clip file of
+#  any other extension, e.g., ".avi" or ".mp4", is encoded by OpenCV VideoWriter.
+#
+# @param pre     A number of seconds of video kept before an event.
+# @param post    A number of seconds of video kept after an event.
+# @param rate    A number of the maximum frames kept per second. Frames recorded more
+#                 often are skipped.
+#
+class ClipRecorder :
+    def __init__(self, pre = PRE_EVENT, post = POST_EVENT, rate = RING_RATE) :
+        for param in pre, post, rate :
+            if param is not None and (type(param) is float or type(param) is int) :
+                if param < 0 :
+                    raise ValueError
+            else :
+                raise TypeError
+
+        if rate == 0 :
+            raise ValueError
+
+        self.pre = pre
+        self.post = post
+        self.rate = rate
+
+        self.ring = collections.deque()
+        self.clips = []
+        self.lock = threading.Lock()
+
+        self.frames = queue.Queue(maxsize = BACKLOG)
+        self.finished = queue.Queue()
+        self.threads = []
+
+        self.last = None
+        self.dropped = 0
+        self.written = 0
+
+    # START
+    # ====================
+    #
+    # Start the compression and writing threads.
+    #
+    def start(self) :
+        if len(self.threads) == 0 :
+            for loop in self.__compress_loop, self.__write_loop :
+                thread = threading.Thread(target = loop, daemon = True)
+
+                thread.start()
+
+                self.threads.append(thread)
+
+        return self
+
+    # RECORD
+    # ====================
+    #
+    # Keep a frame in the ring.
+    #
+    # @param img     A NumPy Array object containing RGB format image or a Frame object.
+    #                 A copy is taken, the caller may reuse the image afterwards. The
+    #                 JPEG content of a Frame object encoded by the camera hardware is
+    #                 kept as it is rather than compressed again.
+    # @param now     None or a number of seconds of the time of capture, defaults to
+    #                 the current time.
+    #
+    def record(self, img, now = None) :
+        if now is None :
+            now = time.time()
+
+        if self.last is not None and now - self.last < 1.0 / self.rate :
+            return
+
+        if img is not None and isinstance(img, Frame) is True and img.encoded is True :
+            pixels = img.jpeg
+        elif img is not None and isinstance(img, Frame) is True :
+            pixels = img.array
+        elif img is not None and isinstance(img, numpy.ndarray) is True :
+            pixels = img
+        else :
+            raise TypeError
+
+        self.last = now
+
+        self.dropped += put_latest(self.frames, (now, pixels if type(pixels) is bytes else pixels.copy()))
+
+    # TRIGGER
+    # ====================
+    #
+    # Write a clip of the video around the current time. The call returns
+    #  immediately, the clip is written once the post event period is over.
+    #
+    # @param ofile   A string of file location path of the clip.
+    # @param now     None or a number of seconds of the time of the event, defaults
+    #                 to the current time.
+    #
+    def trigger(self, ofile, now = None) :
+        if ofile is not None and type(ofile) is str :
+            pass
+        else :
+            raise TypeError
+
+        if now is None :
+            now = time.time()
+
+        with self.lock :
+            self.clips.append({"ofile" : ofile, "until" : now + self.post, "frames" : list(self.ring)})
+
+    # STOP
+    # ====================
+    #
+    # Write out the clips pending as they are and finish the recorder threads.
+    #
+    # @param timeout None or a number of seconds to wait for the clips to be written.
+    #
+    def stop(self, timeout = None) :
+        put_latest(self.frames, None)
+
+        for thread in self.threads :
+            thread.join(timeout)
+
+    # __COMPRESS_LOOP
+    # ====================
+    #
+    # Body of the compression thread, compressing frames into the ring and the
+    #  clips pending.
+    #
+    def __compress_loop(self) :
+        while True :
+            item = self.frames.get()
+
+            if item is None :
+                break
+
+            stamp, pixels = item
+
+            entry = (stamp, pixels if type(pixels) is bytes else Frame(pixels).jpeg)
+
+            with self.lock :
+                self.ring.append(entry)
+
+                while len(self.ring) > 0 and stamp - self.ring[0][0] > self.pre :
+                    self.ring.popleft()
+
+                for clip in list(self.clips) :
+                    clip["frames"].append(entry)
+
+                    if stamp >= clip["until"] :
+                        self.clips.remove(clip)
+                        self.finished.put(clip)
+
+        with self.lock :
+            for clip in self.clips :
+                self.finished.put(clip)
+
+            self.clips = []
+
+        self.finished.put(None)
+
+    # __WRITE_LOOP
+    # ====================
+    #
+    # Body of the writing thread, writing finished clips to files.
+    #
+    def __write_loop(self) :
+        while True :
+            clip = self.finished.get()
+
+            if clip is None :
+                break
+
+            try :
+                write_clip(clip["ofile"], clip["frames"])
+
+                self.written += 1
+            except (OSError, cv2.error) as error :
+                print("ClipRecorder: " + clip["ofile"] + " " + str(error))
+
+# WRITE_CLIP
+# ====================
+#
+# Write a clip of JPEG compressed frames to a file.
+#
+# @param ofile   A string of file location path of the clip. A file ending in
+#                 ".mjpeg" or ".mjpg" is a stream of the JPEG content as it is, a file
+#                 of any other extension is encoded by OpenCV VideoWriter.
+# @param frames  A list of tuples of a number of seconds of the time of capture and a
+#                 bytes object of JPEG format image.
+#
+def write_clip(ofile, frames) :
+    if ofile.lower().endswith((".mjpeg", ".mjpg")) :
+        with open(ofile, "wb") as clipfile :
+            for _, jpeg in frames :
+                clipfile.write(jpeg)
+
+        return
+
+    if len(frames) == 0 :
+        return
+
+    # The clip is played at the average rate the frames were kept at.
+    #
+    if len(frames) > 1 and frames[-1][0] > frames[0][0] :
+        fps = (len(frames) - 1) / (frames[-1][0] - frames[0][0])
+    else :
+        fps = RING_RATE
+
+    size = Frame(frames[0][1]).size
+
+    writer = cv2.VideoWriter(ofile, cv2.VideoWriter_fourcc(*("mp4v" if ofile.lower().endswith(".mp4") else "MJPG")), fps, size)
+
+    try :
+        for _, jpeg in frames :
+            pixels = cv2.imdecode(numpy.frombuffer(jpeg, dtype = numpy.uint8), cv2.IMREAD_COLOR)
+
+            # Frames of a dimension other than the first one, e.g., after
+            #  resolution_rescale(), are fitted to the dimension of the clip.
+            #
+            if (pixels.shape[1], pixels.shape[0]) != size :
+                pixels = cv2.resize(pixels, size)
+
+            writer.write(pixels)
+    finally :
+        writer.release()
+
+#
+# (END OF) CLIP RECORDING ROUTINES
+#
@@ -11,10 +11,9 @@
 #  relevant descriptions in a video stream.
 #
 
-import image, gvision
+import image, gvision, pipeline
 import os, time, signal
-import numpy, cv2, random
-from PIL import Image
+import cv2
 
 # __exit
 # ====================
@@ -44,20 +43,12 @@ signal.signal(signal.SIGINT, __exit)
 #  you can not handle the case, why would you think your computer knows how to
 #  handle non-existing objects? (wink)
 #
-SAMPLE_SEP = 20
 detect_sel = 0
-pjoy = None
-psup = None
-psad = None
-pang = None
-njoy = None
 
 __easter = False
 
 BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 
-ret = []
-
 predicate = dict()
 predicate["joy"] = False
 predicate["sur"] = False
@@ -67,53 +58,78 @@ predicate["ang"] = False
 agg = 0
 ent = time.time()
 
-# A loop that runs forever without stopping
+# Connect to Google Vision API before the first frame is captured. The client
+#  session is shared by every `gvision()' call below, so the credentials and the
+#  secure connection are set up once here instead of once per sampled frame.
 #
-while True :
-    # Capture a video frame by calling `record_video()' in `image' module.
-    #
-    frm = image.record_video()
+gvision.client_session()
 
-    # If the counter `detect_sel' is divisible by 20, i.e., 0, 20, 40, ...,
-    #  call `gvision()' in the `gvision' module and gives the video frame as an
-    #  argument for `object' identification.
-    #
-    # As the submission of a video frame over the WiFi, through the Internet to
-    #  distant Google Vision API incurs heavy latency, aka., delay, the choice
-    #  of sending 1 video frame in every 20 frames captured is an engineering
-    #  compromise for perceived smoother user experience over actual smoothness
-    #  in captioning following identifiable objects.
+# DETECT
+# ====================
+#
+# Inference stage of the pipeline. The video frame is given to `gvision()' in
+#  the `gvision' module as an argument for `face' identification.
+#
+# As the submission of a video frame over the WiFi, through the Internet to
+#  distant Google Vision API incurs heavy latency, aka., delay, the stage runs
+#  in its own thread. While a frame is away, newly captured frames keep being
+#  displayed and only the newest of them is sent once the result comes back.
+#
+# !!!Engineering is an art of compromise between theoretical science and
+#  realistics constraints!!!
+#
+# @param frm     A video frame captured by `record_video()'
+#
+# @ret           A tuple of the list of faces identified by Google Vision and its
+#                 subsets of joyful, not joyful, surprised, sorrowful and angry faces
+#
+def detect(frm) :
+    ret = gvision.gvision(frm, "face")
+
+    # Extract recognised faces that is identified to be joyful
     #
-    # !!!Engineering is an art of compromise between theoretical science and
-    #  realistics constraints!!!
+    pjoy = gvision.face_extract(ret, emotion = "joy", negate = False)
+    njoy = gvision.face_extract(ret, emotion = "joy", negate = True)
+
+    # Extract recognised faces that is identified to be surprise
     #
-    # The result returned from the `gvision' function is a long list of objects
-    #  distinguishable by the Google Vision with their locations and recognised
-    #  object type descriptions.
+    psup = gvision.face_extract(ret, emotion = "surprise", negate = False)
+
+    # Extract recognised faces that is identified to be sorrow
     #
-    # Recall above, if we have not give meaning to `detect_sel', how possible
-    #  the computer can divide non-existence with 20 and know the results? It is
-    #  non-existence! Not ZERO!
+    psad = gvision.face_extract(ret, emotion = "sorrow", negate = False)
+
+    # Extract recognised faces that is identified to be angry
     #
-    if detect_sel % SAMPLE_SEP == 0 :
-        ret = gvision.gvision(frm, "face")
+    pang = gvision.face_extract(ret, emotion = "anger", negate = False)
 
-        # Extract recognised faces that is identified to be joyful
-        #
-        pjoy = gvision.face_extract(ret, emotion = "joy", negate = False)
-        njoy = gvision.face_extract(ret, emotion = "joy", negate = True)
+    return ret, pjoy, njoy, psup, psad, pang
 
-        # Extract recognised faces that is identified to be surprise
-        #
-        psup = gvision.face_extract(ret, emotion = "surprise", negate = False)
+# Overlays drawn onto every frame. The logo is read from the SD card and drawn
+#  into its layer once, instead of once per frame.
+#
+counts = [image.DynamicText(anchor = (-20, -120), colour = (0, 255, 0)),
+    image.DynamicText(anchor = (-20, -96), colour = (0, 0, 0)),
+    image.DynamicText(anchor = (-20, -68), colour = (0, 0, 255)),
+    image.DynamicText(anchor = (-20, -44), colour = (255, 0, 0)),
+    image.DynamicText(anchor = (-20, -20), colour = (255, 255, 255))]
 
-        # Extract recognised faces that is identified to be sorrow
-        #
-        psad = gvision.face_extract(ret, emotion = "sorrow", negate = False)
+logo = image.OverlayLayer()
+logo.add_image(image.load_asset(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
 
-        # Extract recognised faces that is identified to be angry
-        #
-        pang = gvision.face_extract(ret, emotion = "anger", negate = False)
+# RENDER
+# ====================
+#
+# Render stage of the pipeline, called for every captured video frame.
+#
+# @param frm     A video frame captured by `record_video()'
+# @param res     The most recent tuple returned by `detect'
+# @param fresh   True if `res' has just come back from Google Vision
+#
+def render(frm, res, fresh) :
+    global __easter, detect_sel, agg, ent
+
+    ret, pjoy, njoy, psup, psad, pang = res
 
     # The original captured video frame with the Google Vision result list is
     #  put as argument to `highlight_image' function in `image' module for
@@ -122,121 +138,70 @@ while True :
     #  feed as an argument to `replay_video' function in `image' module to
     #  trigger a display window or update an existing triggered display window.
     #
-    # Note that, if `gvision' is not run in current step, e.g., in counter 1, 2,
-    #  ..., 19 and 21, 22, ..., 39 and ..., the stagnant result is used to frame
-    #  and tag objects. Therefore, if the up-to-date image shifted from previous
-    #  frame too much, the framing will mis-align for sure. But it is again,
-    #  a compromise for tolerable user experience.
+    # Note that, while `gvision' is working on a newer frame, the stagnant result
+    #  is used to frame and tag objects. Therefore, if the up-to-date image shifted
+    #  from previous frame too much, the framing will mis-align for sure. But it is
+    #  again, a compromise for tolerable user experience.
     #
     # frm = image.overlay_text(frm, "Faces Detected: " + str(len(pjoy)) + " / " + str(len(ret)), anchor = (-20, -20), colour = (255, 255, 255))
-    frm = image.overlay_text(frm, "=D " + str(len(pjoy)), anchor = (-20, -120), colour = (0, 255, 0))
-    frm = image.overlay_text(frm, "=[ " + str(len(psad)), anchor = (-20, -96), colour = (0, 0, 0))
-    frm = image.overlay_text(frm, "=O " + str(len(psup)), anchor = (-20, -68), colour = (0, 0, 255))
-    frm = image.overlay_text(frm, ">( " + str(len(pang)), anchor = (-20, -44), colour = (255, 0, 0))
-    frm = image.overlay_text(frm, "Faces: " + str(len(ret)), anchor = (-20, -20), colour = ((255, 255, 255) if __easter is False else (172, 128, 255)))
-
-    frm = image.overlay_image(frm, image.load_image(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
-
-    frm = image.highlight_image(frm, pjoy, colour=(0, 255, 0), txttag = None, norm = False)
-
-    frm = image.highlight_image(frm, njoy, colour=(255, 0, 0), txttag = None, norm = False)
-
-    if __easter is True :
-        BLOCK_LENGTH = 16
+    # The overlays are stacked onto `overlays' and applied together onto a single
+    #  copy of the captured frame, the captured frame itself may still be waiting
+    #  for Google Vision and is left untouched. The counts are drawn again only
+    #  when they change, otherwise the layers drawn before are blended.
+    #
+    overlays = image.Compositor()
 
-        for obj in psad :
-            if isinstance(frm, numpy.ndarray) is not True :
-                box = [(vertex.x, vertex.y) for vertex in obj.bounding_poly.vertices]
+    overlays.add_layer(counts[0], "=D " + str(len(pjoy)))
+    overlays.add_layer(counts[1], "=[ " + str(len(psad)))
+    overlays.add_layer(counts[2], "=O " + str(len(psup)))
+    overlays.add_layer(counts[3], ">( " + str(len(pang)))
+    overlays.add_layer(counts[4], "Faces: " + str(len(ret)), colour = ((255, 255, 255) if __easter is False else (172, 128, 255)))
 
-                anchor_tl = (min([x[0] for x in box]), min([y[1] for y in box]))
-                anchor_br = (max([x[0] for x in box]), max([y[1] for y in box]))
+    overlays.add_layer(logo)
 
-                for i in range(anchor_tl[0], anchor_br[0] - BLOCK_LENGTH, BLOCK_LENGTH) :
-                    for j in range(anchor_tl[1], anchor_br[1] - BLOCK_LENGTH, BLOCK_LENGTH) :
-                        _ = random.randrange(127, 255, 16)
+    overlays.add_boxes(pjoy, colour=(0, 255, 0), txttag = None, norm = False)
 
-                        mos = Image.new("RGB", (BLOCK_LENGTH, BLOCK_LENGTH), (_, _, _))
+    overlays.add_boxes(njoy, colour=(255, 0, 0), txttag = None, norm = False)
 
-                        frm = image.overlay_image(frm, mos, anchor = (i, j), paste = True)
-            else :
-                box = numpy.array([(vertex.x, vertex.y) for vertex in obj.bounding_poly.vertices], numpy.int32)
+    frm = overlays.apply(frm)
 
-                anchor_tl = (min(box.swapaxes(0, 1)[0]), min(box.swapaxes(0, 1)[1]))
-                anchor_br = (max(box.swapaxes(0, 1)[0]), max(box.swapaxes(0, 1)[1]))
+    # Mosaic is painted over sorrowful faces and over the eyebrows of angry faces,
+    #  each face in one go by `pixelate_regions' instead of block by block.
+    #
+    if __easter is True :
+        BLOCK_LENGTH = 16
 
-                for i in range(anchor_tl[0], anchor_br[0] - BLOCK_LENGTH, BLOCK_LENGTH) :
-                    for j in range(anchor_tl[1], anchor_br[1] - BLOCK_LENGTH, BLOCK_LENGTH) :
-                        _ = random.randrange(127, 255, 16)
-    
-                        mos = numpy.empty((BLOCK_LENGTH, BLOCK_LENGTH, 3), dtype = numpy.uint8)
-    
-                        cv2.rectangle(mos, (0, 0), (BLOCK_LENGTH, BLOCK_LENGTH), (_, _, _), -1)
-    
-                        frm = image.overlay_image(frm, mos, anchor = (i, j), paste = True)
+        frm = image.pixelate_regions(frm, psad, BLOCK_LENGTH, "noise", norm = False, inplace = True)
 
         BLOCK_LENGTH = 4
 
+        boxes = []
+
         for obj in pang :
-            if isinstance(frm, numpy.ndarray) is not True :
-                anchor_tl = [0, 0]
-                anchor_br = [0, frm.size[1]]
-
-                for landmark in obj.landmarks :
-                    if landmark.type == gvision.FACE_LDMARK["LEFT_OF_LEFT_EYEBROW"] :
-                        anchor_tl[0] = landmark.position.x
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_OF_RIGHT_EYEBROW"] :
-                        anchor_br[0] = landmark.position.x
-                    elif landmark.type == gvision.FACE_LDMARK["LEFT_EYEBROW_UPPER_MIDPOINT"] :
-                        if landmark.position.y > anchor_tl[1] :
-                            anchor_tl[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["LEFT_EAR_TRAGION"] :
-                        if landmark.position.y < anchor_br[1] :
-                            anchor_br[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_EYEBROW_UPPER_MIDPOINT"] :
-                        if landmark.position.y > anchor_tl[1] :
-                            anchor_tl[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_EAR_TRAGION"] :
-                        if landmark.position.y < anchor_br[1] :
-                            anchor_br[1] = landmark.position.y
-
-                for i in range(int(anchor_tl[0]), int(anchor_br[0]) - BLOCK_LENGTH, BLOCK_LENGTH) :
-                    for j in range(int(anchor_tl[1]), int(anchor_br[1]) - BLOCK_LENGTH, BLOCK_LENGTH) :
-                        _ = random.randrange(127, 255, 16)
-
-                        mos = Image.new("RGB", (BLOCK_LENGTH, BLOCK_LENGTH), (_, _, _))
-
-                        frm = image.overlay_image(frm, mos, anchor = (i, j), paste = True)
-            else :
-                anchor_tl = [0, 0]
-                anchor_br = [0, frm.shape[0]]
-
-                for landmark in obj.landmarks :
-                    if landmark.type == gvision.FACE_LDMARK["LEFT_OF_LEFT_EYEBROW"] :
-                        anchor_tl[0] = landmark.position.x
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_OF_RIGHT_EYEBROW"] :
-                        anchor_br[0] = landmark.position.x
-                    elif landmark.type == gvision.FACE_LDMARK["LEFT_EYEBROW_UPPER_MIDPOINT"] :
-                        if landmark.position.y > anchor_tl[1] :
-                            anchor_tl[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["LEFT_EAR_TRAGION"] :
-                        if landmark.position.y < anchor_br[1] :
-                            anchor_br[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_EYEBROW_UPPER_MIDPOINT"] :
-                        if landmark.position.y > anchor_tl[1] :
-                            anchor_tl[1] = landmark.position.y
-                    elif landmark.type == gvision.FACE_LDMARK["RIGHT_EAR_TRAGION"] :
-                        if landmark.position.y < anchor_br[1] :
-                            anchor_br[1] = landmark.position.y
-
-                for i in range(int(anchor_tl[0]), int(anchor_br[0]) - BLOCK_LENGTH, BLOCK_LENGTH) :
-                    for j in range(int(anchor_tl[1]), int(anchor_br[1]) - BLOCK_LENGTH, BLOCK_LENGTH) :
-                        _ = random.randrange(127, 255, 16)
-    
-                        mos = numpy.empty((BLOCK_LENGTH, BLOCK_LENGTH, 3), dtype = numpy.uint8)
-    
-                        cv2.rectangle(mos, (0, 0), (BLOCK_LENGTH, BLOCK_LENGTH), (_, _, _), -1)
-    
-                        frm = image.overlay_image(frm, mos, anchor = (i, j), paste = True)
+            anchor_tl = [0, 0]
+            anchor_br = [0, frm.shape[0]]
+
+            for landmark in obj.landmarks :
+                if landmark.type == gvision.FACE_LDMARK["LEFT_OF_LEFT_EYEBROW"] :
+                    anchor_tl[0] = landmark.position.x
+                elif landmark.type == gvision.FACE_LDMARK["RIGHT_OF_RIGHT_EYEBROW"] :
+                    anchor_br[0] = landmark.position.x
+                elif landmark.type == gvision.FACE_LDMARK["LEFT_EYEBROW_UPPER_MIDPOINT"] :
+                    if landmark.position.y > anchor_tl[1] :
+                        anchor_tl[1] = landmark.position.y
+                elif landmark.type == gvision.FACE_LDMARK["LEFT_EAR_TRAGION"] :
+                    if landmark.position.y < anchor_br[1] :
+                        anchor_br[1] = landmark.position.y
+                elif landmark.type == gvision.FACE_LDMARK["RIGHT_EYEBROW_UPPER_MIDPOINT"] :
+                    if landmark.position.y > anchor_tl[1] :
+                        anchor_tl[1] = landmark.position.y
+                elif landmark.type == gvision.FACE_LDMARK["RIGHT_EAR_TRAGION"] :
+                    if landmark.position.y < anchor_br[1] :
+                        anchor_br[1] = landmark.position.y
+
+            boxes.append((anchor_tl[0], anchor_tl[1], anchor_br[0], anchor_br[1]))
+
+        frm = image.pixelate_regions(frm, boxes, BLOCK_LENGTH, "noise", inplace = True)
 
     image.replay_video(frm)
 
@@ -246,7 +211,7 @@ while True :
         if predicate["ang"] is True :
             pass
         else :
-            prescale = image.SCALE
+            prescale = image.CAMERA.scale
 
             image.resolution_rescale(1)
 
@@ -254,7 +219,7 @@ while True :
 
             image.resolution_rescale(prescale)
 
-            img = image.overlay_image(img, image.load_image(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
+            img = image.overlay_image(img, image.load_asset(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
 
             img = image.overlay_text(img, time.strftime("%Y-%M-%d %H:%M"), anchor = (-20, -20), colour = (255, 255, 255))
 
@@ -271,7 +236,7 @@ while True :
     # if len(ret) is not 0 and len(ret) == len(pjoy) :
     #     img = image.record_image()
     #
-    #     img = image.overlay_image(img, image.load_image(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
+    #     img = image.overlay_image(img, image.load_asset(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
     #
     #     img = image.overlay_text(img, time.strftime("%Y-%M-%d %H:%M"), anchor = (-20, -20), colour = (255, 255, 255))
     #
@@ -285,14 +250,14 @@ while True :
         if predicate["sad"] is True :
             pass
         else :
-            prescale = image.SCALE
+            prescale = image.CAMERA.scale
 
             for _ in range(2, 3) :
-                image.replay_video(image.load_image(BASE_PATH + "/.image/" + str(image.SCALE) + "/Sequel-{}.jpg".format(_ + 1)))
+                image.replay_video(image.load_image(BASE_PATH + "/.image/" + str(image.CAMERA.scale) + "/Sequel-{}.jpg".format(_ + 1)))
 
                 time.sleep(0.3)
 
-            image.replay_video(image.load_image(BASE_PATH + "/.image/" + str(image.SCALE) + "/Sequel-{}.jpg".format(4)))
+            image.replay_video(image.load_image(BASE_PATH + "/.image/" + str(image.CAMERA.scale) + "/Sequel-{}.jpg".format(4)))
 
             image.resolution_rescale(1)
 
@@ -300,7 +265,7 @@ while True :
 
             image.resolution_rescale(prescale)
 
-            img = image.overlay_image(img, image.load_image(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
+            img = image.overlay_image(img, image.load_asset(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
 
             img = image.overlay_text(img, time.strftime("%Y-%M-%d %H:%M"), anchor = (-20, -20), colour = (236, 78, 53))
 
@@ -342,6 +307,20 @@ while True :
 
     ent = time.time()
 
+# A pipeline that runs forever without stopping. Video frames are captured by
+#  calling `record_video()' in `image' module in one thread, identified by
+#  `detect' in another and rendered by `render' in this thread.
+#
+# Instead of a fixed 1 in 20 frames, frames are sampled about as often as Google
+#  Vision answers, measured as the program runs, but not more than `MAX_RATE'
+#  nor less than `MIN_RATE' frames a second.
+#
+MIN_RATE = 0.5
+MAX_RATE = 4
+
+pipeline.Pipeline(image.record_video, detect, render, result = ([], [], [], [], [], []),
+    scheduler = pipeline.SampleScheduler(MIN_RATE, MAX_RATE), pool = image.FRAME_POOL).run()
+
 # Destroy opened video windows.
 #
 cv2.destroyAllWindows()
@@ -0,0 +1,177 @@
+#
+# Name: detector.py
+#
+# Description: Library running object detection models on the local CPU through
+#  the OpenCV DNN module. Results are presented in the same shape as the object
+#  localisation results of Google Vision API, so a detector can be registered
+#  with `gvision.set_backend()' and used by callers of `gvision()' unchanged.
+#
+
+import io, collections
+import numpy, cv2
+from PIL import Image
+from frame import Frame
+
+# PARAMETERS
+# ====================
+#
+THRESHOLD = 0.5            # MINIMUM SCORE (0-1) FOR A DETECTION TO BE REPORTED
+INPUT_SIZE = (300, 300)    # DIMENSION (IN PIXEL) OF THE NETWORK INPUT BLOB
+THREADS = 4                # NUMBER OF CPU THREADS USED BY OPENCV FOR INFERENCE
+
+# Containers mirroring the fields of Google Vision localized_object_annotations
+#  that are read by the `image' module and user programs.
+#
+# name: Identified Object Name
+# score: Float 0-1
+# bounding_poly:
+#  normalized_vertices:
+#   x: Float 0-1
+#   y: Float 0-1
+#
+Vertex = collections.namedtuple("Vertex", ["x", "y"])
+BoundingPoly = collections.namedtuple("BoundingPoly", ["normalized_vertices"])
+LocalizedObject = collections.namedtuple("LocalizedObject", ["name", "score", "bounding_poly"])
+
+#
+# LOCAL DETECTION ROUTINES
+#
+
+# DNNDETECTOR
+# ====================
+#
+# An object detector of the SSD family, e.g., MobileNet-SSD exported from the
+#  TensorFlow Object Detection API, run by the OpenCV DNN module on the CPU.
+#
+# @param model   A string of file location path of the network weights, e.g., a
+#                 TensorFlow frozen graph (.pb) or a Caffe model (.caffemodel).
+# @param config  None or a string of file location path of the network description,
+#                 e.g., a (.pbtxt) or a (.prototxt) file.
+# @param labels  A string of file location path of a text file naming one class per
+#                 line, the line number (from 0) being the class identifier output
+#                 by the network. Names should follow Google Vision wording, e.g.,
+#                 "Handgun" or "Knife", for user programs to match on them.
+# @param threshold A float (0-1) of the minimum score for a detection to be reported.
+# @param size    A tuple of two integers of the width and height of the input blob.
+# @param scale   A float multiplier applied to pixel values after mean subtraction.
+# @param mean    A tuple of three values subtracted from the individual components.
+#
+class DnnDetector :
+    # Only object localisation is offered by the detector. Other processes are left
+    #  to Google Vision API.
+    #
+    op_types = ["object"]
+
+    def __init__(self, model, config = None, labels = None, threshold = THRESHOLD, size = INPUT_SIZE, scale = 1.0, mean = (0, 0, 0)) :
+        if model is not None and type(model) is str :
+            pass
+        else :
+            raise TypeError
+
+        if threshold is not None and (type(threshold) is float or type(threshold) is int) :
+            if threshold < 0 or threshold > 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        cv2.setNumThreads(THREADS)
+
+        self.net = cv2.dnn.readNet(model, config if config is not None else "")
+        self.labels = []
+
+        if labels is not None :
+            with open(labels) as lblfile :
+                self.labels = [line.strip() for line in lblfile]
+
+        self.threshold = threshold
+        self.size = size
+        self.scale = scale
+        self.mean = mean
+
+    # __TO_ARRAY
+    # ====================
+    #
+    # Convert an input image into a NumPy Array object containing RGB format image.
+    #
+    def __to_array(self, img) :
+        if img is not None and isinstance(img, Frame) is True :
+            return img.array
+        elif img is not None and isinstance(img, numpy.ndarray) is True :
+            return img
+        elif img is not None and isinstance(img, Image.Image) is True :
+            return numpy.asarray(img.convert("RGB"))
+        elif img is not None and type(img) is io.BytesIO :
+            img.seek(0)
+
+            return numpy.asarray(Image.open(img).convert("RGB"))
+        elif img is not None and type(img) is bytes :
+            # JPEG content encoded by the camera hardware, as gvision() accepts.
+            #
+            bgr = cv2.imdecode(numpy.frombuffer(img, numpy.uint8), cv2.IMREAD_COLOR)
+
+            if bgr is None :
+                raise ValueError("Image Cannot be Decoded")
+
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        else :
+            raise TypeError
+
+    # DETECT
+    # ====================
+    #
+    # Localise objects in an image.
+    #
+    # @param img     A PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object or bytes object containing
+    #                 JPEG format image or a Frame object
+    # @param max_detect An integer specifying the maximum number of objects returned.
+    #
+    # @ret           A list of LocalizedObject objects, in descending order of score.
+    #
+    def detect(self, img, max_detect = 10) :
+        img = self.__to_array(img)
+
+        # The frame is RGB already, therefore, no channel swapping is needed for
+        #  models trained on RGB input.
+        #
+        blob = cv2.dnn.blobFromImage(img, self.scale, self.size, self.mean, swapRB = False, crop = False)
+
+        self.net.setInput(blob)
+
+        # SSD output is a blob of shape (1, 1, N, 7), each row being
+        #  [batch, class, score, left, top, right, bottom] normalised to 0-1.
+        #
+        out = self.net.forward().reshape(-1, 7)
+        out = out[out[:, 2] >= self.threshold]
+        out = out[numpy.argsort(-out[:, 2])][:max_detect]
+
+        ret = []
+
+        for _, cls, score, left, top, right, bottom in out.tolist() :
+            left, right = min(max(left, 0.0), 1.0), min(max(right, 0.0), 1.0)
+            top, bottom = min(max(top, 0.0), 1.0), min(max(bottom, 0.0), 1.0)
+
+            if int(cls) < len(self.labels) :
+                name = self.labels[int(cls)]
+            else :
+                name = str(int(cls))
+
+            ret.append(LocalizedObject(name, score, BoundingPoly([Vertex(left, top), Vertex(right, top), Vertex(right, bottom), Vertex(left, bottom)])))
+
+        return ret
+
+    # GVISION
+    # ====================
+    #
+    # Entry point used by `gvision.gvision()' when the detector is registered as
+    #  the backend, with the same arguments as `gvision.gvision()'.
+    #
+    def gvision(self, img, op_type = "object", max_detect = 10) :
+        if op_type in self.op_types :
+            return self.detect(img, max_detect)
+        else :
+            raise TypeError
+
+#
+# (END OF) LOCAL DETECTION ROUTINES
+#
@@ -0,0 +1,175 @@
+#
+# Name: frame.py
+#
+# Description: Library holding a video frame once and presenting it in the forms
+#  needed by different consumers, i.e., a NumPy Array for OpenCV drawing, a PIL
+#  image for PIL drawing and JPEG content for upload or storage. Each form is
+#  produced upon first use only and is kept for later uses of the same frame.
+#
+
+import io, time
+import numpy, cv2
+from PIL import Image
+import metrics, tracing
+
+# PARAMETERS
+# ====================
+#
+JPEG_QUALITY = 75          # QUALITY (0-100) OF JPEG CONTENT ENCODED FROM PIXELS
+
+# Time spent encoding, reported by `metrics'.
+#
+ENCODE_SECONDS = metrics.REGISTRY.histogram("lifeline_encode_seconds", "Time taken to encode a frame into JPEG content.")
+
+#
+# FRAME ROUTINES
+#
+
+# FRAME
+# ====================
+#
+# A video frame with lazily produced and cached NumPy Array, PIL image and JPEG
+#  representations. Either pixels or JPEG content is canonical, the other forms are
+#  derived from it on demand.
+#
+# The NumPy Array returned by array may be drawn on in place, after which
+#  invalidate() has to be called for the derived forms to be produced again.
+#
+# @param img     A NumPy Array object containing RGB format image, a PIL image
+#                 object, a BytesIO streaming object containing JPEG format image
+#                 or a bytes object of JPEG format image.
+# @param quality An integer (0-100) of the quality of JPEG content encoded from
+#                 pixels.
+# @param ident   None or an integer identifying a captured frame, increasing from
+#                 frame to frame, by which the frame is traced.
+# @param stamp   None or a number of seconds of the time the frame was captured.
+# @param jpeg    None or a bytes object of JPEG format image of the same picture as
+#                 img, e.g., encoded by the camera hardware alongside the pixels,
+#                 returned by jpeg as it is instead of the pixels being encoded.
+#
+class Frame :
+    def __init__(self, img, quality = JPEG_QUALITY, ident = None, stamp = None, jpeg = None) :
+        self.pixels = None
+        self.quality = quality
+        self.ident = ident
+        self.stamp = stamp
+
+        self.__pil = None
+        self.__jpeg = None
+
+        if jpeg is not None and type(jpeg) is not bytes :
+            raise TypeError
+
+        if img is not None and isinstance(img, numpy.ndarray) is True :
+            self.pixels = img
+            self.__jpeg = jpeg
+        elif img is not None and isinstance(img, Image.Image) is True :
+            self.__pil = img.convert(mode = "RGB")
+        elif img is not None and type(img) is io.BytesIO :
+            self.__jpeg = img.getvalue()
+        elif img is not None and type(img) is bytes :
+            self.__jpeg = img
+        else :
+            raise TypeError
+
+    # ARRAY
+    # ====================
+    #
+    # @ret           A NumPy Array object containing RGB format image of the frame.
+    #
+    @property
+    def array(self) :
+        if self.pixels is None :
+            if self.__pil is not None :
+                self.pixels = numpy.array(self.__pil, dtype = numpy.uint8)
+            else :
+                self.pixels = cv2.cvtColor(cv2.imdecode(numpy.frombuffer(self.__jpeg, dtype = numpy.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+
+        return self.pixels
+
+    # PIL
+    # ====================
+    #
+    # @ret           A PIL image object of the frame.
+    #
+    @property
+    def pil(self) :
+        if self.__pil is None :
+            if self.pixels is not None :
+                self.__pil = Image.fromarray(self.pixels)
+            else :
+                self.__pil = Image.open(io.BytesIO(self.__jpeg)).convert(mode = "RGB")
+
+        return self.__pil
+
+    # JPEG
+    # ====================
+    #
+    # @ret           A bytes object of JPEG format image of the frame. Encoding takes
+    #                 place once however many times the content is requested, e.g.,
+    #                 for upload, storage and email attachment.
+    #
+    @property
+    def jpeg(self) :
+        if self.__jpeg is None :
+            ent = time.perf_counter()
+            start = time.time()
+
+            # OpenCV encodes pixels in BGR order.
+            #
+            _, raw = cv2.imencode(".jpg", cv2.cvtColor(self.array, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+
+            self.__jpeg = raw.tobytes()
+
+            ENCODE_SECONDS.since(ent)
+
+            tracing.TRACER.span(self.ident, "encode", start)
+
+        return self.__jpeg
+
+    # ENCODED
+    # ====================
+    #
+    # @ret           A boolean variable of whether JPEG content of the frame is at
+    #                 hand, i.e., jpeg returns without encoding pixels.
+    #
+    @property
+    def encoded(self) :
+        return self.__jpeg is not None
+
+    # SIZE
+    # ====================
+    #
+    # @ret           A tuple of the width and height (in pixel) of the frame.
+    #
+    @property
+    def size(self) :
+        if self.pixels is None and self.__pil is not None :
+            return self.__pil.size
+        else :
+            return (self.array.shape[1], self.array.shape[0])
+
+    # INVALIDATE
+    # ====================
+    #
+    # Discard the forms derived from pixels after the pixels are drawn on in place.
+    #
+    def invalidate(self) :
+        self.array
+
+        self.__pil = None
+        self.__jpeg = None
+
+    # COPY
+    # ====================
+    #
+    # @ret           A Frame object of a copy of the pixels, to be drawn on without
+    #                 affecting this frame, of the identity and time of capture of
+    #                 this frame.
+    #
+    def copy(self) :
+        return Frame(self.array.copy(), self.quality, self.ident, self.stamp)
+
+#
+# (END OF) FRAME ROUTINES
+#
@@ -0,0 +1,639 @@
+#
+# Name: framebus.py
+#
+# Description: Library passing video frames between processes through shared
+#  memory. The capture process writes every frame once into a slot of the bus,
+#  processes for inference, rendering and recording read the very slot in place,
+#  with neither pickling nor copying of the frame. Each process has a core of its
+#  own, the stages are no longer held back by one another through the GIL.
+#
+#  Usage: python framebus.py (demonstration with synthetic frames)
+#
+
+import multiprocessing, threading, time, os
+from multiprocessing import shared_memory
+import numpy
+from frame import Frame
+import metrics
+
+# PARAMETERS
+# ====================
+#
+BUS_SLOTS = 6              # NUMBER OF FRAMES HELD BY THE BUS AT ONCE
+BUS_CONSUMERS = 8          # MAXIMUM NUMBER OF CONSUMERS OF THE BUS
+BUS_SHAPE = (1088, 1920, 3)    # DIMENSION OF THE LARGEST FRAME A SLOT HOLDS
+POLICIES = ("latest", "oldest", "block")
+REAP_INTERVAL = 1          # INTERVAL (IN SECOND) BETWEEN CHECKS FOR CONSUMERS THAT HAVE DIED
+
+# Frames dropped by the bus, reported by `metrics' of the process dropping them.
+#
+BUS_DROPPED = metrics.REGISTRY.counter("lifeline_bus_dropped_frames_total", "Number of frames dropped by the frame bus, for every slot held or per consumer falling behind.")
+
+#
+# FRAME BUS ROUTINES
+#
+
+# FRAMEBUS
+# ====================
+#
+# A ring of frame slots in shared memory with one writer, the capture process, and
+#  a number of consumers subscribed by subscribe(). Every frame published is given
+#  a sequence number, increasing by one from frame to frame, kept with the frame
+#  identity and time of capture in the slot.
+#
+# A consumer holds the slot of a frame it reads until it releases it, the writer
+#  never writes into a slot held. Consumers falling behind are dealt with by their
+#  drop policy,
+#
+#  1) "latest", the consumer always gets the newest frame, frames in between are
+#     skipped, e.g., for rendering and inference,
+#  2) "oldest", the consumer gets every frame in order, as long as the frame has
+#     not been written over yet, e.g., for recording tolerating gaps, and
+#  3) "block", the consumer gets every frame in order and the writer waits for it
+#     rather than write over a frame it has not read, e.g., for lossless recording,
+#     at the cost of slowing capture down to the pace of the consumer.
+#
+#  Should no slot be free for the writer and no "block" consumer be waited for, the
+#  new frame is dropped.
+#
+# A consumer is bound to the process reading from it. Should the process end
+#  without unsubscribing, e.g., upon a crash, the writer finds it gone at most
+#  REAP_INTERVAL seconds later, or as soon as no slot is free, and lets go of the
+#  slots it held and of the frames a "block" consumer has not read.
+#
+# The bus is created by the parent process and handed to the processes it starts,
+#  e.g., as an argument of multiprocessing.Process, as are the Subscriber objects
+#  returned by subscribe(). The bookkeeping of the slots is guarded by a lock shared
+#  by the processes, the pixels are written and read without it.
+#
+# @param slots   An integer of the number of frames held at once.
+# @param shape   A tuple of the dimension of the largest frame a slot holds.
+# @param consumers An integer of the maximum number of consumers.
+#
+class FrameBus :
+    def __init__(self, slots = BUS_SLOTS, shape = BUS_SHAPE, consumers = BUS_CONSUMERS) :
+        for param in [slots, consumers] + list(shape) :
+            if param is not None and type(param) is int :
+                if param < 1 :
+                    raise ValueError
+            else :
+                raise TypeError
+
+        self.slots = slots
+        self.consumers = consumers
+        self.slot_size = int(numpy.prod(shape))
+
+        # The layout of the shared memory is
+        #
+        #  control   int64[4]               head sequence, closed, dropped, written
+        #  meta      int64[slots, 5]        sequence, ident, height, width, channels
+        #  stamps    float64[slots]         time of capture
+        #  readers   int64[consumers, 5]    active, policy, cursor, dropped, process id
+        #  pins      int32[slots, consumers] number of holds of a slot by a consumer
+        #  pixels    uint8[slots, slot_size]
+        #
+        self.shm = shared_memory.SharedMemory(create = True, size = self.__offsets()[-1] + slots * self.slot_size)
+        self.owner = True
+
+        self.__map()
+
+        self.control[:] = 0
+        self.meta[:] = 0
+        self.stamps[:] = 0
+        self.readers[:] = 0
+        self.pins[:] = 0
+
+        self.cond = multiprocessing.Condition()
+        self.reaped = 0
+
+    def __offsets(self) :
+        ret = [0]
+
+        for size in 4 * 8, self.slots * 5 * 8, self.slots * 8, self.consumers * 5 * 8, self.slots * self.consumers * 4 :
+            # Sections are aligned to 64 bytes, a cache line.
+            #
+            ret.append(ret[-1] + (size + 63) // 64 * 64)
+
+        return ret
+
+    def __map(self) :
+        offsets = self.__offsets()
+        buf = self.shm.buf
+
+        self.control = numpy.ndarray((4, ), numpy.int64, buf, offsets[0])
+        self.meta = numpy.ndarray((self.slots, 5), numpy.int64, buf, offsets[1])
+        self.stamps = numpy.ndarray((self.slots, ), numpy.float64, buf, offsets[2])
+        self.readers = numpy.ndarray((self.consumers, 5), numpy.int64, buf, offsets[3])
+        self.pins = numpy.ndarray((self.slots, self.consumers), numpy.int32, buf, offsets[4])
+        self.pixels = numpy.ndarray((self.slots, self.slot_size), numpy.uint8, buf, offsets[5])
+
+    # The bus is handed to another process by the name of its shared memory, which
+    #  the process attaches to, rather than by the content of the memory.
+    #
+    def __getstate__(self) :
+        return {"slots" : self.slots, "consumers" : self.consumers, "slot_size" : self.slot_size, "shm" : self.shm.name, "cond" : self.cond}
+
+    def __setstate__(self, state) :
+        self.slots = state["slots"]
+        self.consumers = state["consumers"]
+        self.slot_size = state["slot_size"]
+        self.cond = state["cond"]
+
+        self.shm = shared_memory.SharedMemory(name = state["shm"])
+        self.owner = False
+        self.reaped = 0
+
+        self.__map()
+
+    # SUBSCRIBE
+    # ====================
+    #
+    # Register a consumer of the bus. Consumers are registered before the processes
+    #  reading the bus are started, so the writer accounts for "block" consumers from
+    #  the first frame.
+    #
+    # @param policy  A string of the drop policy of the consumer, i.e., "latest",
+    #                 "oldest" or "block".
+    #
+    # @ret           A Subscriber object of the consumer.
+    #
+    def subscribe(self, policy = "latest") :
+        if policy not in POLICIES :
+            raise ValueError
+
+        with self.cond :
+            for index in range(self.consumers) :
+                if self.readers[index, 0] == 0 :
+                    self.readers[index] = (1, POLICIES.index(policy), self.control[0], 0, 0)
+
+                    return Subscriber(self, index)
+
+        raise IndexError("No Consumer Left on Frame Bus")
+
+    # __REAP
+    # ====================
+    #
+    # Remove the consumers whose process has ended, with the slots they held. A
+    #  consumer not read from by any process yet is kept. The lock is held by the
+    #  caller.
+    #
+    # @ret           An integer of the number of consumers removed.
+    #
+    def __reap(self) :
+        ret = 0
+
+        for index in range(self.consumers) :
+            pid = int(self.readers[index, 4])
+
+            if self.readers[index, 0] == 1 and pid != 0 and alive(pid) is not True :
+                self.pins[:, index] = 0
+                self.readers[index] = 0
+
+                ret += 1
+
+        if ret > 0 :
+            self.cond.notify_all()
+
+        self.reaped = time.time()
+
+        return ret
+
+    # __WRITABLE
+    # ====================
+    #
+    # Choose the slot for the next frame, the oldest one neither held by a consumer
+    #  nor waited for by a "block" consumer. The lock is held by the caller.
+    #
+    # @ret           An integer of the slot index, or None if there is none.
+    #
+    def __writable(self) :
+        blocking = [index for index in range(self.consumers) if self.readers[index, 0] == 1 and self.readers[index, 1] == 2]
+
+        ret = None
+
+        for slot in range(self.slots) :
+            seq = self.meta[slot, 0]
+
+            if seq < 0 or self.pins[slot].any() :
+                continue
+
+            if seq > 0 and any(self.readers[index, 2] < seq for index in blocking) :
+                continue
+
+            if ret is None or seq < self.meta[ret, 0] :
+                ret = slot
+
+        return ret
+
+    # ACQUIRE
+    # ====================
+    #
+    # Take a slot for the writer to capture a frame into directly, e.g., by
+    #  image.Camera, saving the copy publish() makes.
+    #
+    # @param shape   A tuple of the dimension of the frame.
+    # @param timeout None or a number of seconds to wait for a "block" consumer.
+    #
+    # @ret           A tuple of an integer of the slot index and a NumPy Array object
+    #                 of the slot in the given shape, or None if the frame is to be
+    #                 dropped as there is no slot free.
+    #
+    def acquire(self, shape, timeout = None) :
+        size = int(numpy.prod(shape))
+
+        if size > self.slot_size :
+            raise ValueError("Frame of " + str(tuple(shape)) + " Exceeds Slot of Frame Bus")
+
+        due = time.time() + timeout if timeout is not None else None
+
+        with self.cond :
+            if time.time() - self.reaped >= REAP_INTERVAL :
+                self.__reap()
+
+            while True :
+                slot = self.__writable()
+
+                if slot is None and self.__reap() > 0 :
+                    slot = self.__writable()
+
+                if slot is not None :
+                    break
+
+                blocking = bool(((self.readers[:, 0] == 1) & (self.readers[:, 1] == 2)).any())
+
+                if blocking is not True or (due is not None and time.time() >= due) :
+                    self.control[2] += 1
+
+                    BUS_DROPPED.inc()
+
+                    return None
+
+                # The consumers waited for are checked again now and then, should
+                #  one of them have died while being waited for.
+                #
+                self.cond.wait(REAP_INTERVAL if due is None else min(max(due - time.time(), 0), REAP_INTERVAL))
+
+            # The slot is being written, it is not to be read or chosen again.
+            #
+            self.meta[slot, 0] = -1
+
+        return slot, self.pixels[slot, : size].reshape(shape)
+
+    # COMMIT
+    # ====================
+    #
+    # Publish a frame written into a slot taken by acquire().
+    #
+    # @param slot    An integer of the slot index.
+    # @param shape   A tuple of the dimension of the frame.
+    # @param ident   None or an integer of the frame identity.
+    # @param stamp   None or a number of seconds of the time of capture.
+    #
+    # @ret           An integer of the sequence number of the frame.
+    #
+    def commit(self, slot, shape, ident = None, stamp = None) :
+        shape = tuple(shape) + (1, ) * (3 - len(shape))
+
+        with self.cond :
+            seq = self.control[0] + 1
+
+            self.meta[slot] = (seq, ident if ident is not None else 0, shape[0], shape[1], shape[2])
+            self.stamps[slot] = stamp if stamp is not None else time.time()
+
+            self.control[0] = seq
+            self.control[3] += 1
+
+            self.cond.notify_all()
+
+        return seq
+
+    # PUBLISH
+    # ====================
+    #
+    # Write a frame into the bus.
+    #
+    # @param img     A NumPy Array object containing RGB format image or a Frame
+    #                 object, whose identity and time of capture are kept.
+    # @param timeout None or a number of seconds to wait for a "block" consumer.
+    #
+    # @ret           An integer of the sequence number of the frame, or None if the
+    #                 frame is dropped.
+    #
+    def publish(self, img, timeout = None) :
+        if img is not None and isinstance(img, Frame) is True :
+            ident, stamp, pixels = img.ident, img.stamp, img.array
+        elif img is not None and isinstance(img, numpy.ndarray) is True :
+            ident, stamp, pixels = None, None, img
+        else :
+            raise TypeError
+
+        taken = self.acquire(pixels.shape, timeout)
+
+        if taken is None :
+            return None
+
+        slot, view = taken
+
+        numpy.copyto(view, pixels)
+
+        return self.commit(slot, pixels.shape, ident, stamp)
+
+    # CLOSE
+    # ====================
+    #
+    # Mark the bus closed by the writer, consumers get None once they have read the
+    #  frames left. The shared memory is released by the process creating the bus
+    #  with unlink set.
+    #
+    # @param unlink  A boolean variable of whether the shared memory is destroyed,
+    #                 after every process is done with the bus.
+    #
+    def close(self, unlink = False) :
+        with self.cond :
+            self.control[1] = 1
+
+            self.cond.notify_all()
+
+        if unlink is True :
+            # The NumPy views are dropped before the memory is unmapped.
+            #
+            self.control = self.meta = self.stamps = self.readers = self.pins = self.pixels = None
+
+            self.shm.close()
+
+            if self.owner is True :
+                self.shm.unlink()
+
+    # STATS
+    # ====================
+    #
+    # @ret           A dictionary of the frames written and dropped by the writer and
+    #                 the frames dropped per consumer.
+    #
+    def stats(self) :
+        with self.cond :
+            return {"written" : int(self.control[3]), "dropped" : int(self.control[2]), "consumers" : dict((index, int(self.readers[index, 3])) for index in range(self.consumers) if self.readers[index, 0] == 1)}
+
+# SUBSCRIBER
+# ====================
+#
+# A consumer of a frame bus, as returned by FrameBus.subscribe(). Frames read are
+#  Frame objects over the very slot of the bus, read-only, held until released.
+#
+# The subscriber offers retain() and release() as image.FramePool does, so it can
+#  be passed as the pool of a pipeline.Pipeline reading frames by read_frame().
+#
+class Subscriber :
+    def __init__(self, bus, index) :
+        self.bus = bus
+        self.index = index
+
+        self.held = {}
+        self.lock = threading.Lock()
+
+    # Frames held are those of the process holding them, a subscriber is handed to
+    #  another process without any.
+    #
+    def __getstate__(self) :
+        return {"bus" : self.bus, "index" : self.index}
+
+    def __setstate__(self, state) :
+        self.__init__(state["bus"], state["index"])
+
+        self.attach()
+
+    # ATTACH
+    # ====================
+    #
+    # Bind the consumer to the calling process, whose end lets the writer remove the
+    #  consumer. A consumer is bound upon being handed to a process and upon every
+    #  read, a call is only needed for a process started by fork that is to be
+    #  watched before it reads.
+    #
+    def attach(self) :
+        with self.bus.cond :
+            if self.bus.readers[self.index, 0] == 1 :
+                self.bus.readers[self.index, 4] = os.getpid()
+
+    # READ_FRAME
+    # ====================
+    #
+    # Read the next frame according to the drop policy of the consumer.
+    #
+    # @param timeout None or a number of seconds to wait for a frame.
+    #
+    # @ret           A Frame object, held until released by release(), or None if no
+    #                 frame comes within timeout or the bus is closed.
+    #                 ValueError is raised should the consumer have left the bus.
+    #
+    def read_frame(self, timeout = None) :
+        bus = self.bus
+        due = time.time() + timeout if timeout is not None else None
+
+        with bus.cond :
+            if bus.readers[self.index, 0] != 1 :
+                raise ValueError("Consumer Removed from Frame Bus")
+
+            bus.readers[self.index, 4] = os.getpid()
+
+            while True :
+                cursor = bus.readers[self.index, 2]
+                seqs = bus.meta[:, 0]
+
+                if bus.readers[self.index, 1] == 0 :
+                    target = bus.control[0]
+                else :
+                    # The next frame in order, or the earliest one left should it
+                    #  have been written over.
+                    #
+                    later = seqs[seqs > cursor]
+                    target = later.min() if len(later) > 0 else 0
+
+                if target > cursor :
+                    matches = numpy.flatnonzero(seqs == target)
+
+                    if len(matches) > 0 :
+                        break
+
+                if bus.control[1] == 1 or (due is not None and time.time() >= due) :
+                    return None
+
+                bus.cond.wait(None if due is None else max(due - time.time(), 0))
+
+            slot = int(matches[0])
+
+            if target - cursor > 1 :
+                bus.readers[self.index, 3] += target - cursor - 1
+
+                BUS_DROPPED.inc(int(target - cursor - 1))
+
+            bus.readers[self.index, 2] = target
+            bus.pins[slot, self.index] += 1
+
+            _, ident, height, width, channels = bus.meta[slot]
+            stamp = float(bus.stamps[slot])
+
+            # A "block" consumer moving on may free a slot the writer waits for.
+            #
+            if bus.readers[self.index, 1] == 2 :
+                bus.cond.notify_all()
+
+        view = bus.pixels[slot, : height * width * channels].reshape((height, width, channels) if channels > 1 else (height, width))
+        view.flags.writeable = False
+
+        with self.lock :
+            self.held[id(view)] = [view, slot, 1]
+
+        return Frame(view, ident = int(ident) if ident > 0 else None, stamp = stamp)
+
+    # RETAIN
+    # ====================
+    #
+    # Add a hold of a frame read. Objects not read from the bus are ignored.
+    #
+    def retain(self, buf) :
+        if isinstance(buf, Frame) is True :
+            buf = buf.pixels
+
+        with self.lock :
+            entry = self.held.get(id(buf))
+
+            if entry is not None and entry[0] is buf :
+                entry[2] += 1
+
+    # RELEASE
+    # ====================
+    #
+    # Drop a hold of a frame read, giving its slot back to the writer upon the last
+    #  one. Objects not read from the bus are ignored.
+    #
+    def release(self, buf) :
+        if isinstance(buf, Frame) is True :
+            buf = buf.pixels
+
+        with self.lock :
+            entry = self.held.get(id(buf))
+
+            if entry is None or entry[0] is not buf :
+                return
+
+            entry[2] -= 1
+
+            if entry[2] > 0 :
+                return
+
+            del self.held[id(buf)]
+
+        with self.bus.cond :
+            self.bus.pins[entry[1], self.index] -= 1
+
+            self.bus.cond.notify_all()
+
+    # UNSUBSCRIBE
+    # ====================
+    #
+    # Release every frame held and leave the bus.
+    #
+    def unsubscribe(self) :
+        with self.lock :
+            self.held = {}
+
+        with self.bus.cond :
+            self.bus.pins[:, self.index] = 0
+            self.bus.readers[self.index, 0] = 0
+
+            self.bus.cond.notify_all()
+
+# ALIVE
+# ====================
+#
+# @param pid     An integer of a process id.
+#
+# @ret           A boolean value of whether the process is running. A process that
+#                 has ended but is yet to be joined by its parent, i.e., a zombie,
+#                 is not.
+#
+def alive(pid) :
+    try :
+        os.kill(pid, 0)
+    except ProcessLookupError :
+        return False
+    except PermissionError :
+        return True
+
+    try :
+        with open("/proc/" + str(pid) + "/stat") as statfile :
+            return statfile.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError) :
+        return True
+
+#
+# (END OF) FRAME BUS ROUTINES
+#
+
+#
+# USER ROUTINES
+#
+
+# MAIN
+# ====================
+#
+# Demonstration of a capture process feeding an inference and a recording process
+#  through the bus, with synthetic frames.
+#
+def __consume(sub, name, delay) :
+    count = 0
+
+    while True :
+        frm = sub.read_frame(timeout = 5)
+
+        if frm is None :
+            break
+
+        # Work on the frame in place, e.g., identification or JPEG compression.
+        #
+        frm.jpeg
+
+        time.sleep(delay)
+
+        sub.release(frm)
+
+        count += 1
+
+    print(name + ": " + str(count) + " frames read")
+
+if __name__ == "__main__" :
+    import source
+
+    bus = FrameBus(shape = (272, 480, 3))
+
+    workers = [multiprocessing.Process(target = __consume, args = (bus.subscribe("latest"), "Inference (latest)", 0.2)),
+        multiprocessing.Process(target = __consume, args = (bus.subscribe("block"), "Recorder (block)", 0.01))]
+
+    for worker in workers :
+        worker.start()
+
+    src = source.SyntheticSource(fps = 30, count = 150)
+
+    while True :
+        pixels = src.read()
+
+        if pixels is None :
+            break
+
+        bus.publish(pixels)
+
+        src.pool.release(pixels)
+
+    bus.close()
+
+    for worker in workers :
+        worker.join()
+
+    print(bus.stats())
+
+    bus.close(unlink = True)
+
+#
+# (END OF) USER ROUTINES
+#
@@ -15,10 +15,160 @@ os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "/usr/share/ccst9015/gcloud_ccst9
 
 import io, numpy, cv2
 from PIL import Image
+from frame import Frame
+import metrics, tracing
+
+import threading, time
 
 # Imports the Google Cloud client library
 from google.cloud import vision
 from google.cloud.vision import types
+from google.api_core import exceptions, grpc_helpers
+import google.auth, google.auth.transport.requests, grpc
+
+# PARAMETERS
+# ====================
+#
+VISION_ENDPOINT = "vision.googleapis.com:443"
+VISION_SCOPES = ["https://www.googleapis.com/auth/cloud-platform", "https://www.googleapis.com/auth/cloud-vision"]
+KEEPALIVE_MS = 30000       # INTERVAL (IN MILLISECOND) OF PINGS KEEPING AN IDLE CHANNEL ALIVE
+WARMUP_TIMEOUT = 10        # TIMEOUT (IN SECOND) FOR THE CHANNEL TO CONNECT DURING WARM UP
+BATCH_LIMIT = 16           # MAXIMUM NUMBER OF IMAGES ACCEPTED BY A BATCH ANNOTATION REQUEST
+
+OPTYPE_ERR = "[ERROR] Invalid Google Vision Detection Type."
+
+__client = None
+__channel = None
+__client_lock = threading.Lock()
+__backend = None
+__endpoint = VISION_ENDPOINT
+__secure = True
+
+# Time spent on and requests made to Google Vision API, or the backend in place of
+#  it, reported by `metrics'.
+#
+RPC_SECONDS = metrics.REGISTRY.histogram("lifeline_gvision_seconds", "Time taken by a Google Vision API request, or the backend in place of it.")
+RPC_REQUESTS = metrics.REGISTRY.counter("lifeline_gvision_requests_total", "Number of Google Vision API requests, or calls to the backend in place of it.")
+RPC_ERRORS = metrics.REGISTRY.counter("lifeline_gvision_errors_total", "Number of Google Vision API requests, or calls to the backend, raising an exception.")
+
+#
+# GOOGLE CLOUD CLIENT SESSION ROUTINES
+#
+
+# __BUILD_CLIENT
+# ====================
+#
+# Build a Google Vision API client over a dedicated gRPC channel to the endpoint set
+#  by set_endpoint(). The OAuth token is fetched and the channel is connected, i.e.,
+#  TLS handshake performed, before the client is returned so the first detection
+#  request does not pay for either.
+#
+# @ret           A tuple of the ImageAnnotatorClient object and the gRPC channel
+#                 object it is bound to.
+#
+def __build_client() :
+    # Keepalive pings prevent NAT boxes and the remote end from silently dropping
+    #  the connection in between sparse detection requests.
+    #
+    options = [
+        ("grpc.keepalive_time_ms", KEEPALIVE_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0)]
+
+    if __secure is True :
+        credentials, _ = google.auth.default(scopes = VISION_SCOPES)
+
+        credentials.refresh(google.auth.transport.requests.Request())
+
+        channel = grpc_helpers.create_channel(__endpoint, credentials = credentials, options = options)
+    else :
+        channel = grpc.insecure_channel(__endpoint, options = options)
+
+    grpc.channel_ready_future(channel).result(timeout = WARMUP_TIMEOUT)
+
+    return vision.ImageAnnotatorClient(channel = channel), channel
+
+# CLIENT_SESSION
+# ====================
+#
+# Return the Google Vision API client shared by all callers of the module. The client
+#  is built and warmed up on first use and reused thereafter. Calling the function
+#  once at program start moves the connection set up out of the detection loop.
+#
+# @param rebuild A boolean variable dictating whether the existing client should be
+#                 discarded and a new one built, e.g., after a channel failure.
+#
+# @ret           A Google Vision ImageAnnotatorClient object.
+#
+def client_session(rebuild = False) :
+    global __client, __channel
+
+    if rebuild is not None and type(rebuild) is bool :
+        pass
+    else :
+        raise TypeError
+
+    with __client_lock :
+        if rebuild is True and __channel is not None :
+            __channel.close()
+
+            __client, __channel = None, None
+
+        if __client is None :
+            __client, __channel = __build_client()
+
+        return __client
+
+# SET_ENDPOINT
+# ====================
+#
+# Direct the client shared by the module to another Google Vision API endpoint,
+#  e.g., a local stand-in served by `standin.VisionServer'. The shared client is
+#  rebuilt on its next use.
+#
+# @param endpoint A string of the host and port of the endpoint.
+# @param secure  A boolean variable of whether the endpoint is connected to over TLS
+#                 with Google credentials. A local stand-in is connected to in
+#                 plain text without credentials.
+#
+def set_endpoint(endpoint = VISION_ENDPOINT, secure = True) :
+    global __client, __channel, __endpoint, __secure
+
+    if endpoint is not None and type(endpoint) is str and type(secure) is bool :
+        pass
+    else :
+        raise TypeError
+
+    with __client_lock :
+        if __channel is not None :
+            __channel.close()
+
+        __client, __channel = None, None
+        __endpoint, __secure = endpoint, secure
+
+# SET_BACKEND
+# ====================
+#
+# Register a local detector, e.g., a `detector.DnnDetector' object, to serve the
+#  image processes it supports in place of Google Vision API. The detector must
+#  offer a list op_types of the processes supported and a gvision() method taking
+#  the same arguments as gvision() in this module and returning results of the
+#  same shape.
+#
+# @param backend None or a local detector object. Passing None restores the use of
+#                 Google Vision API for all image processes.
+#
+def set_backend(backend = None) :
+    global __backend
+
+    if backend is None or (hasattr(backend, "op_types") and callable(getattr(backend, "gvision", None))) :
+        __backend = backend
+    else :
+        raise TypeError
+
+#
+# (END OF) GOOGLE CLOUD CLIENT SESSION ROUTINES
+#
 
 #
 # GOOGLE CLOUD SERVICES WRAPPING ROUTINES
@@ -31,23 +181,77 @@ from google.cloud.vision import types
 #  Cloud processing results according to selected processing strategy.
 #
 # @param img     A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 presented for Google Vision image processing service
+#                 image or a BytesIO streaming object or bytes object containing
+#                 JPEG format image or a Frame object presented for Google Vision
+#                 image processing service
 # @param op_type A string for selecting the image process offered by Google Vision
 #                 API. Supported options are 1) "text" 2) "label" 3) "face" 4) "object".
 # @param max     An integer specifying the maximum number of objects or best matches
 #         _detect to be returned by the image processing services. The parameter is not
 #                  applicable to "text" identification service.
+# @param client  None or a Google Vision ImageAnnotatorClient object to be used for
+#                 the request. If None is passed, the client shared by the module is
+#                 used and is rebuilt once should the channel become unavailable.
+# @param cache   None or a cache.ResultCache object. Results for an image looking
+#                 alike an image recently processed are returned from the cache
+#                 without a request to Google Vision API.
 #
 # @ret           A selected subset of Google Vision API rendered JSON object containing
 #                 results returned by image processing services, selected according to
-#                 op_type specified to provide most relevant returns.
+#                 op_type specified to provide most relevant returns. If a backend is
+#                 registered by set_backend() for op_type, results are returned by the
+#                 backend instead.
 #
-def gvision(img, op_type = "text", max_detect = 10) :
-    # Instantiates a client
-    client = vision.ImageAnnotatorClient()
+def gvision(img, op_type = "text", max_detect = 10, client = None, cache = None) :
+    if cache is not None :
+        return cache.fetch(img, (op_type, max_detect), gvision, img, op_type, max_detect, client)
+
+    # The request of a frame traced by `tracing' is recorded as its "upload" span,
+    #  from the JPEG content being ready until the response is back.
+    #
+    if __backend is not None and client is None and op_type in __backend.op_types :
+        ent = time.perf_counter()
+        start = time.time()
+
+        RPC_REQUESTS.inc()
+
+        try :
+            return __backend.gvision(img, op_type, max_detect)
+        except Exception :
+            RPC_ERRORS.inc()
+
+            raise
+        finally :
+            RPC_SECONDS.since(ent)
+
+            tracing.TRACER.span(getattr(img, "ident", None), "upload", start)
+
+    image = types.Image(content=__encode_image(img))
+
+    start = time.time()
+
+    try :
+        return __request(client, __annotate, image, op_type, max_detect)
+    finally :
+        tracing.TRACER.span(getattr(img, "ident", None), "upload", start)
 
-    if img is not None and isinstance(img, Image.Image) :
+# __ENCODE_IMAGE
+# ====================
+#
+# Encode an image into JPEG content for submission to Google Vision API.
+#
+# @param img     A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 or a Frame object, whose cached JPEG content is used as is. JPEG
+#                 content encoded by the camera hardware, as a bytes object or held
+#                 by a Frame object, is submitted without encoding again.
+#
+# @ret           A bytes object of the JPEG format image.
+#
+def __encode_image(img) :
+    if img is not None and isinstance(img, Frame) :
+        rawfile = img.jpeg
+    elif img is not None and isinstance(img, Image.Image) :
         rawfile = io.BytesIO()
 
         img.save(rawfile, format='JPEG')
@@ -57,6 +261,8 @@ def gvision(img, op_type = "text", max_detect = 10) :
         img.seek(0)
 
         rawfile = img.getvalue()
+    elif type(img) is bytes :
+        rawfile = img
     elif img is not None and isinstance(img, numpy.ndarray) :
         _, rawfile = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 75])
 
@@ -64,10 +270,58 @@ def gvision(img, op_type = "text", max_detect = 10) :
     else :
         raise TypeError
 
-    image = types.Image(content=rawfile)
+    return rawfile
 
-    OPTYPE_ERR = "[ERROR] Invalid Google Vision Detection Type."
+# __REQUEST
+# ====================
+#
+# Run a Google Vision API request over the given client, or over the client shared
+#  by the module if none is given. The shared client is rebuilt and the request is
+#  retried once should the channel become unavailable.
+#
+# @param client  None or a Google Vision ImageAnnotatorClient object.
+# @param call    A function accepting the client followed by args to issue the request.
+# @param args    Arguments passed to call after the client.
+#
+# @ret           The value returned by call.
+#
+def __request(client, call, *args) :
+    ent = time.perf_counter()
+
+    RPC_REQUESTS.inc()
 
+    try :
+        try :
+            ret = call(client_session() if client is None else client, *args)
+        except exceptions.ServiceUnavailable :
+            if client is not None :
+                raise
+
+            ret = call(client_session(rebuild = True), *args)
+    except Exception :
+        RPC_ERRORS.inc()
+
+        raise
+    finally :
+        RPC_SECONDS.since(ent)
+
+    return ret
+
+# __ANNOTATE
+# ====================
+#
+# Issue the Google Vision API request selected by op_type over the given client.
+#
+# @param client  A Google Vision ImageAnnotatorClient object.
+# @param image   A Google Vision Image object holding the JPEG content to process.
+# @param op_type A string for selecting the image process offered by Google Vision
+#                 API. Supported options are 1) "text" 2) "label" 3) "face" 4) "object".
+# @param max     An integer specifying the maximum number of objects or best matches
+#         _detect to be returned by the image processing services.
+#
+# @ret           As gvision().
+#
+def __annotate(client, image, op_type, max_detect) :
     if op_type is not None and type(op_type) is str :
         if op_type == "text" :
             response = client.text_detection(image=image) # max_results has no effect to text detection
@@ -139,6 +393,113 @@ def gvision(img, op_type = "text", max_detect = 10) :
 
     return ret
 
+# GVISION_BATCH
+# ====================
+#
+# The function will transfer a batch of images to Google Vision API in a single
+#  request, each image processed by one or more processing strategies, e.g., both
+#  "object" and "face", to avoid one round trip per image per strategy.
+#
+# @param imgs    A list of PIL image objects or NumPy Array objects containing RGB
+#                 format image or BytesIO streaming objects containing JPEG format
+#                 image presented for Google Vision image processing service
+# @param op_types A list of strings selecting the image processes applied to every
+#                 image, or a list of such lists, one for each image in imgs.
+#                 Supported options are 1) "text" 2) "label" 3) "face" 4) "object".
+# @param max     An integer specifying the maximum number of objects or best matches
+#         _detect to be returned by the image processing services. The parameter is not
+#                  applicable to "text" identification service.
+# @param client  None or a Google Vision ImageAnnotatorClient object, as in gvision().
+#
+# @ret           A list aligned with imgs, each element a dictionary mapping the
+#                 op_types requested for the image to the results that gvision()
+#                 would have returned for the same image and op_type, or, for an
+#                 image Google Vision failed to process, e.g., for being corrupted,
+#                 a google.api_core.exceptions.GoogleAPICallError object of the error
+#                 for the caller to raise or skip.
+#
+def gvision_batch(imgs, op_types = ["object"], max_detect = 10, client = None) :
+    if imgs is not None and (type(imgs) is tuple or type(imgs) is list) :
+        pass
+    else :
+        raise TypeError
+
+    if op_types is not None and (type(op_types) is tuple or type(op_types) is list) :
+        # An image sent without any process would come back without any result.
+        #
+        if len(op_types) == 0 :
+            raise ValueError(OPTYPE_ERR)
+        elif all(type(op_type) is str for op_type in op_types) :
+            op_types = [op_types] * len(imgs)
+        elif len(op_types) == len(imgs) :
+            pass
+        else :
+            raise ValueError
+    else :
+        raise TypeError
+
+    requests = []
+
+    for img, ops in zip(imgs, op_types) :
+        if ops is not None and (type(ops) is tuple or type(ops) is list) :
+            if len(ops) == 0 :
+                raise ValueError(OPTYPE_ERR)
+
+            for op_type in ops :
+                if op_type not in FEATURE_TYPE :
+                    raise TypeError(OPTYPE_ERR)
+        else :
+            raise TypeError(OPTYPE_ERR)
+
+        requests.append(types.AnnotateImageRequest(image = types.Image(content=__encode_image(img)),
+            features = [types.Feature(type = FEATURE_TYPE[op_type], max_results = max_detect) for op_type in ops]))
+
+    ret = []
+
+    for i in range(0, len(requests), BATCH_LIMIT) :
+        response = __request(client, __batch_annotate, requests[i : i + BATCH_LIMIT])
+
+        for res, ops in zip(response.responses, op_types[i : i + BATCH_LIMIT]) :
+            # An image failing, e.g., for being corrupted, does not fail the batch
+            #  but is reported in its own response, and in its own slot in return.
+            #
+            if res.error.code != 0 :
+                ret.append(exceptions.GoogleAPICallError(res.error.message, response = res))
+
+                continue
+
+            ret.append(dict((op_type, getattr(res, FEATURE_FIELD[op_type])) for op_type in ops))
+
+    return ret
+
+# __BATCH_ANNOTATE
+# ====================
+#
+# Issue a Google Vision API batch annotation request over the given client.
+#
+# @param client  A Google Vision ImageAnnotatorClient object.
+# @param requests A list of Google Vision AnnotateImageRequest objects.
+#
+# @ret           A Google Vision BatchAnnotateImagesResponse object.
+#
+def __batch_annotate(client, requests) :
+    return client.batch_annotate_images(requests)
+
+# Google Vision feature types and the response fields holding their results, as
+#  selected by gvision() for each op_type.
+#
+FEATURE_TYPE = dict()
+FEATURE_TYPE["text"] = vision.enums.Feature.Type.TEXT_DETECTION
+FEATURE_TYPE["label"] = vision.enums.Feature.Type.LABEL_DETECTION
+FEATURE_TYPE["face"] = vision.enums.Feature.Type.FACE_DETECTION
+FEATURE_TYPE["object"] = vision.enums.Feature.Type.OBJECT_LOCALIZATION
+
+FEATURE_FIELD = dict()
+FEATURE_FIELD["text"] = "text_annotations"
+FEATURE_FIELD["label"] = "label_annotations"
+FEATURE_FIELD["face"] = "face_annotations"
+FEATURE_FIELD["object"] = "localized_object_annotations"
+
 #
 # (END OF) GOOGLE CLOUD SERVICES WRAPPING ROUTINES
 #
@@ -13,8 +13,10 @@
 #
 
 from PIL import Image, ImageDraw, ImageFont, ImageOps
+from frame import Frame, JPEG_QUALITY
+import metrics
 import numpy, cv2
-import io, tempfile, copy
+import io, tempfile, copy, time, threading, itertools
 
 # PARAMETERS
 # ====================
@@ -24,6 +26,25 @@ CAMV = 1080                # VERTICAL RESOLUTION (IN PIXEL) OF CAMERA
 SCALE = 4                  # DOWN SCALE FACTOR FOR BANDWIDTH CONSERVATION
 LINEWIDTH = 5              # WIDTH OF LINES (IN PIXEL) FOR FRAMING IDENTIFIED OBJECTS
 
+MOTION_SIZE = (64, 36)     # DIMENSION (IN PIXEL) OF FRAMES COMPARED FOR MOTION DETECTION
+MOTION_DELTA = 25          # MINIMUM CHANGE (0-255) IN BRIGHTNESS FOR A PIXEL TO BE IN MOTION
+MOTION_AREA = 0.01         # MINIMUM PORTION (0-1) OF PIXELS IN MOTION FOR A FRAME TO PASS
+MOTION_RATE = 0.05         # LEARNING RATE (0-1) OF THE BACKGROUND MODEL
+HEARTBEAT = 10             # MAXIMUM INTERVAL (IN SECOND) BETWEEN FRAMES PASSED BY A GATE
+POOL_SIZE = 8              # NUMBER OF PREALLOCATED BUFFERS FOR VIDEO FRAMES
+JPEG_PORT = 1              # SPLITTER PORT OF THE CAMERA ENCODING VIDEO FRAMES INTO JPEG
+BLOCK_SIZE = 16            # DIMENSION (IN PIXEL) OF BLOCKS OF PIXELATED REGIONS
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+FONT_SIZE = 24             # SIZE (IN POINT) OF TEXT DRAWN BY PIL ROUTINES
+
+# Time spent and frames handled by the camera and the video window, reported by
+#  `metrics'.
+#
+CAPTURE_SECONDS = metrics.REGISTRY.histogram("lifeline_capture_seconds", "Time taken to capture a video frame.")
+CAPTURE_FRAMES = metrics.REGISTRY.counter("lifeline_capture_frames_total", "Number of video frames captured.")
+DISPLAY_SECONDS = metrics.REGISTRY.histogram("lifeline_display_seconds", "Time taken to show a video frame in the video window.")
+
 #
 # IMAGE RENDERING ROUTINES
 #
@@ -37,7 +58,8 @@ LINEWIDTH = 5              # WIDTH OF LINES (IN PIXEL) FOR FRAMING IDENTIFIED OB
 # @param img     A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 presented for highlighting objects within. For NumPy Array object,
-#                 OpenCV drawing is used instead of PIL ImageDraw routines.
+#                 OpenCV drawing is used instead of PIL ImageDraw routines. A Frame
+#                 object is drawn on through its NumPy Array representation.
 # @param objs    A list of objects found by Google Vision API, as in the format
 #                 returned from Google Vision API
 # @param colour  A tuple of three 8-bit integer elements of individual component
@@ -51,6 +73,10 @@ LINEWIDTH = 5              # WIDTH OF LINES (IN PIXEL) FOR FRAMING IDENTIFIED OB
 #                 dimension or an absolute pixel position. Normalised locations
 #                 provide x-, y- position within the range of 0-1 and requires
 #                 factoring with the dimension of the associated axes.
+# @param inplace A boolean variable to dictate the function to draw on img itself
+#                 instead of a copy, for img being a PIL image object or NumPy Array
+#                 object. It saves a copy of the whole image when img is not needed
+#                 intact afterwards, e.g., it is already a copy.
 #
 # @ret           A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
@@ -58,9 +84,17 @@ LINEWIDTH = 5              # WIDTH OF LINES (IN PIXEL) FOR FRAMING IDENTIFIED OB
 #                 taggings as decided by input. The type of object returned would
 #                 be the same as the img object type.
 #
-def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", norm = True) :
+def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", norm = True, inplace = False) :
+    if inplace is not None and type(inplace) is bool :
+        pass
+    else :
+        raise TypeError
+
+    if img is not None and isinstance(img, Frame) is True :
+        return __frame_draw(img, highlight_image(img.array, objs, colour, txttag, norm, inplace), inplace)
+
     if img is not None and isinstance(img, Image.Image) is True :
-        pilimg = copy.copy(img)
+        pilimg = img if inplace is True else copy.copy(img)
 
         draw = ImageDraw.Draw(pilimg)
     elif img is not None and type(img) is io.BytesIO :
@@ -70,7 +104,7 @@ def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", nor
 
         draw = ImageDraw.Draw(pilimg)
     elif img is not None and isinstance(img, numpy.ndarray) is True :
-        img = copy.copy(img)
+        img = img if inplace is True else copy.copy(img)
     else :
         raise TypeError
 
@@ -78,7 +112,7 @@ def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", nor
     #  taggings in the picture.
     #
     if isinstance(img, numpy.ndarray) is not True :
-        font = ImageFont.truetype(font="/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", size=24)
+        font = load_font()
     else :
         font = (cv2.FONT_HERSHEY_SIMPLEX, 0.6)
 
@@ -168,13 +202,15 @@ def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", nor
 # @param img     A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 presented for pasting another image atop. For NumPy Array object,
-#                 OpenCV drawing is used instead of PIL ImageDraw routines.
+#                 OpenCV drawing is used instead of PIL ImageDraw routines. A Frame
+#                 object is drawn on through its NumPy Array representation.
 # @param ovly_imgA PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 presented to be pasted on master image. For NumPy Array object,
 #                 OpenCV drawing is used instead of PIL ImageDraw routines. The type
 #                 of the object has to agree with the type of the object presented
-#                 as img.
+#                 as img, except that a NumPy Array object or a Frame object may be
+#                 overlaid on a Frame object.
 # @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
 #                 the overlaying image, ovly_img. The origin of the x-, y-pane is
 #                 the upper left corner of the master for positive x-, y-component
@@ -191,22 +227,37 @@ def highlight_image(img, objs, colour = (255, 0, 0), txttag = "description", nor
 # @param paste   A boolean variable to dictate the function to skip removing the
 #                 background from the overlaying image. Paste directly the raw
 #                 overlaying image to the background image.
+# @param inplace A boolean variable to dictate the function to draw on img itself
+#                 instead of a copy, for img being a PIL image object or NumPy Array
+#                 object. It saves a copy of the whole image when img is not needed
+#                 intact afterwards, e.g., it is already a copy.
 #
 # @ret           A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 with required overlay. The type of object returned would be the
 #                 same as the img object type.
 #
-def overlay_image(img, ovly_img, anchor = (1, 1), paste = False) :
+def overlay_image(img, ovly_img, anchor = (1, 1), paste = False, inplace = False) :
+    if inplace is not None and type(inplace) is bool :
+        pass
+    else :
+        raise TypeError
+
+    if img is not None and isinstance(img, Frame) is True :
+        if ovly_img is not None and isinstance(ovly_img, Frame) is True :
+            ovly_img = ovly_img.array
+
+        return __frame_draw(img, overlay_image(img.array, ovly_img, anchor, paste, inplace), inplace)
+
     if img is not None and ovly_img is not None and type(img) is type(ovly_img) :
         pass
     else :
         raise TypeError
 
     if img is not None and isinstance(img, numpy.ndarray) is True :
-        img = copy.copy(img)
+        img = img if inplace is True else copy.copy(img)
     elif img is not None and isinstance(img, Image.Image) is True :
-        pilimg = copy.copy(img)
+        pilimg = img if inplace is True else copy.copy(img)
         ovly_pilimg = ovly_img
     elif img is not None and type(img) is io.BytesIO :
         img.seek(0)
@@ -253,7 +304,10 @@ def overlay_image(img, ovly_img, anchor = (1, 1), paste = False) :
 
             if paste is not True :
                 ovly_cnvs = img[anchor[1] : anchor[1] + ovly_img.shape[0], anchor[0] : anchor[0] + ovly_img.shape[1]]
-                _, ovly_mask = cv2.threshold(cv2.cvtColor(ovly_img, cv2.COLOR_BGR2GRAY), 127, 255, cv2.THRESH_BINARY)
+                ovly_mask = __asset_masks.get(id(ovly_img))
+
+                if ovly_mask is None :
+                    _, ovly_mask = cv2.threshold(cv2.cvtColor(ovly_img, cv2.COLOR_BGR2GRAY), 127, 255, cv2.THRESH_BINARY)
 
                 img[anchor[1] : anchor[1] + ovly_img.shape[0], anchor[0] : anchor[0] + ovly_img.shape[1]] = \
                     cv2.add(cv2.bitwise_and(ovly_cnvs, ovly_cnvs, mask = ovly_mask), \
@@ -314,7 +368,8 @@ def overlay_image(img, ovly_img, anchor = (1, 1), paste = False) :
 # @param img     A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 presented for placing text on top. For NumPy Array object, OpenCV
-#                 drawing is used instead of PIL ImageDraw routines.
+#                 drawing is used instead of PIL ImageDraw routines. A Frame object
+#                 is drawn on through its NumPy Array representation.
 # @param ovly_txtA string object containing the text to be glued on the master.
 # @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
 #                 the overlaying image, ovly_img. The origin of the x-, y-pane is
@@ -338,15 +393,27 @@ def overlay_image(img, ovly_img, anchor = (1, 1), paste = False) :
 # @param label   A boolean value that dictates whether a text box with background
 #                 colour supporting the text should be used or just raw text should
 #                 be stuck on the master image.
+# @param inplace A boolean variable to dictate the function to draw on img itself
+#                 instead of a copy, for img being a PIL image object or NumPy Array
+#                 object. It saves a copy of the whole image when img is not needed
+#                 intact afterwards, e.g., it is already a copy.
 #
 # @ret           A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
 #                 with required overlay. The type of object returned would be the
 #                 same as the img object type.
 #
-def overlay_text(img, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = False) :
+def overlay_text(img, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = False, inplace = False) :
+    if inplace is not None and type(inplace) is bool :
+        pass
+    else :
+        raise TypeError
+
+    if img is not None and isinstance(img, Frame) is True :
+        return __frame_draw(img, overlay_text(img.array, ovly_txt, anchor, colour, label, inplace), inplace)
+
     if img is not None and isinstance(img, Image.Image) is True :
-        pilimg = copy.copy(img)
+        pilimg = img if inplace is True else copy.copy(img)
 
         draw = ImageDraw.Draw(pilimg)
     elif img is not None and type(img) is io.BytesIO :
@@ -356,7 +423,7 @@ def overlay_text(img, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = F
 
         draw = ImageDraw.Draw(pilimg)
     elif img is not None and isinstance(img, numpy.ndarray) is True :
-        img = copy.copy(img)
+        img = img if inplace is True else copy.copy(img)
     else :
         raise TypeError
 
@@ -364,7 +431,7 @@ def overlay_text(img, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = F
     #  taggings in the picture.
     #
     if isinstance(img, numpy.ndarray) is not True :
-        font = ImageFont.truetype(font="/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", size=24)
+        font = load_font()
     else :
         font = (cv2.FONT_HERSHEY_SIMPLEX, 0.6)
 
@@ -457,303 +524,1753 @@ def overlay_text(img, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = F
     else :
         return pilimg
 
-#
-# (END OF) IMAGE RENDERING ROUTINES
-#
-
-#
-# IMAGE PRESENTATION ROUTINES
-#
-
-# __GENERIC_OIMAGE
+# OVERLAY_MASK
 # ====================
 #
-# Generic routine for handling image output to filesystem or display system.
+# This function paints the pixels selected by a mask in a single colour, e.g., for
+#  blanking out a region of no interest.
 #
-# @param img     A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 to be output
-# @param ofile   None or a string of file location path for saving a JPEG image.
-#                 If the argument was passed with None, it is assumed the image
-#                 should be shown instead of stored in the filesystem and be
-#                 presented to user according to additional argument static_ofile
-# @param static  A boolean variable dictating when ofile is None, whether the image
-#         _ofile  should be presented to user as image (static) or video.
+# @param img     A NumPy Array object containing RGB format image or a Frame object
+#                 presented for painting on.
+# @param mask    A two dimensional NumPy Array object of boolean values or integers,
+#                 non-zero elements selecting the pixels to be painted. The mask may
+#                 be smaller than img and is then placed at anchor.
+# @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
+#                 the mask, as in overlay_image().
+# @param colour  A tuple of three 8-bit integer elements of individual component
+#                 colour Red, Green and Blue to paint the pixels in.
+# @param inplace A boolean variable to dictate the function to paint on img itself
+#                 instead of a copy.
 #
-def __generic_oimage(img, ofile = None, static_ofile = True) :
-    if img is not None and isinstance(img, Image.Image) is True :
-        pass
-    elif img is not None and isinstance(img, numpy.ndarray) is True :
-        pass
-    elif img is not None and isinstance(img, io.BytesIO) is True :
+# @ret           A NumPy Array object or a Frame object, the same as the img object
+#                 type, with the pixels painted.
+#
+def overlay_mask(img, mask, anchor = (1, 1), colour = (0, 0, 0), inplace = False) :
+    if inplace is not None and type(inplace) is bool :
         pass
     else :
         raise TypeError
 
-    if static_ofile is not None and type(static_ofile) is bool :
-        pass
+    if img is not None and isinstance(img, Frame) is True :
+        return __frame_draw(img, overlay_mask(img.array, mask, anchor, colour, inplace), inplace)
+
+    if img is not None and isinstance(img, numpy.ndarray) is True :
+        img = img if inplace is True else copy.copy(img)
     else :
         raise TypeError
 
-    if ofile is None :
-        if static_ofile is False :
-            if isinstance(img, Image.Image) is True :
-                cv2.imshow('Video', numpy.swapaxes(numpy.array(img.convert('RGB'), dtype=numpy.uint8).reshape((img.size[1], img.size[0], 3)), 0, 0)[:, :, ::-1])
-            elif isinstance(img, numpy.ndarray) is True :
-                cv2.imshow('Video', img[:, :, ::-1])
-            elif isinstance(img, io.BytesIO) is True :
-                img.seek(0)
+    if mask is not None and isinstance(mask, numpy.ndarray) is True and mask.ndim == 2 :
+        if img.shape[0] >= mask.shape[0] and img.shape[1] >= mask.shape[1] :
+            pass
+        else :
+            raise IndexError("Mask is Larger than the Canvas of the Base Image")
+    else :
+        raise TypeError
 
-                pilimg = Image.open(img)
+    if colour is not None and (type(colour) is tuple or type(colour) is list) and len(colour) == 3 :
+        for i in 0, 1, 2 :
+            if colour[i] < 0 or colour[i] > 255 :
+                raise ValueError
+    else :
+        raise TypeError
 
-                cv2.imshow('Video', numpy.swapaxes(numpy.array(pilimg.convert('RGB'), dtype=numpy.uint8).reshape((pilimg.size[1], pilimg.size[0], 3)), 0, 0)[:, :, ::-1])
+    if anchor is not None and (type(anchor) is tuple or type(anchor) is list) and len(anchor) == 2 :
+        if anchor[0] - mask.shape[1] + 1 < -img.shape[1] or anchor[0] + mask.shape[1] - 1 > img.shape[1] or anchor[0] == 0 :
+            raise ValueError
 
-            # [REQUIRED] https://stackoverflow.com/a/22277285
-            cv2.waitKey(1)
-        else :
-            if isinstance(img, Image.Image) is True :
-                img.show(title = "Transient Processed Output")
-            elif isinstance(img, numpy.ndarray) is True :
-                Image.fromarray(img).show()
-            elif isinstance(img, io.BytesIO) is True :
-                img.seek(0)
+        if anchor[1] - mask.shape[0] + 1 < -img.shape[0] or anchor[1] + mask.shape[0] - 1 > img.shape[0] or anchor[1] == 0 :
+            raise ValueError
 
-                Image.open(img).show()
-    elif ofile is not None and type(ofile) is str :
-        if isinstance(img, Image.Image) is True :
-            img.save(ofile)
-        elif isinstance(img, numpy.ndarray) is True :
-            Image.fromarray(img).save(ofile)
-        elif isinstance(img, io.BytesIO) is True :
-            img.seek(0)
+        if anchor[0] > 0 :
+            _ = anchor[0] - 1
+        else :
+            _ = img.shape[1] + anchor[0] - (mask.shape[1] - 1)
 
-            Image.open(img).save(ofile)
+        if anchor[1] > 0 :
+            anchor = (_, anchor[1] - 1)
+        else :
+            anchor = (_, img.shape[0] + anchor[1] - (mask.shape[0] - 1))
     else :
         raise TypeError
 
-# REPLAY_VIDEO
-# ====================
-#
-# Routine for outputting a single video frame to the video window in graphical
-#  user interface.
-#
-# @param frame   A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 to be output to graphical user interface as a constituent frame
-#                 in the form of video
-#
-def replay_video(frame = None) :
-    __generic_oimage(frame, None, False)
+    img[anchor[1] : anchor[1] + mask.shape[0], anchor[0] : anchor[0] + mask.shape[1]][mask != 0] = colour
 
-# REPLAY_IMAGE
-# ====================
-#
-# Routine for outputting a picture in graphical user interface.
-#
-# @param image   A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 to be output to graphical user interface in the form of picture
-#
-def replay_image(image = None) :
-    __generic_oimage(image, None, True)
+    return img
 
-# SAVE_IMAGE
+# PIXELATE_REGIONS
 # ====================
 #
-# Storing an image output to local filesystem.
+# This function obscures regions of an image, e.g., faces for privacy, each region
+#  being processed as a whole by a single resampling or filtering operation rather
+#  than block by block.
 #
-# @param image   A PIL image object or NumPy Array object containing RGB format
+# @param img     A PIL image object or NumPy Array object containing RGB format
 #                 image or a BytesIO streaming object containing JPEG format image
-#                 to be output
-# @param ofile   A string of file location path for saving a JPEG image.
-#
-def save_image(image, ofile) :
-    __generic_oimage(image, ofile)
-
+#                 or a Frame object presented for obscuring regions within.
+# @param boxes   A list of regions, each either a tuple of four integer elements of
+#                 the left, top, right and bottom pixel coordinates (from 0, right
+#                 and bottom exclusive) or an object found by Google Vision API
+#                 whose bounding polygon is obscured.
+# @param block   An integer of the dimension (in pixel) of blocks for "pixelate" and
+#                 "noise" modes or of the filter kernel for "blur" mode.
+# @param mode    A string for selecting the effect. Supported options are
+#                 1) "pixelate", each block painted in its average colour
+#                 2) "blur", the region smoothed by a box filter
+#                 3) "fill", the region painted in colour
+#                 4) "noise", each block painted in a random grey level.
+# @param colour  A tuple of three 8-bit integer elements of the colour for "fill".
+# @param norm    A boolean variable informing of the function whether the positions
+#                 of objects are normalised against the image dimension, as in
+#                 highlight_image(). Not applicable to regions given as tuples.
+# @param inplace A boolean variable to dictate the function to draw on img itself
+#                 instead of a copy, for img being a PIL image object, NumPy Array
+#                 object or Frame object.
 #
-# (END OF) IMAGE PRESENTATION ROUTINES
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 or a Frame object with the regions obscured. The type of object
+#                 returned would be the same as the img object type.
 #
+def pixelate_regions(img, boxes, block = BLOCK_SIZE, mode = "pixelate", colour = (0, 0, 0), norm = True, inplace = False) :
+    if inplace is not None and type(inplace) is bool :
+        pass
+    else :
+        raise TypeError
 
-#
-# IMAGE ACQUISITION ROUTINES
-#
+    if img is not None and isinstance(img, Frame) is True :
+        return __frame_draw(img, pixelate_regions(img.array, boxes, block, mode, colour, norm, inplace), inplace)
+    elif img is not None and isinstance(img, Image.Image) is True :
+        pixels = pixelate_regions(numpy.array(img.convert("RGB"), dtype = numpy.uint8), boxes, block, mode, colour, norm, True)
 
-import picamera, math
+        if inplace is True :
+            img.paste(Image.fromarray(pixels))
 
-__cam_inst = None
-__usenumpy = not False
-__intl_mem = False
+            return img
+        else :
+            return Image.fromarray(pixels)
+    elif img is not None and type(img) is io.BytesIO :
+        img.seek(0)
 
-# __GENERIC_IIMAGE
-# ====================
-#
-# Generic routine for handling image input from filesystem or image acquisition device.
-#  There is no particular difference in acquiring an image input as single image or
-#  as a single frame in a video.
-#
-# @param ifile   None or a string of file location path for retrieving a JPEG image.
-#                 If the argument was passed with None, it is assumed the image
-#                 should be acquired by local camera and the mode of capture as
-#                 a single frame of video or picture should be indicated by the
-#                 extra argument static_ifile
-# @param static  A boolean variable dictating when ifile is None, whether the image
-#         _ifile  should be acquired as image (static) or as a frame in a video.
-#
-# @ret           A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 captured. The exact object type returned is to be determined by
-#                 module internal variable __usenumpy and __intl_mem. __usenumpy
-#                 dictates the use of using NumPy Array for image storage and the
-#                 flag takes precedence. The flag __intl_mem indicates the use of
-#                 in-memory BytesIO object as image container. If both flags are
-#                 not asserted, the return object would be a PIL image object.
-#
-def __generic_iimage(ifile = None, static_ifile = True) :
-    if ifile is not None and type(ifile) is str :
-        if __usenumpy is False :
-            if __intl_mem is False :
-                return Image.open(ifile).convert(mode = "RGB")
-            else :
-                ret = io.BytesIO()
+        ret = io.BytesIO()
 
-                ret.write(open(ifile, "rb").read())
+        Image.fromarray(pixelate_regions(numpy.array(Image.open(img).convert("RGB"), dtype = numpy.uint8), boxes, block, mode, colour, norm, True)).save(ret, "JPEG")
 
-                return ret
-        else :
-            img = Image.open(ifile)
+        return ret
+    elif img is not None and isinstance(img, numpy.ndarray) is True :
+        img = img if inplace is True else copy.copy(img)
+    else :
+        raise TypeError
 
-            ret = numpy.swapaxes(numpy.array(img.convert('RGB'), dtype=numpy.uint8).reshape((img.size[1], img.size[0], 3)), 0, 0)
+    if block is not None and type(block) is int :
+        if block < 1 :
+            raise ValueError
+    else :
+        raise TypeError
 
-            return ret
-    elif ifile is None :
-        global __cam_inst
+    if mode not in ("pixelate", "blur", "fill", "noise") :
+        raise ValueError
 
-        if static_ifile is not None and type(static_ifile) is bool :
-            if __cam_inst is None :
-                __cam_inst = picamera.PiCamera()
-                __cam_inst.resolution = (int(CAMH / SCALE), int(CAMV / SCALE))
+    if norm is not None and type(norm) is bool :
+        pass
+    else :
+        raise TypeError
 
-            if __usenumpy is False :
-                # NO DIFFERENCE IN PERFORMANCE USING BYTESIO VERSUS MKTIME BY EXPERIMENT
-                #  FOR RESOLUTION OF (480, 272). PERFORMANCE IMPACT FOR USING BYTESIO FOR
-                #  RESOLUTION OF (1988, 1020)
-                #
-                if __intl_mem is False :
-                    ret = tempfile.mktemp()
+    for box in boxes :
+        if type(box) is tuple or type(box) is list :
+            left, top, right, bottom = box
+        else :
+            if norm == False :
+                vertices = [(vertex.x, vertex.y) for vertex in box.bounding_poly.vertices]
+            else :
+                vertices = [(img.shape[1] * vertex.x, img.shape[0] * vertex.y) for vertex in box.bounding_poly.normalized_vertices]
 
-                    # use_video_port = True can make 10 times frame rate boost
-                    # (site: https://pyimagesearch.com/2015/03/30/accessing-the-raspberry-pi-camera-with-opencv-and-python/)
-                    #
-                    __cam_inst.capture(ret, format="jpeg", use_video_port = (static_ifile is False))
+            if len(vertices) == 0 :
+                continue
 
-                    return Image.open(ret).convert(mode = "RGB")
-                else :
-                    ret = io.BytesIO()
+            left, top = min([x for x, _ in vertices]), min([y for _, y in vertices])
+            right, bottom = max([x for x, _ in vertices]), max([y for _, y in vertices])
 
-                    __cam_inst.capture(ret, format="jpeg", use_video_port = (static_ifile is False))
+        left, right = min(max(int(left), 0), img.shape[1]), min(max(int(right), 0), img.shape[1])
+        top, bottom = min(max(int(top), 0), img.shape[0]), min(max(int(bottom), 0), img.shape[0])
 
-                return ret
-            else :
-                # [WARNING] Camera resolution is aligned to 16 pixel and is automatically uplifted by the resolution set step.
-                #  If the container is not uplifted to equivalent size, segmentation fault will occur.
-                RESOALIGN = 16
+        if right <= left or bottom <= top :
+            continue
 
-                ret = numpy.empty((int(math.ceil(CAMV / SCALE / RESOALIGN) * RESOALIGN), int(math.ceil(CAMH / SCALE / RESOALIGN) * RESOALIGN), 3), dtype=numpy.uint8)
+        region = img[top : bottom, left : right]
 
-                __cam_inst.capture(ret, format="rgb", use_video_port = (static_ifile is False))
+        if mode == "pixelate" :
+            # Shrinking by area averaging gives the average colour of every block,
+            #  enlarging by nearest neighbour spreads it back over the block.
+            #
+            small = cv2.resize(region, (max((right - left) // block, 1), max((bottom - top) // block, 1)), interpolation = cv2.INTER_AREA)
 
-                return ret
+            region[...] = cv2.resize(small, (right - left, bottom - top), interpolation = cv2.INTER_NEAREST)
+        elif mode == "blur" :
+            region[...] = cv2.blur(region, (block, block))
+        elif mode == "fill" :
+            region[...] = colour
         else :
-            raise TypeError
+            levels = numpy.random.randint(0, 8, (-(-(bottom - top) // block), -(-(right - left) // block)), dtype = numpy.uint8) * 16 + 127
 
-# RECORD_VIDEO
-# ====================
-#
-# Routine for capturing a single video frame of a video stream by the local
-#  camera.
-#
-# @ret           A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 captured by the local camera as a constituent frame in a video
-#                 stream.  The exact object type returned is to be determined by
-#                 module internal variable __usenumpy and __intl_mem. __usenumpy
-#                 dictates the use of using NumPy Array for image storage and the
-#                 flag takes precedence. The flag __intl_mem indicates the use of
-#                 in-memory BytesIO object as image container. If both flags are
-#                 not asserted, the return object would be a PIL image object.
-#
-def record_video() :
-    return __generic_iimage(None, False)
+            region[...] = numpy.repeat(numpy.repeat(levels, block, axis = 0), block, axis = 1)[: bottom - top, : right - left, None]
 
-# RECORD_IMAGE
-#
-# ====================
-#
-# Routine for capturing a picture by the local camera.
-#
-# @ret           A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 captured by the local camera as a picture. The exact object type
-#                 returned is to be determined by module internal variable __usenumpy
-#                 and __intl_mem. __usenumpy dictates the use of using NumPy Array
-#                 for image storage and the flag takes precedence. The flag
-#                 __intl_mem indicates the use of in-memory BytesIO object as image
-#                 container. If both flags are not asserted, the return object would
-#                 be a PIL image object.
-#
-def record_image() :
-    return __generic_iimage(None, True)
+    return img
 
-# LOAD_IMAGE
+# __FRAME_DRAW
 # ====================
 #
-# Retrieving an image from the local filesystem.
+# Wrap up drawing on the NumPy Array representation of a Frame object.
 #
-# @param ifile   A string of file location path for retrieving a JPEG image.
+# @param img     The Frame object drawn on.
+# @param pixels  The NumPy Array object returned by the drawing routine.
+# @param inplace A boolean variable of whether the drawing took place in place.
 #
-# @ret           A PIL image object or NumPy Array object containing RGB format
-#                 image or a BytesIO streaming object containing JPEG format image
-#                 loaded from the local filesystem.  The exact object type returned is
-#                 to be determined by module internal variable __usenumpy and
-#                 __intl_mem. __usenumpy dictates the use of using NumPy Array for
-#                 image storage and the flag takes precedence. The flag __intl_mem
-#                 indicates the use of in-memory BytesIO object as image container. If
-#                 both flags are not asserted, the return object would be a PIL image
-#                 object.
+# @ret           img with its derived representations discarded if drawn in place,
+#                 or a new Frame object of pixels, of the identity and time of capture
+#                 of img, otherwise.
 #
-def load_image(ifile) :
-    return __generic_iimage(ifile)
+def __frame_draw(img, pixels, inplace) :
+    if inplace is True :
+        img.invalidate()
 
-#
-# (END OF) IMAGE ACQUISITION ROUTINES
-#
+        return img
+    else :
+        return Frame(pixels, img.quality, img.ident, img.stamp)
 
+# OVERLAYLAYER
+# ====================
 #
-# HARDWARE MANIPULATION ROUTINES
+# A layer of static overlays, e.g., a caption or a logo, drawn once into a RGBA
+#  layer of the frame dimension and blended onto every frame afterwards in a
+#  single vectorised step, instead of being drawn again for every frame.
 #
+# The layer is drawn by the very overlay_text() and overlay_image() routines over
+#  a black and a white canvas, the pixels which come out the same on both being
+#  those covered by the overlays. The layer is drawn again only when an overlay is
+#  added or the frame dimension changes, e.g., by resolution_rescale().
+#
+class OverlayLayer :
+    def __init__(self) :
+        self.items = []
+        self.size = None
 
-def resolution_rescale(factor = 4) :
-    global SCALE
-    global __cam_inst
-
-    if factor is not None and type(factor) is int :
-        if factor > 0 :
-            SCALE = factor
+        self.box = None
+        self.colour = None
+        self.alpha = None
+        self.mask = None
 
-            if __cam_inst is not None :
-                __cam_inst.resolution = (int(CAMH / SCALE), int(CAMV / SCALE))
+    # ADD_IMAGE
+    # ====================
+    #
+    # Add an image to the layer, as overlay_image() would overlay it.
+    #
+    # @param ovly_imgA PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object containing JPEG format image
+    #                 or a Frame object, e.g., as returned by load_asset().
+    # @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
+    #                 the overlaying image, as in overlay_image().
+    # @param paste   A boolean variable to skip removing the background from the
+    #                 overlaying image, as in overlay_image().
+    #
+    def add_image(self, ovly_img, anchor = (1, 1), paste = False) :
+        if ovly_img is not None and isinstance(ovly_img, Frame) is True :
+            ovly_img = ovly_img.array
+        elif ovly_img is not None and isinstance(ovly_img, Image.Image) is True :
+            ovly_img = numpy.asarray(ovly_img.convert("RGB"))
+        elif ovly_img is not None and type(ovly_img) is io.BytesIO :
+            ovly_img.seek(0)
+
+            ovly_img = numpy.asarray(Image.open(ovly_img).convert("RGB"))
+        elif ovly_img is not None and isinstance(ovly_img, numpy.ndarray) is True :
+            pass
         else :
-            raise ValueError
-    else :
-        raise TypeError
+            raise TypeError
 
-#
-# (END OF) HARDWARE MANIPULATION ROUTINES
-#
+        self.items.append((overlay_image, (ovly_img, anchor, paste)))
+        self.size = None
 
+    # ADD_TEXT
+    # ====================
+    #
+    # Add a text to the layer, as overlay_text() would overlay it.
+    #
+    # @param ovly_txtA string object containing the text to be glued on frames.
+    # @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
+    #                 the text, as in overlay_text().
+    # @param colour  A tuple of three 8-bit integer elements of the colour of the text
+    #                 or the label, as in overlay_text().
+    # @param label   A boolean value of whether a text box should support the text.
+    #
+    def add_text(self, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = False) :
+        self.items.append((overlay_text, (ovly_txt, anchor, colour, label)))
+        self.size = None
+
+    # CLEAR
+    # ====================
+    #
+    # Remove all overlays from the layer.
+    #
+    def clear(self) :
+        self.items = []
+        self.size = None
+
+    # __RENDER
+    # ====================
+    #
+    # Draw the overlays into the layer for frames of the given dimension.
+    #
+    def __render(self, size) :
+        black = numpy.zeros((size[1], size[0], 3), dtype = numpy.uint8)
+        white = numpy.full((size[1], size[0], 3), 255, dtype = numpy.uint8)
+
+        for call, args in self.items :
+            call(black, *args, inplace = True)
+            call(white, *args, inplace = True)
+
+        # A pixel uncovered is 0 on black and 255 on white, a pixel covered by an
+        #  opaque overlay is the same on both.
+        #
+        alpha = 255 - (white.astype(numpy.int16) - black).max(axis = 2)
+
+        self.size = size
+        self.box = None
+
+        rows = numpy.flatnonzero(alpha.any(axis = 1))
+        cols = numpy.flatnonzero(alpha.any(axis = 0))
+
+        if len(rows) == 0 :
+            return
+
+        self.box = (cols[0], rows[0], cols[-1] + 1, rows[-1] + 1)
+
+        alpha = alpha[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1].astype(numpy.uint16)
+        black = black[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1].astype(numpy.uint16)
+
+        if numpy.all((alpha == 0) | (alpha == 255)) :
+            # Overlays drawn without anti-aliasing are either covering a pixel or not,
+            #  the layer is copied through a mask instead of being blended.
+            #
+            self.mask = (alpha == 255)[:, :, None]
+            self.colour = black.astype(numpy.uint8)
+            self.alpha = None
+        else :
+            self.mask = None
+            self.colour = numpy.minimum(black * 255 // numpy.maximum(alpha, 1)[:, :, None], 255)
+            self.alpha = alpha[:, :, None]
+
+    # BLEND
+    # ====================
+    #
+    # Blend the layer onto a frame.
+    #
+    # @param img     A NumPy Array object containing RGB format image or a Frame object.
+    # @param inplace A boolean variable to dictate the function to blend onto img
+    #                 itself instead of a copy.
+    #
+    # @ret           A NumPy Array object or a Frame object, the same as the img object
+    #                 type, with the layer blended.
+    #
+    def blend(self, img, inplace = False) :
+        if inplace is not None and type(inplace) is bool :
+            pass
+        else :
+            raise TypeError
+
+        if img is not None and isinstance(img, Frame) is True :
+            pixels = img.array
+        elif img is not None and isinstance(img, numpy.ndarray) is True :
+            pixels = img
+        else :
+            raise TypeError
+
+        if inplace is not True :
+            pixels = pixels.copy()
+
+        if self.size != (pixels.shape[1], pixels.shape[0]) :
+            self.__render((pixels.shape[1], pixels.shape[0]))
+
+        if self.box is not None :
+            roi = pixels[self.box[1] : self.box[3], self.box[0] : self.box[2]]
+
+            if self.mask is not None :
+                numpy.copyto(roi, self.colour, where = self.mask)
+            else :
+                roi[...] = (roi * (255 - self.alpha) + self.colour * self.alpha + 127) // 255
+
+        if isinstance(img, Frame) is True :
+            if inplace is True :
+                img.invalidate()
+
+                return img
+            else :
+                return Frame(pixels, img.quality, img.ident, img.stamp)
+        else :
+            return pixels
+
+# DYNAMICTEXT
+# ====================
+#
+# A text overlay whose content changes from time to time, e.g., a clock or a count.
+#  The text is drawn into a layer when its content or colour changes only, every
+#  other frame is blended with the layer drawn before.
+#
+# @param anchor  A tuple of two integer elements of x-, y-axis coordinates to place
+#                 the text, as in overlay_text().
+# @param colour  A tuple of three 8-bit integer elements of the colour of the text
+#                 or the label, as in overlay_text().
+# @param label   A boolean value of whether a text box should support the text.
+#
+class DynamicText :
+    def __init__(self, anchor = (1, 1), colour = (255, 0, 0), label = False) :
+        self.anchor = anchor
+        self.colour = colour
+        self.label = label
+
+        self.text = None
+        self.drawn = None
+        self.layer = OverlayLayer()
+
+    # BLEND
+    # ====================
+    #
+    # Blend the text onto a frame.
+    #
+    # @param img     A NumPy Array object containing RGB format image or a Frame object.
+    # @param ovly_txtA string object containing the text to be glued on the frame.
+    # @param colour  None or a tuple of three 8-bit integer elements of the colour
+    #                 replacing the colour given upon construction.
+    # @param inplace A boolean variable to dictate the function to blend onto img
+    #                 itself instead of a copy.
+    #
+    # @ret           A NumPy Array object or a Frame object, the same as the img object
+    #                 type, with the text blended.
+    #
+    def blend(self, img, ovly_txt, colour = None, inplace = False) :
+        if colour is None :
+            colour = self.colour
+
+        if ovly_txt != self.text or colour != self.drawn :
+            self.layer.clear()
+            self.layer.add_text(ovly_txt, self.anchor, colour, self.label)
+
+            self.text = ovly_txt
+            self.drawn = colour
+
+        return self.layer.blend(img, inplace)
+
+# COMPOSITOR
+# ====================
+#
+# A stack of drawing operations applied onto a frame together. Operations are
+#  collected first, e.g., as a frame is being rendered, and applied onto a single
+#  buffer afterwards. The frame is copied once at most however many operations are
+#  stacked, and no operation produces an intermediate image, so the cost of a
+#  frame follows the pixels drawn rather than the number of operations.
+#
+# The operations take the same arguments as the routines of the same effect, i.e.,
+#  overlay_text(), highlight_image(), overlay_image(), overlay_mask() and
+#  pixelate_regions(), and are applied in the order they are added, later ones
+#  atop earlier ones.
+#
+class Compositor :
+    def __init__(self) :
+        self.ops = []
+
+    # ADD_TEXT
+    # ====================
+    #
+    # Stack a text, as overlay_text() would overlay it.
+    #
+    def add_text(self, ovly_txt, anchor = (1, 1), colour = (255, 0, 0), label = False) :
+        self.ops.append((overlay_text, (ovly_txt, anchor, colour, label)))
+
+        return self
+
+    # ADD_BOXES
+    # ====================
+    #
+    # Stack the framing of objects, as highlight_image() would frame them.
+    #
+    def add_boxes(self, objs, colour = (255, 0, 0), txttag = "description", norm = True) :
+        self.ops.append((highlight_image, (objs, colour, txttag, norm)))
+
+        return self
+
+    # ADD_IMAGE
+    # ====================
+    #
+    # Stack an image, as overlay_image() would overlay it. The image may be of any
+    #  type accepted by the Frame class.
+    #
+    def add_image(self, ovly_img, anchor = (1, 1), paste = False) :
+        if ovly_img is not None and isinstance(ovly_img, Frame) is True :
+            ovly_img = ovly_img.array
+        elif ovly_img is not None and isinstance(ovly_img, numpy.ndarray) is True :
+            pass
+        else :
+            ovly_img = Frame(ovly_img).array
+
+        self.ops.append((overlay_image, (ovly_img, anchor, paste)))
+
+        return self
+
+    # ADD_MASK
+    # ====================
+    #
+    # Stack the painting of the pixels selected by a mask, as overlay_mask() would
+    #  paint them.
+    #
+    def add_mask(self, mask, anchor = (1, 1), colour = (0, 0, 0)) :
+        self.ops.append((overlay_mask, (mask, anchor, colour)))
+
+        return self
+
+    # ADD_PIXELATE
+    # ====================
+    #
+    # Stack the obscuring of regions, as pixelate_regions() would obscure them.
+    #
+    def add_pixelate(self, boxes, block = BLOCK_SIZE, mode = "pixelate", colour = (0, 0, 0), norm = True) :
+        self.ops.append((pixelate_regions, (boxes, block, mode, colour, norm)))
+
+        return self
+
+    # ADD_LAYER
+    # ====================
+    #
+    # Stack an OverlayLayer object, or a DynamicText object with its text.
+    #
+    # @param layer   An OverlayLayer object or a DynamicText object.
+    # @param ovly_txtNone or a string object containing the text of a DynamicText.
+    # @param colour  None or a tuple of the colour of the text of a DynamicText.
+    #
+    def add_layer(self, layer, ovly_txt = None, colour = None) :
+        if layer is not None and isinstance(layer, DynamicText) is True :
+            self.ops.append((layer.blend, (ovly_txt, colour)))
+        elif layer is not None and isinstance(layer, OverlayLayer) is True :
+            self.ops.append((layer.blend, ()))
+        else :
+            raise TypeError
+
+        return self
+
+    # CLEAR
+    # ====================
+    #
+    # Remove all operations, e.g., for the stack to be built again for a new frame.
+    #
+    def clear(self) :
+        self.ops = []
+
+    # APPLY
+    # ====================
+    #
+    # Apply the stacked operations onto a frame.
+    #
+    # @param img     A NumPy Array object containing RGB format image or a Frame object.
+    # @param inplace A boolean variable to dictate the function to draw on img itself
+    #                 instead of a copy. A captured frame still to be identified must
+    #                 not be drawn on in place.
+    #
+    # @ret           A NumPy Array object or a Frame object, the same as the img object
+    #                 type, with all operations applied.
+    #
+    def apply(self, img, inplace = False) :
+        if inplace is not None and type(inplace) is bool :
+            pass
+        else :
+            raise TypeError
+
+        if img is not None and isinstance(img, Frame) is True :
+            pixels = img.array
+        elif img is not None and isinstance(img, numpy.ndarray) is True :
+            pixels = img
+        else :
+            raise TypeError
+
+        if inplace is not True :
+            pixels = pixels.copy()
+
+        for call, args in self.ops :
+            call(pixels, *args, inplace = True)
+
+        if isinstance(img, Frame) is True :
+            if inplace is True :
+                img.invalidate()
+
+                return img
+            else :
+                return Frame(pixels, img.quality, img.ident, img.stamp)
+        else :
+            return pixels
+
+#
+# (END OF) IMAGE RENDERING ROUTINES
+#
+
+#
+# ASSET CACHING ROUTINES
+#
+
+__fonts = {}
+__assets = {}
+__asset_masks = {}
+__asset_lock = threading.Lock()
+
+# LOAD_FONT
+# ====================
+#
+# Load a TrueType font for PIL drawing routines. A font is read from filesystem
+#  upon first use only and is kept for later uses.
+#
+# @param size    An integer of the font size (in point).
+# @param path    A string of file location path of the font.
+#
+# @ret           A PIL ImageFont object.
+#
+def load_font(size = FONT_SIZE, path = FONT_PATH) :
+    with __asset_lock :
+        if (path, size) not in __fonts :
+            __fonts[(path, size)] = ImageFont.truetype(font = path, size = size)
+
+        return __fonts[(path, size)]
+
+# LOAD_ASSET
+# ====================
+#
+# Load an image used over and over, e.g., a logo overlaid on every frame. An asset
+#  is read from filesystem upon first use only and is kept for later uses, as well
+#  as the mask removing its background for overlay_image().
+#
+# The image returned is shared by all callers and must not be drawn on. A NumPy
+#  Array object is returned read-only for the purpose.
+#
+# @param ifile   A string of file location path of the image.
+#
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image,
+#                 as returned by load_image().
+#
+def load_asset(ifile) :
+    if ifile is not None and type(ifile) is str :
+        pass
+    else :
+        raise TypeError
+
+    with __asset_lock :
+        if ifile not in __assets :
+            img = load_image(ifile)
+
+            if isinstance(img, numpy.ndarray) is True :
+                img.flags.writeable = False
+
+                # Assets are never discarded, the identity of the array is
+                #  therefore a stable key to the mask.
+                #
+                _, ovly_mask = cv2.threshold(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 127, 255, cv2.THRESH_BINARY)
+
+                __asset_masks[id(img)] = ovly_mask
+
+            __assets[ifile] = img
+
+        return __assets[ifile]
+
+#
+# (END OF) ASSET CACHING ROUTINES
+#
+
+#
+# IMAGE ANALYSIS ROUTINES
+#
+
+# GRAY_THUMBNAIL
+# ====================
+#
+# Reduce an image to a small greyscale picture for cheap comparison between frames.
+#
+# @param img     A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object or bytes object containing
+#                 JPEG format image or a Frame object
+# @param size    A tuple of two integer elements of the width and height (in pixel)
+#                 of the reduced picture.
+#
+# @ret           A NumPy Array object of shape (height, width) containing 8-bit
+#                 greyscale image.
+#
+def gray_thumbnail(img, size = MOTION_SIZE) :
+    if img is not None and isinstance(img, Frame) is True :
+        img = img.array
+
+    if img is not None and isinstance(img, numpy.ndarray) is True :
+        # Area interpolation averages every source pixel, making the thumbnail
+        #  insensitive to sensor noise.
+        #
+        return cv2.cvtColor(cv2.resize(img, tuple(size), interpolation = cv2.INTER_AREA), cv2.COLOR_RGB2GRAY)
+    elif img is not None and isinstance(img, Image.Image) is True :
+        pilimg = img
+    elif img is not None and (type(img) is io.BytesIO or type(img) is bytes) :
+        if type(img) is bytes :
+            img = io.BytesIO(img)
+
+        img.seek(0)
+
+        pilimg = Image.open(img)
+
+        # JPEG decoder can scale down by a power of 2 while decoding.
+        #
+        pilimg.draft("L", tuple(size))
+    else :
+        raise TypeError
+
+    return numpy.asarray(pilimg.convert("L").resize(tuple(size), Image.BOX), dtype = numpy.uint8)
+
+# DHASH
+# ====================
+#
+# Compute the difference hash of an image, a perceptual hash that changes little for
+#  pictures looking alike. Each bit tells whether a pixel of a small greyscale copy of
+#  the image is brighter than its neighbour on the left. The number of bits differing
+#  between the hashes of two images, i.e., the Hamming distance, measures how much
+#  the images differ.
+#
+# @param img     A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object or bytes object containing
+#                 JPEG format image or a Frame object
+# @param bits    An integer of the number of rows and of comparisons per row.
+#
+# @ret           An integer of bits * bits bits.
+#
+def dhash(img, bits = 8) :
+    thumb = gray_thumbnail(img, (bits + 1, bits))
+
+    return int.from_bytes(numpy.packbits(thumb[:, 1:] > thumb[:, :-1]).tobytes(), "big")
+
+# MOTIONGATE
+# ====================
+#
+# A gate deciding whether a frame is worth being sent for identification. Frames
+#  are compared against a running average of earlier frames, i.e., the background
+#  of the scene, on small greyscale thumbnails. A frame passes when enough pixels
+#  depart from the background, or when no frame has passed for a heartbeat period
+#  so that a still scene is still looked at now and then.
+#
+# @param area    A float (0-1) of the minimum portion of pixels in motion.
+# @param delta   An integer (0-255) of the minimum brightness change of a pixel in
+#                 motion.
+# @param heartbeat A number of seconds after which a frame passes regardless.
+# @param rate    A float (0-1) of the weight of a new frame in the background.
+# @param size    A tuple of two integer elements of the thumbnail dimension.
+#
+class MotionGate :
+    def __init__(self, area = MOTION_AREA, delta = MOTION_DELTA, heartbeat = HEARTBEAT, rate = MOTION_RATE, size = MOTION_SIZE) :
+        for param in area, rate :
+            if param is not None and (type(param) is float or type(param) is int) :
+                if param < 0 or param > 1 :
+                    raise ValueError
+            else :
+                raise TypeError
+
+        if heartbeat is not None and (type(heartbeat) is float or type(heartbeat) is int) :
+            pass
+        else :
+            raise TypeError
+
+        self.area = area
+        self.delta = delta
+        self.heartbeat = heartbeat
+        self.rate = rate
+        self.size = size
+
+        self.background = None
+        self.motion = 0.0
+        self.passed = None
+
+    # CHECK
+    # ====================
+    #
+    # Compare a frame against the background and learn the frame into it.
+    #
+    # @param img     A PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object containing JPEG format image
+    # @param now     None or a number of seconds of the time of capture, defaults to
+    #                 the current time.
+    #
+    # @ret           A boolean value of whether the frame should be identified.
+    #
+    def check(self, img, now = None) :
+        thumb = gray_thumbnail(img, self.size).astype(numpy.float32)
+
+        if now is None :
+            now = time.time()
+
+        if self.background is None :
+            self.background = thumb
+            self.motion = 1.0
+        else :
+            self.motion = float(numpy.count_nonzero(cv2.absdiff(thumb, self.background) > self.delta)) / thumb.size
+
+            cv2.accumulateWeighted(thumb, self.background, self.rate)
+
+        if self.motion >= self.area or self.passed is None or now - self.passed >= self.heartbeat :
+            self.passed = now
+
+            return True
+        else :
+            return False
+
+    def __call__(self, img) :
+        return self.check(img)
+
+#
+# (END OF) IMAGE ANALYSIS ROUTINES
+#
+
+#
+# IMAGE PRESENTATION ROUTINES
+#
+
+# __GENERIC_OIMAGE
+# ====================
+#
+# Generic routine for handling image output to filesystem or display system.
+#
+# @param img     A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 or a Frame object to be output
+# @param ofile   None or a string of file location path for saving a JPEG image.
+#                 If the argument was passed with None, it is assumed the image
+#                 should be shown instead of stored in the filesystem and be
+#                 presented to user according to additional argument static_ofile
+# @param static  A boolean variable dictating when ofile is None, whether the image
+#         _ofile  should be presented to user as image (static) or video.
+#
+def __generic_oimage(img, ofile = None, static_ofile = True) :
+    if img is not None and isinstance(img, Frame) is True :
+        # The JPEG content of a frame is stored as is, e.g., the very content that
+        #  has been uploaded, without being encoded again.
+        #
+        if ofile is not None and type(ofile) is str and ofile.lower().endswith((".jpg", ".jpeg")) :
+            with open(ofile, "wb") as jpgfile :
+                jpgfile.write(img.jpeg)
+
+            return
+        else :
+            img = img.array
+
+    if img is not None and isinstance(img, Image.Image) is True :
+        pass
+    elif img is not None and isinstance(img, numpy.ndarray) is True :
+        pass
+    elif img is not None and isinstance(img, io.BytesIO) is True :
+        pass
+    else :
+        raise TypeError
+
+    if static_ofile is not None and type(static_ofile) is bool :
+        pass
+    else :
+        raise TypeError
+
+    if ofile is None :
+        if static_ofile is False :
+            if isinstance(img, Image.Image) is True :
+                cv2.imshow('Video', numpy.swapaxes(numpy.array(img.convert('RGB'), dtype=numpy.uint8).reshape((img.size[1], img.size[0], 3)), 0, 0)[:, :, ::-1])
+            elif isinstance(img, numpy.ndarray) is True :
+                cv2.imshow('Video', img[:, :, ::-1])
+            elif isinstance(img, io.BytesIO) is True :
+                img.seek(0)
+
+                pilimg = Image.open(img)
+
+                cv2.imshow('Video', numpy.swapaxes(numpy.array(pilimg.convert('RGB'), dtype=numpy.uint8).reshape((pilimg.size[1], pilimg.size[0], 3)), 0, 0)[:, :, ::-1])
+
+            # [REQUIRED] https://stackoverflow.com/a/22277285
+            cv2.waitKey(1)
+        else :
+            if isinstance(img, Image.Image) is True :
+                img.show(title = "Transient Processed Output")
+            elif isinstance(img, numpy.ndarray) is True :
+                Image.fromarray(img).show()
+            elif isinstance(img, io.BytesIO) is True :
+                img.seek(0)
+
+                Image.open(img).show()
+    elif ofile is not None and type(ofile) is str :
+        if isinstance(img, Image.Image) is True :
+            img.save(ofile)
+        elif isinstance(img, numpy.ndarray) is True :
+            Image.fromarray(img).save(ofile)
+        elif isinstance(img, io.BytesIO) is True :
+            img.seek(0)
+
+            Image.open(img).save(ofile)
+    else :
+        raise TypeError
+
+# REPLAY_VIDEO
+# ====================
+#
+# Routine for outputting a single video frame to the video window in graphical
+#  user interface.
+#
+# @param frame   A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 to be output to graphical user interface as a constituent frame
+#                 in the form of video
+#
+def replay_video(frame = None) :
+    ent = time.perf_counter()
+
+    __generic_oimage(frame, None, False)
+
+    DISPLAY_SECONDS.since(ent)
+
+# REPLAY_IMAGE
+# ====================
+#
+# Routine for outputting a picture in graphical user interface.
+#
+# @param image   A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 to be output to graphical user interface in the form of picture
+#
+def replay_image(image = None) :
+    __generic_oimage(image, None, True)
+
+# SAVE_IMAGE
+# ====================
+#
+# Storing an image output to local filesystem.
+#
+# @param image   A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 to be output
+# @param ofile   A string of file location path for saving a JPEG image.
+#
+def save_image(image, ofile) :
+    __generic_oimage(image, ofile)
+
+#
+# (END OF) IMAGE PRESENTATION ROUTINES
+#
+
+#
+# IMAGE ACQUISITION ROUTINES
+#
+
+import math
+
+# FRAMEPOOL
+# ====================
+#
+# A fixed set of preallocated frame buffers that the camera captures into, sparing
+#  an allocation of a whole frame for every video frame captured. A buffer handed
+#  out by acquire() is held by one reference. Each further holder, e.g., another
+#  stage of a pipeline, calls retain() and every holder calls release() when done
+#  with it. When the last reference is released, the buffer is reused for a newer
+#  frame, therefore, a buffer must not be read after being released.
+#
+# Should every buffer be in use, a buffer outside of the pool is allocated instead,
+#  so capture never waits for a slow holder.
+#
+# @param count   An integer of the number of buffers in the pool.
+#
+class FramePool :
+    def __init__(self, count = POOL_SIZE) :
+        if count is not None and type(count) is int :
+            if count < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.count = count
+        self.shape = None
+        self.refs = dict()
+        self.free = []
+        self.lock = threading.Lock()
+
+        self.misses = 0
+
+    # ACQUIRE
+    # ====================
+    #
+    # Hand out a free buffer of the given shape. All buffers are reallocated should
+    #  the shape change, e.g., by resolution_rescale(), buffers of the former shape
+    #  still held are left to the garbage collector.
+    #
+    # @param shape   A tuple of the dimension of the NumPy Array object.
+    #
+    # @ret           A NumPy Array object of 8-bit elements of the given shape.
+    #
+    def acquire(self, shape) :
+        with self.lock :
+            if self.shape != shape :
+                self.shape = shape
+                self.refs = dict()
+                self.free = [numpy.empty(shape, dtype=numpy.uint8) for _ in range(self.count)]
+
+            if len(self.free) == 0 :
+                self.misses += 1
+
+                return numpy.empty(shape, dtype=numpy.uint8)
+
+            buf = self.free.pop()
+
+            self.refs[id(buf)] = [buf, 1]
+
+            return buf
+
+    # RETAIN
+    # ====================
+    #
+    # Add a reference to a buffer. Objects not handed out by the pool are ignored.
+    #
+    # @param buf     A frame, e.g., as returned by record_video() or record_frame().
+    #
+    def retain(self, buf) :
+        if isinstance(buf, Frame) is True :
+            buf = buf.pixels
+
+        with self.lock :
+            entry = self.refs.get(id(buf))
+
+            if entry is not None and entry[0] is buf :
+                entry[1] += 1
+
+    # RELEASE
+    # ====================
+    #
+    # Drop a reference to a buffer, returning it to the pool upon the last one.
+    #  Objects not handed out by the pool are ignored.
+    #
+    # @param buf     A frame, e.g., as returned by record_video() or record_frame().
+    #
+    def release(self, buf) :
+        if isinstance(buf, Frame) is True :
+            buf = buf.pixels
+
+        with self.lock :
+            entry = self.refs.get(id(buf))
+
+            if entry is not None and entry[0] is buf :
+                entry[1] -= 1
+
+                if entry[1] == 0 :
+                    del self.refs[id(buf)]
+
+                    self.free.append(buf)
+
+# Video frames captured into NumPy Array objects are taken from this pool.
+#
+FRAME_POOL = FramePool()
+
+# CAMERA
+# ====================
+#
+# A camera with a state of its own, i.e., its resolution, the format of frames
+#  handed out, the pool of buffers frames are captured into, the stream kept open
+#  for video frames and the capture source frames are taken from, if any. Cameras
+#  are independent of each other, several of them are used side by side from one
+#  program, e.g., by a pipeline.MultiPipeline, and rescaling one leaves the others
+#  as they are. Captures of a camera are serialised by a lock of its own.
+#
+# The routines record_video(), record_image(), record_frame(), stream_video(),
+#  set_source() and resolution_rescale() of this module act on CAMERA, the camera
+#  of the module.
+#
+# @param width   An integer of the horizontal resolution (in pixel) of the camera.
+# @param height  An integer of the vertical resolution (in pixel) of the camera.
+# @param scale   An integer of the down scale factor of frames captured.
+# @param format  A string of the object type frames and pictures are handed out in,
+#                 i.e., 1) "rgb" for NumPy Array objects containing RGB format image,
+#                 2) "jpeg" for BytesIO streaming objects containing JPEG format
+#                 image and 3) "pil" for PIL image objects.
+# @param source  None or a capture source, see set_source(). If None is passed, the
+#                 Raspberry Pi camera is used.
+# @param camera_num An integer of the Raspberry Pi camera port, e.g., 1 for the
+#                 second camera of a Compute Module.
+# @param pool    None or a FramePool object video frames are captured into. If None
+#                 is passed, the camera has a pool of its own.
+# @param hardware_jpeg A boolean variable of whether video frames of RGB format are
+#                 encoded into JPEG by the camera hardware as well, see record_frame().
+#
+class Camera :
+    __idents = itertools.count(1)
+
+    def __init__(self, width = CAMH, height = CAMV, scale = SCALE, format = "rgb", source = None, camera_num = 0, pool = None, hardware_jpeg = False) :
+        if width is not None and type(width) is int and height is not None and type(height) is int and scale is not None and type(scale) is int :
+            if width <= 0 or height <= 0 or scale <= 0 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        if format is not None and type(format) is str :
+            if format != "rgb" and format != "jpeg" and format != "pil" :
+                raise ValueError
+        else :
+            raise TypeError
+
+        if pool is None or isinstance(pool, FramePool) is True :
+            pass
+        else :
+            raise TypeError
+
+        if type(hardware_jpeg) is not bool :
+            raise TypeError
+
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.format = format
+        self.camera_num = camera_num
+        self.pool = pool if pool is not None else FramePool()
+        self.hardware_jpeg = hardware_jpeg
+
+        self.inst = None
+        self.stream = None
+        self.encoder = None
+        self.source = None
+        self.lock = threading.RLock()
+
+        if source is not None :
+            self.set_source(source)
+
+    # RESOLUTION
+    # ====================
+    #
+    # @ret           A tuple of the width and height (in pixel) of frames captured.
+    #
+    @property
+    def resolution(self) :
+        return (int(self.width / self.scale), int(self.height / self.scale))
+
+    # __OPEN
+    # ====================
+    #
+    # Set up the Raspberry Pi camera upon first use. The picamera package is imported
+    #  here rather than with the module, so the module is usable on machines without
+    #  the camera, with frames taken from another source set by set_source().
+    #
+    # @ret           The picamera.PiCamera object of the camera.
+    #
+    def __open(self) :
+        with self.lock :
+            if self.inst is None :
+                import picamera
+
+                self.inst = picamera.PiCamera(camera_num = self.camera_num)
+                self.inst.resolution = self.resolution
+
+            return self.inst
+
+    # SET_SOURCE
+    # ====================
+    #
+    # Take video frames and pictures from a capture source other than the Raspberry
+    #  Pi camera, e.g., a USB webcam, a video file, a folder of images or synthetic
+    #  frames as offered by the `source' module.
+    #
+    # @param source  None or an object with methods read(), returning a video frame
+    #                 as a NumPy Array object containing RGB format image or None once
+    #                 the source is exhausted, snapshot(), returning a picture as such,
+    #                 and close(). A source with a pool attribute is set to fill the
+    #                 buffers of the camera pool. If None is passed, the Raspberry Pi
+    #                 camera is used again.
+    #
+    def set_source(self, source = None) :
+        if source is None or (callable(getattr(source, "read", None)) and callable(getattr(source, "snapshot", None))) :
+            pass
+        else :
+            raise TypeError
+
+        with self.lock :
+            if source is not None :
+                self.stop_stream()
+
+                if hasattr(source, "pool") is True :
+                    source.pool = self.pool
+
+            if self.source is not None and self.source is not source :
+                self.source.close()
+
+            self.source = source
+
+    # __FROM_SOURCE
+    # ====================
+    #
+    # Present a frame of a capture source in the format of the camera.
+    #
+    def __from_source(self, pixels) :
+        if pixels is None or self.format == "rgb" :
+            return pixels
+
+        # Only NumPy Array objects are handed out from the pool, the buffer is given
+        #  back once the frame is converted.
+        #
+        pilimg = Image.fromarray(pixels.copy())
+
+        self.pool.release(pixels)
+
+        if self.format == "pil" :
+            return pilimg
+        else :
+            ret = io.BytesIO()
+
+            pilimg.save(ret, "JPEG")
+
+            return ret
+
+    # __CAPTURE
+    # ====================
+    #
+    # Capture an image by the camera, as a single picture or as a single frame of
+    #  video, in the format of the camera.
+    #
+    # @param static  A boolean variable of whether the image is acquired as a picture
+    #                 (static) or as a frame in a video.
+    #
+    def __capture(self, static = True) :
+        if static is not None and type(static) is bool :
+            pass
+        else :
+            raise TypeError
+
+        # The camera is shared by the capture stage of a pipeline and any other
+        #  thread taking pictures, e.g., upon an alert. Captures are serialised.
+        #
+        with self.lock :
+            if self.source is not None :
+                return self.__from_source(self.source.read() if static is False else self.source.snapshot())
+
+            self.__open()
+
+            # A picture is taken from the still port, at which the video port is not
+            #  to be held by the stream behind record_video().
+            #
+            if static is True :
+                self.stop_stream()
+
+            if self.format != "rgb" :
+                # NO DIFFERENCE IN PERFORMANCE USING BYTESIO VERSUS MKTIME BY EXPERIMENT
+                #  FOR RESOLUTION OF (480, 272). PERFORMANCE IMPACT FOR USING BYTESIO FOR
+                #  RESOLUTION OF (1988, 1020)
+                #
+                if self.format == "pil" :
+                    ret = tempfile.mktemp()
+
+                    # use_video_port = True can make 10 times frame rate boost
+                    # (site: https://pyimagesearch.com/2015/03/30/accessing-the-raspberry-pi-camera-with-opencv-and-python/)
+                    #
+                    self.inst.capture(ret, format="jpeg", use_video_port = (static is False))
+
+                    return Image.open(ret).convert(mode = "RGB")
+                else :
+                    ret = io.BytesIO()
+
+                    self.inst.capture(ret, format="jpeg", use_video_port = (static is False))
+
+                return ret
+            else :
+                # [WARNING] Camera resolution is aligned to 16 pixel and is automatically uplifted by the resolution set step.
+                #  If the container is not uplifted to equivalent size, segmentation fault will occur.
+                RESOALIGN = 16
+
+                shape = (int(math.ceil(self.height / self.scale / RESOALIGN) * RESOALIGN), int(math.ceil(self.width / self.scale / RESOALIGN) * RESOALIGN), 3)
+
+                # Pictures are usually kept by the caller, e.g., to be saved, only
+                #  video frames are captured into pooled buffers.
+                #
+                if static is False :
+                    ret = self.pool.acquire(shape)
+                else :
+                    ret = numpy.empty(shape, dtype=numpy.uint8)
+
+                self.inst.capture(ret, format="rgb", use_video_port = (static is False))
+
+                return ret
+
+    # RECORD_VIDEO
+    # ====================
+    #
+    # @ret           A video frame captured by the camera in the format of the camera.
+    #                 A NumPy Array object is a buffer of the camera pool, to be given
+    #                 back by pool.release() once the frame is no longer needed. None
+    #                 is returned once the capture source of the camera is exhausted.
+    #
+    def record_video(self) :
+        # Frames are taken from a stream kept open in between calls, the video port
+        #  is not set up and torn down for every frame.
+        #
+        ent = time.perf_counter()
+
+        with self.lock :
+            if self.source is not None :
+                ret = self.__from_source(self.source.read())
+            else :
+                if self.stream is None :
+                    self.stream = self.stream_video()
+
+                ret = next(self.stream)
+
+        if ret is not None :
+            CAPTURE_SECONDS.since(ent)
+            CAPTURE_FRAMES.inc()
+
+        return ret
+
+    # RECORD_IMAGE
+    # ====================
+    #
+    # @ret           A picture taken by the camera in the format of the camera, not
+    #                 taken from the camera pool.
+    #
+    def record_image(self) :
+        return self.__capture(True)
+
+    # RECORD_FRAME
+    # ====================
+    #
+    # Capture a video frame, as record_video() does, held in a Frame object. Every
+    #  frame is given an identity, increasing from frame to frame across cameras,
+    #  and the time it was captured, by which it is followed by `tracing'.
+    #
+    # With hardware_jpeg set, the frame holds the JPEG content encoded by the camera
+    #  hardware next to the pixels, so the frame is uploaded and kept as evidence
+    #  without the pixels ever being encoded by the processor.
+    #
+    # @ret           A Frame object of the captured video frame, or None once the
+    #                 capture source of the camera is exhausted.
+    #
+    def record_frame(self) :
+        img = self.record_video()
+
+        if img is None :
+            return None
+
+        stamp = time.time()
+        encoder = self.encoder
+
+        if encoder is not None and self.source is None and isinstance(img, numpy.ndarray) is True :
+            # The encoder runs at the frame rate of the camera as the video port
+            #  does, the JPEG content of the frame is due within a frame interval.
+            #  Should it not arrive in time, the frame is left to be encoded from
+            #  its own pixels.
+            #
+            jpeg = encoder.take(1.0 / max(float(self.inst.framerate), 1.0))
+        else :
+            jpeg = None
+
+        return Frame(img, ident = next(self.__idents), stamp = stamp, jpeg = jpeg)
+
+    # STOP_STREAM
+    # ====================
+    #
+    # Close the stream behind record_video(), releasing the video port. The stream
+    #  is reopened by the next call to record_video().
+    #
+    def stop_stream(self) :
+        with self.lock :
+            if self.stream is not None :
+                self.stream.close()
+
+                self.stream = None
+
+    # __FRAMEOUTPUT
+    # ====================
+    #
+    # A file-like object receiving frames written by the camera, into a NumPy Array
+    #  object for RGB format or a BytesIO object for JPEG format. The target is
+    #  replaced before every frame so every frame is written into a buffer of its own.
+    #
+    class __FrameOutput :
+        def __init__(self) :
+            self.target = None
+            self.offset = 0
+
+        def reset(self, target) :
+            self.target = target
+            self.offset = 0
+
+        def write(self, data) :
+            if isinstance(self.target, numpy.ndarray) is True :
+                flat = self.target.reshape(-1)
+
+                # Padding rows beyond the buffer, if any, are discarded.
+                #
+                size = min(len(data), flat.size - self.offset)
+
+                flat[self.offset : self.offset + size] = numpy.frombuffer(data, dtype=numpy.uint8, count=size)
+
+                self.offset += size
+            else :
+                self.target.write(data)
+
+            return len(data)
+
+        def flush(self) :
+            pass
+
+    # __JPEGOUTPUT
+    # ====================
+    #
+    # A file-like object receiving the Motion JPEG stream encoded by the camera
+    #  hardware, keeping the latest complete JPEG image. An image written in several
+    #  parts is put together from its start of image marker to its end of image
+    #  marker.
+    #
+    class __JpegOutput :
+        def __init__(self) :
+            self.buffer = bytearray()
+            self.latest = None
+            self.count = 0
+            self.taken = 0
+            self.ready = threading.Condition()
+
+        def write(self, data) :
+            if data[:2] == b"\xff\xd8" :
+                self.buffer = bytearray()
+
+            self.buffer += data
+
+            if data[-2:] == b"\xff\xd9" and self.buffer[:2] == b"\xff\xd8" :
+                with self.ready :
+                    self.latest = bytes(self.buffer)
+                    self.count += 1
+
+                    self.ready.notify_all()
+
+                self.buffer = bytearray()
+
+            return len(data)
+
+        def flush(self) :
+            pass
+
+        # TAKE
+        # ====================
+        #
+        # @param timeout A number of seconds to wait for an image newer than the one
+        #                 taken last time.
+        #
+        # @ret           A bytes object of the latest JPEG image, or None if no image
+        #                 newer than the one taken last time arrives in time. An older
+        #                 image belongs to an earlier frame and is not handed out.
+        #
+        def take(self, timeout) :
+            with self.ready :
+                if self.ready.wait_for(lambda : self.count > self.taken, timeout) is not True :
+                    return None
+
+                self.taken = self.count
+
+                return self.latest
+
+    # STREAM_VIDEO
+    # ====================
+    #
+    # Generator capturing video frames back to back by the Raspberry Pi camera. The
+    #  camera video port and its encoder are set up once for the whole stream through
+    #  picamera continuous capture, instead of once per frame as capture() does,
+    #  raising the frame rate that can be reached.
+    #
+    # @param format  None or a string of the frame format, as the format of the
+    #                 camera. If None is passed, the format of the camera is used.
+    # @param resolution None or a tuple of two integer elements of the frame width
+    #                 and height. Frames are resized by the camera hardware. If None
+    #                 is passed, frames are of the camera resolution.
+    #
+    # With hardware_jpeg set, frames of RGB format are encoded into Motion JPEG by
+    #  the camera hardware as well, on splitter port JPEG_PORT while the frames are
+    #  captured from splitter port 0, for the time the stream is open. The latest
+    #  JPEG image is taken by record_frame().
+    #
+    # @ret           A generator yielding captured frames until it is closed.
+    #
+    def stream_video(self, format = None, resolution = None) :
+        if format is None :
+            format = self.format
+        elif type(format) is str :
+            if format != "rgb" and format != "jpeg" and format != "pil" :
+                raise ValueError
+        else :
+            raise TypeError
+
+        if resolution is not None and ((type(resolution) is not tuple and type(resolution) is not list) or len(resolution) != 2) :
+            raise TypeError
+
+        with self.lock :
+            self.__open()
+
+            if resolution is None :
+                resolution = tuple(self.inst.resolution)
+
+            # [WARNING] Unencoded frames from the video port are padded to 32 pixels
+            #  in width and 16 pixels in height.
+            #
+            shape = (int(math.ceil(resolution[1] / 16.0) * 16), int(math.ceil(resolution[0] / 32.0) * 32), 3)
+
+            output = self.__FrameOutput()
+
+            frames = self.inst.capture_continuous(output, format = ("rgb" if format == "rgb" else "jpeg"), use_video_port = True, resize = (None if tuple(resolution) == tuple(self.inst.resolution) else tuple(resolution)))
+
+            encoder = self.__JpegOutput() if format == "rgb" and self.hardware_jpeg is True else None
+
+        return self.__stream(frames, output, format, shape, encoder)
+
+    def __stream(self, frames, output, format, shape, encoder) :
+        try :
+            # The JPEG images are of the padded dimension of the frames, so the
+            #  positions of objects identified on an image hold for the frame.
+            #
+            if encoder is not None :
+                with self.lock :
+                    self.inst.start_recording(encoder, format = "mjpeg", splitter_port = JPEG_PORT, resize = (shape[1], shape[0]), quality = JPEG_QUALITY)
+
+                    self.encoder = encoder
+
+            while True :
+                if format == "rgb" :
+                    output.reset(self.pool.acquire(shape))
+                else :
+                    output.reset(io.BytesIO())
+
+                with self.lock :
+                    next(frames)
+
+                if format == "pil" :
+                    output.target.seek(0)
+
+                    yield Image.open(output.target).convert(mode = "RGB")
+                else :
+                    yield output.target
+        finally :
+            with self.lock :
+                frames.close()
+
+                if encoder is not None and self.encoder is encoder :
+                    self.inst.stop_recording(splitter_port = JPEG_PORT)
+
+                    self.encoder = None
+
+    # RESCALE
+    # ====================
+    #
+    # Change the down scale factor of frames captured by the camera.
+    #
+    # @param factor  An integer of the down scale factor.
+    #
+    def rescale(self, factor = 4) :
+        if factor is not None and type(factor) is int :
+            if factor > 0 :
+                with self.lock :
+                    self.scale = factor
+
+                    # Resolution cannot be changed while the video port is in use.
+                    #
+                    self.stop_stream()
+
+                    if self.inst is not None :
+                        self.inst.resolution = self.resolution
+            else :
+                raise ValueError
+        else :
+            raise TypeError
+
+    # CLOSE
+    # ====================
+    #
+    # Release the Raspberry Pi camera and the capture source of the camera.
+    #
+    def close(self) :
+        with self.lock :
+            self.stop_stream()
+
+            if self.source is not None :
+                self.source.close()
+
+                self.source = None
+
+            if self.inst is not None :
+                self.inst.close()
+
+                self.inst = None
+
+# The camera of the module, acted on by the routines below. Its video frames are
+#  captured into FRAME_POOL.
+#
+CAMERA = Camera(pool = FRAME_POOL)
+
+# SET_SOURCE
+# ====================
+#
+# Take video frames and pictures of CAMERA from a capture source other than the
+#  local camera, e.g., a USB webcam, a video file, a folder of images or synthetic
+#  frames as offered by the `source' module. See Camera.set_source().
+#
+# @param source  None or a capture source. If None is passed, the local camera is
+#                 used again.
+#
+def set_source(source = None) :
+    CAMERA.set_source(source)
+
+# __GENERIC_IIMAGE
+# ====================
+#
+# Generic routine for handling image input from filesystem or image acquisition device.
+#  There is no particular difference in acquiring an image input as single image or
+#  as a single frame in a video.
+#
+# @param ifile   None or a string of file location path for retrieving a JPEG image.
+#                 If the argument was passed with None, it is assumed the image
+#                 should be acquired by CAMERA and the mode of capture as a single
+#                 frame of video or picture should be indicated by the extra
+#                 argument static_ifile
+# @param static  A boolean variable dictating when ifile is None, whether the image
+#         _ifile  should be acquired as image (static) or as a frame in a video.
+#
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 captured. The exact object type returned is to be determined by
+#                 the format of CAMERA, i.e., "rgb" for a NumPy Array, "jpeg" for an
+#                 in-memory BytesIO object and "pil" for a PIL image object.
+#
+def __generic_iimage(ifile = None, static_ifile = True) :
+    if ifile is not None and type(ifile) is str :
+        if CAMERA.format != "rgb" :
+            if CAMERA.format == "pil" :
+                return Image.open(ifile).convert(mode = "RGB")
+            else :
+                ret = io.BytesIO()
+
+                ret.write(open(ifile, "rb").read())
+
+                return ret
+        else :
+            img = Image.open(ifile)
+
+            ret = numpy.swapaxes(numpy.array(img.convert('RGB'), dtype=numpy.uint8).reshape((img.size[1], img.size[0], 3)), 0, 0)
+
+            return ret
+    elif ifile is None :
+        if static_ifile is not None and type(static_ifile) is bool :
+            return CAMERA.record_image() if static_ifile is True else CAMERA.record_video()
+        else :
+            raise TypeError
+
+# RECORD_VIDEO
+# ====================
+#
+# Routine for capturing a single video frame of a video stream by the local
+#  camera.
+#
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 captured by the local camera as a constituent frame in a video
+#                 stream.  The exact object type returned is to be determined by
+#                 the format of CAMERA. A NumPy Array object is a buffer of
+#                 FRAME_POOL, to be given back by FRAME_POOL.release() once the
+#                 frame is no longer needed. Frames are taken from the capture
+#                 source set by set_source(), if any, instead, and None is returned
+#                 once the source is exhausted.
+#
+def record_video() :
+    return CAMERA.record_video()
+
+# STREAM_VIDEO
+# ====================
+#
+# Generator capturing video frames back to back by the local camera. See
+#  Camera.stream_video().
+#
+# @param format  None or a string of the frame format. Supported options are
+#                 1) "rgb" for NumPy Array objects containing RGB format image
+#                 taken from FRAME_POOL, 2) "jpeg" for BytesIO streaming objects
+#                 containing JPEG format image and 3) "pil" for PIL image objects.
+#                 If None is passed, the format follows the format of CAMERA as
+#                 record_video() does.
+# @param resolution None or a tuple of two integer elements of the frame width and
+#                 height. Frames are resized by the camera hardware. If None is
+#                 passed, frames are of the camera resolution.
+#
+# @ret           A generator yielding captured frames until it is closed.
+#
+def stream_video(format = None, resolution = None) :
+    return CAMERA.stream_video(format, resolution)
+
+# RECORD_IMAGE
+#
+# ====================
+#
+# Routine for capturing a picture by the local camera.
+#
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 captured by the local camera as a picture. The exact object type
+#                 returned is to be determined by the format of CAMERA. The picture
+#                 is taken from the capture source set by set_source(), if any,
+#                 instead.
+#
+def record_image() :
+    return CAMERA.record_image()
+
+# RECORD_FRAME
+# ====================
+#
+# Routine for capturing a single video frame, as record_video() does, held in a
+#  Frame object. Consumers of the frame share the representations they need,
+#  e.g., the JPEG content encoded for upload is reused for storage.
+#
+# Every frame is given an identity, increasing from frame to frame, and the time
+#  it was captured, by which it is followed through the stages by `tracing'.
+#
+# @ret           A Frame object of the captured video frame. Its NumPy Array, if
+#                 canonical, is a buffer of FRAME_POOL as for record_video(), or
+#                 None once the capture source set by set_source() is exhausted.
+#
+def record_frame() :
+    return CAMERA.record_frame()
+
+# LOAD_IMAGE
+# ====================
+#
+# Retrieving an image from the local filesystem.
+#
+# @param ifile   A string of file location path for retrieving a JPEG image.
+#
+# @ret           A PIL image object or NumPy Array object containing RGB format
+#                 image or a BytesIO streaming object containing JPEG format image
+#                 loaded from the local filesystem.  The exact object type returned is
+#                 to be determined by the format of CAMERA.
+#
+def load_image(ifile) :
+    return __generic_iimage(ifile)
+
+#
+# (END OF) IMAGE ACQUISITION ROUTINES
+#
+
+#
+# HARDWARE MANIPULATION ROUTINES
+#
+
+# RESOLUTION_RESCALE
+# ====================
+#
+# Change the down scale factor of frames captured by CAMERA. Other cameras are
+#  left as they are.
+#
+# @param factor  An integer of the down scale factor.
+#
+def resolution_rescale(factor = 4) :
+    CAMERA.rescale(factor)
+
+#
+# (END OF) HARDWARE MANIPULATION ROUTINES
+#
+
+#
+# USER ROUTINES
 #
-# USER ROUTINES
-#
 
 # MAIN
 # ====================
@@ -783,12 +2300,20 @@ if __name__ == "__main__" :
 
     signal.signal(signal.SIGINT, __exit)
 
-    SCALE = 2
+    resolution_rescale(2)
 
     agg = 0
     cnt = 0
     ent = time.time()
 
+    # The logo is loaded and drawn into its layer once, the time is drawn again
+    #  only when the minute changes.
+    #
+    clock = DynamicText(anchor = (20, 20), colour = (255, 255, 255))
+
+    logo = OverlayLayer()
+    logo.add_image(load_asset(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
+
     while True :
         # Base layer (Master) of the video
         #
@@ -796,17 +2321,21 @@ if __name__ == "__main__" :
 
         # Layer with text overlayed on the previous frame layer, i.e., Base Layer.
         #
-        layer_text = overlay_text(layer_base, time.strftime("%H:%M"), anchor = (20, 20), colour = (255, 255, 255))
+        layer_text = clock.blend(layer_base, time.strftime("%H:%M"))
 
         # Layer with an. image overlayed on the previous frame layers, i.e., Text Layer
         #. + Base Layer.
         #
-        layer_logo = overlay_image(layer_text, load_image(BASE_PATH + "/TELI_Logo-24px.jpg"), anchor = (-20, 5))
+        layer_logo = logo.blend(layer_text, inplace = True)
 
         # Leading the finished frame with all overlays to output display.
         #
         replay_video(layer_logo)
 
+        # Give the captured frame back for capturing a later frame into.
+        #
+        FRAME_POOL.release(layer_base)
+
         cnt += 1
 
         end = time.time()
@@ -0,0 +1,358 @@
+#
+# Name: incident.py
+#
+# Description: Library turning objects identified frame by frame into incidents.
+#  An object seen in a number of consecutive samples opens an incident, the same
+#  object seen again afterwards belongs to the incident already open and an
+#  incident closes once the object has gone for a number of samples. Alerts are
+#  raised once per incident instead of once per object per frame.
+#
+
+import time, itertools, math
+
+# PARAMETERS
+# ====================
+#
+OPEN_HITS = 2              # NUMBER OF CONSECUTIVE SAMPLES AN OBJECT IS SEEN IN TO OPEN AN INCIDENT
+CLOSE_MISSES = 3           # NUMBER OF CONSECUTIVE SAMPLES AN OBJECT IS MISSING FROM TO CLOSE AN INCIDENT
+COOLDOWN = 30              # PERIOD (IN SECOND) A CLOSED INCIDENT MAY BE RESUMED INSTEAD OF A NEW ONE OPENED
+IOU_MATCH = 0.3            # MINIMUM INTERSECTION OVER UNION (0-1) OF BOXES OF THE SAME OBJECT
+REACH = 1.5                # MAXIMUM DISTANCE (IN BOX SIZE) BETWEEN CENTRES OF BOXES OF THE SAME OBJECT
+
+#
+# INCIDENT ROUTINES
+#
+
+# INCIDENT
+# ====================
+#
+# An object followed from sample to sample, open as an incident once it has been
+#  seen long enough.
+#
+# @param ident   An integer identifying the incident.
+# @param kind    A string of the kind of the object, e.g., "Knife".
+# @param box     A tuple of the left, top, right and bottom coordinates of the object.
+# @param obj     The object identified, as returned from Google Vision API.
+# @param now     A number of seconds of the time the object is first seen.
+#
+class Incident :
+    def __init__(self, ident, kind, box, obj, now) :
+        self.ident = ident
+        self.kind = kind
+        self.box = box
+        self.obj = obj
+
+        self.hits = 1
+        self.misses = 0
+        self.seen = 1
+
+        self.first = now
+        self.last = now
+        self.opened = None
+        self.closed = None
+
+# INCIDENTENGINE
+# ====================
+#
+# An engine following objects of interest across samples and reporting incidents
+#  opening and closing. Objects in a sample are matched to the objects followed
+#  so far of the same kind by the overlap of their boxes, i.e., intersection over
+#  union, greater overlaps first, so two objects of a kind in a frame are followed
+#  apart and one object over many frames is followed as one. Samples are taken
+#  up to seconds apart, an object moving in between may overlap its earlier box
+#  little or not at all. Objects and followed objects left unmatched are matched
+#  by the distance between the centres of their boxes, nearest first, as long as
+#  it is within reach times the size of the boxes.
+#
+# Hysteresis keeps an incident from flickering with the object detection. It takes
+#  open_hits consecutive samples to open an incident and close_misses consecutive
+#  samples without the object to close it. An incident closed no longer than
+#  cooldown seconds ago is resumed silently by an object of its kind found where
+#  the incident was last seen, i.e., overlapping or within reach of its last box,
+#  instead of being reported as a new incident. An object of the kind elsewhere
+#  is a new incident.
+#
+# @param kinds   None or a dictionary mapping the names of objects of interest to
+#                 their kinds, e.g., {"Kitchen knife" : "Knife", "Knife" : "Knife"}.
+#                 If None is passed, every object is of interest and its name is
+#                 its kind.
+# @param open_hits An integer, or a dictionary mapping kinds to integers, of the
+#                 consecutive samples needed to open an incident.
+# @param close_misses An integer, or a dictionary mapping kinds to integers, of the
+#                 consecutive samples without the object needed to close an incident.
+# @param cooldown A number of seconds a closed incident may be resumed within.
+# @param iou     A float (0-1) of the minimum overlap of boxes of the same object.
+# @param norm    A boolean variable informing of the engine whether the positions of
+#                 objects are normalised against the frame dimension, as objects
+#                 found by "object" detection, or are absolute pixel positions, as
+#                 faces found by "face" detection.
+# @param reach   A number of the maximum distance between centres of boxes of the
+#                 same object, in sizes of the boxes, i.e., the longer side of the
+#                 larger box.
+#
+class IncidentEngine :
+    def __init__(self, kinds = None, open_hits = OPEN_HITS, close_misses = CLOSE_MISSES, cooldown = COOLDOWN, iou = IOU_MATCH, norm = True, reach = REACH) :
+        if kinds is None or type(kinds) is dict :
+            pass
+        else :
+            raise TypeError
+
+        for param in open_hits, close_misses :
+            for count in (param.values() if type(param) is dict else [param]) :
+                if count is not None and type(count) is int :
+                    if count < 1 :
+                        raise ValueError
+                else :
+                    raise TypeError
+
+        if cooldown is not None and (type(cooldown) is float or type(cooldown) is int) and iou is not None and (type(iou) is float or type(iou) is int) :
+            if cooldown < 0 or iou < 0 or iou > 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        if norm is not None and type(norm) is bool :
+            pass
+        else :
+            raise TypeError
+
+        if reach is not None and (type(reach) is float or type(reach) is int) :
+            if reach < 0 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.kinds = kinds
+        self.open_hits = open_hits
+        self.close_misses = close_misses
+        self.cooldown = cooldown
+        self.iou = iou
+        self.norm = norm
+        self.reach = reach
+
+        self.tracks = []
+        self.closed = []
+        self.idents = itertools.count(1)
+
+    # __THRESHOLD
+    # ====================
+    #
+    # Look up a hysteresis threshold of a kind, or the default for kinds not listed.
+    #
+    def __threshold(self, param, kind, default) :
+        if type(param) is dict :
+            return param.get(kind, default)
+        else :
+            return param
+
+    # __BOX
+    # ====================
+    #
+    # Bounding rectangle of the bounding polygon of an object.
+    #
+    def __box(self, obj) :
+        if self.norm is True :
+            vertices = [(vertex.x, vertex.y) for vertex in obj.bounding_poly.normalized_vertices]
+        else :
+            vertices = [(vertex.x, vertex.y) for vertex in obj.bounding_poly.vertices]
+
+        if len(vertices) == 0 :
+            return (0, 0, 0, 0)
+
+        return (min([x for x, _ in vertices]), min([y for _, y in vertices]), max([x for x, _ in vertices]), max([y for _, y in vertices]))
+
+    # __FOLLOW
+    # ====================
+    #
+    # Update followed objects with the objects paired up with them, the pairs ranked
+    #  first taken first. Objects and followed objects paired already are skipped.
+    #
+    # @param pairs   A list of tuples of a number ranking the pair, lower first, the
+    #                 index of the object in detections and the followed object.
+    #
+    def __follow(self, pairs, detections, matched, updated, now) :
+        pairs.sort(key = lambda pair : pair[0])
+
+        for _, i, track in pairs :
+            if i in matched or id(track) in updated :
+                continue
+
+            matched.add(i)
+            updated.add(id(track))
+
+            _, track.box, track.obj = detections[i]
+
+            track.hits += 1
+            track.misses = 0
+            track.seen += 1
+            track.last = now
+
+    # ACTIVE
+    # ====================
+    #
+    # @ret           A list of Incident objects of the incidents open.
+    #
+    @property
+    def active(self) :
+        return [track for track in self.tracks if track.opened is not None]
+
+    # UPDATE
+    # ====================
+    #
+    # Account for the objects identified in a sample.
+    #
+    # @param objs    A list of objects found by Google Vision API, as in the format
+    #                 returned from Google Vision API
+    # @param now     None or a number of seconds of the time of the sample, defaults
+    #                 to the current time.
+    #
+    # @ret           A list of tuples of a string of the event, i.e., "open" or
+    #                 "close", and the Incident object the event is about, in the
+    #                 order the events took place.
+    #
+    def update(self, objs, now = None) :
+        if now is None :
+            now = time.time()
+
+        events = []
+
+        detections = []
+
+        for obj in objs :
+            if self.kinds is None :
+                kind = obj.name
+            elif obj.name in self.kinds :
+                kind = self.kinds[obj.name]
+            else :
+                continue
+
+            detections.append((kind, self.__box(obj), obj))
+
+        # Pair up objects and followed objects of the same kind by overlap, greatest
+        #  overlap first.
+        #
+        matched = set()
+        updated = set()
+
+        pairs = []
+
+        for i, (kind, box, _) in enumerate(detections) :
+            for track in self.tracks :
+                if track.kind == kind :
+                    overlap = iou(box, track.box)
+
+                    if overlap >= self.iou :
+                        pairs.append((-overlap, i, track))
+
+        self.__follow(pairs, detections, matched, updated, now)
+
+        # Pair up those left by the distance between their boxes, nearest first.
+        #
+        pairs = []
+
+        for i, (kind, box, _) in enumerate(detections) :
+            for track in self.tracks :
+                if track.kind == kind and i not in matched and id(track) not in updated :
+                    apart = distance(box, track.box)
+
+                    if apart <= self.reach :
+                        pairs.append((apart, i, track))
+
+        self.__follow(pairs, detections, matched, updated, now)
+
+        for track in list(self.tracks) :
+            if id(track) in updated :
+                continue
+
+            track.hits = 0
+            track.misses += 1
+
+            if track.opened is None :
+                # An object not yet open as an incident has to be seen in
+                #  consecutive samples, a miss sets it back to the start.
+                #
+                self.tracks.remove(track)
+            elif track.misses >= self.__threshold(self.close_misses, track.kind, CLOSE_MISSES) :
+                track.closed = now
+
+                self.tracks.remove(track)
+                self.closed.append(track)
+
+                events.append(("close", track))
+
+        for i, (kind, box, obj) in enumerate(detections) :
+            if i not in matched :
+                self.tracks.append(Incident(None, kind, box, obj, now))
+
+        self.closed = [track for track in self.closed if now - track.closed <= self.cooldown]
+
+        for track in self.tracks :
+            if track.opened is None and track.hits >= self.__threshold(self.open_hits, track.kind, OPEN_HITS) :
+                resumed = [closed for closed in self.closed if closed.kind == track.kind and (iou(track.box, closed.box) >= self.iou or distance(track.box, closed.box) <= self.reach)]
+
+                if len(resumed) > 0 :
+                    # The object is back shortly after its incident closed, e.g.,
+                    #  it has been hidden for a moment. The incident goes on as if it
+                    #  had never closed.
+                    #
+                    closed = max(resumed, key = lambda item : item.closed)
+
+                    self.closed.remove(closed)
+
+                    track.ident = closed.ident
+                    track.first = closed.first
+                    track.seen += closed.seen
+                    track.opened = closed.opened
+                else :
+                    track.ident = next(self.idents)
+                    track.opened = now
+
+                    events.append(("open", track))
+
+        return events
+
+# IOU
+# ====================
+#
+# Intersection over union of two boxes.
+#
+# @param box_a   A tuple of the left, top, right and bottom coordinates of a box.
+# @param box_b   A tuple of the left, top, right and bottom coordinates of a box.
+#
+# @ret           A float (0-1) of the area of the intersection of the boxes over the
+#                 area of their union.
+#
+def iou(box_a, box_b) :
+    width = min(box_a[2], box_b[2]) - max(box_a[0], box_b[0])
+    height = min(box_a[3], box_b[3]) - max(box_a[1], box_b[1])
+
+    if width <= 0 or height <= 0 :
+        return 0.0
+
+    inter = width * height
+    union = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1]) + (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]) - inter
+
+    return float(inter) / union if union > 0 else 0.0
+
+# DISTANCE
+# ====================
+#
+# Distance between the centres of two boxes, in sizes of the boxes.
+#
+# @param box_a   A tuple of the left, top, right and bottom coordinates of a box.
+# @param box_b   A tuple of the left, top, right and bottom coordinates of a box.
+#
+# @ret           A float of the distance between the centres of the boxes over the
+#                 longer side of the larger box.
+#
+def distance(box_a, box_b) :
+    size = max(box_a[2] - box_a[0], box_a[3] - box_a[1], box_b[2] - box_b[0], box_b[3] - box_b[1])
+
+    if size <= 0 :
+        return float("inf")
+
+    return math.hypot((box_a[0] + box_a[2] - box_b[0] - box_b[2]) / 2.0, (box_a[1] + box_a[3] - box_b[1] - box_b[3]) / 2.0) / size
+
+#
+# (END OF) INCIDENT ROUTINES
+#
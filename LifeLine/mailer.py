@@ -0,0 +1,320 @@
+#
+# Name: mailer.py
+#
+# Description: Library sending alert emails in the background. A connection to
+#  the mail server is logged in once and kept for later messages, alerts posted
+#  close together are gathered into a single digest message and images are
+#  attached straight from memory, so raising an alert costs the caller nothing
+#  more than placing it into a queue.
+#
+
+import threading, queue, time, smtplib, ssl, io
+from email.mime.multipart import MIMEMultipart
+from email.mime.image import MIMEImage
+from email.mime.text import MIMEText
+from email.utils import formatdate
+import numpy
+from frame import Frame
+
+# PARAMETERS
+# ====================
+#
+DIGEST_WINDOW = 10         # PERIOD (IN SECOND) ALERTS ARE GATHERED FOR BEFORE A DIGEST IS SENT
+MAX_ATTACHMENTS = 8        # MAXIMUM NUMBER OF IMAGES ATTACHED TO A DIGEST
+RETRIES = 4                # NUMBER OF ATTEMPTS TO SEND A DIGEST BEFORE IT IS GIVEN UP
+BACKOFF = 2                # DELAY (IN SECOND) BEFORE THE FIRST RETRY, DOUBLED FOR EVERY RETRY
+IDLE_TIMEOUT = 120         # PERIOD (IN SECOND) WITHOUT ALERTS AFTER WHICH THE CONNECTION IS CLOSED
+SMTP_TIMEOUT = 30          # TIMEOUT (IN SECOND) OF A SINGLE MAIL SERVER OPERATION
+
+#
+# MAILING ROUTINES
+#
+
+# MAILER
+# ====================
+#
+# A background mail sender. Alerts are posted with post() and sent by a thread of
+#  the mailer. The first alert opens a digest, every alert posted within window
+#  seconds afterwards joins it, and the digest is then sent as one message listing
+#  all alerts with their images attached.
+#
+# The connection, including TLS negotiation and login, is set up upon the first
+#  digest and reused for the following ones. It is closed after idle seconds without
+#  alerts, as mail servers drop idle connections anyway, and set up again when a
+#  digest finds it closed or broken. A digest failing to be sent is retried with
+#  exponentially increasing delays before it is given up.
+#
+# @param host    A string of the host name of the mail server.
+# @param port    An integer of the port of the mail server.
+# @param sender  A string of the email address sending the alerts.
+# @param recipients A list of strings of email addresses receiving the alerts.
+# @param user    None or a string of the user name for logging in.
+# @param password None or a string of the password for logging in.
+# @param starttls A boolean variable of whether the connection is secured by STARTTLS.
+# @param window  A number of seconds alerts are gathered for into a digest. If 0 is
+#                 passed, every alert is sent on its own.
+# @param retries An integer of the number of attempts to send a digest.
+# @param backoff A number of seconds of the delay before the first retry.
+# @param idle    A number of seconds without alerts before the connection is closed.
+#
+class Mailer :
+    def __init__(self, host, port, sender, recipients, user = None, password = None, starttls = True, window = DIGEST_WINDOW, retries = RETRIES, backoff = BACKOFF, idle = IDLE_TIMEOUT) :
+        if host is not None and type(host) is str and port is not None and type(port) is int :
+            pass
+        else :
+            raise TypeError
+
+        if recipients is not None and (type(recipients) is list or type(recipients) is tuple) and len(recipients) > 0 :
+            pass
+        else :
+            raise TypeError
+
+        if starttls is not None and type(starttls) is bool :
+            pass
+        else :
+            raise TypeError
+
+        for param in window, backoff, idle :
+            if param is not None and (type(param) is float or type(param) is int) :
+                if param < 0 :
+                    raise ValueError
+            else :
+                raise TypeError
+
+        if retries is not None and type(retries) is int :
+            if retries < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.idle = idle
+
+        self.messages = queue.Queue()
+        self.thread = None
+        self.smtp = None
+
+        self.sent = 0
+        self.failed = 0
+        self.connects = 0
+
+    # START
+    # ====================
+    #
+    # Start the sender thread.
+    #
+    def start(self) :
+        if self.thread is None :
+            self.thread = threading.Thread(target = self.__run, daemon = True)
+
+            self.thread.start()
+
+        return self
+
+    # POST
+    # ====================
+    #
+    # Send an alert. The call returns immediately.
+    #
+    # @param subject A string of the subject of the alert.
+    # @param text    A string of the alert message.
+    # @param images  None or a list of tuples of a string of the file name and an image
+    #                 to be attached, i.e., a bytes object of JPEG format image, a
+    #                 BytesIO streaming object containing JPEG format image, a NumPy
+    #                 Array object containing RGB format image or a Frame object. The
+    #                 JPEG content of a Frame object is attached as it is, without
+    #                 being encoded again.
+    #
+    def post(self, subject, text, images = None) :
+        attachments = []
+
+        for name, img in images if images is not None else [] :
+            if img is not None and isinstance(img, Frame) is True :
+                attachments.append((name, img.jpeg))
+            elif img is not None and isinstance(img, numpy.ndarray) is True :
+                attachments.append((name, Frame(img).jpeg))
+            elif img is not None and type(img) is io.BytesIO :
+                attachments.append((name, img.getvalue()))
+            elif img is not None and type(img) is bytes :
+                attachments.append((name, img))
+            else :
+                raise TypeError
+
+        self.messages.put((subject, text, attachments, time.time()))
+
+    # STOP
+    # ====================
+    #
+    # Send the alerts gathered so far, close the connection and finish the sender
+    #  thread.
+    #
+    # @param timeout None or a number of seconds to wait for the sender thread.
+    #
+    def stop(self, timeout = None) :
+        self.messages.put(None)
+
+        if self.thread is not None :
+            self.thread.join(timeout)
+
+    # __CONNECT
+    # ====================
+    #
+    # Set up a logged in connection to the mail server.
+    #
+    def __connect(self) :
+        smtp = smtplib.SMTP(self.host, self.port, timeout = SMTP_TIMEOUT)
+
+        try :
+            smtp.ehlo()
+
+            if self.starttls is True :
+                smtp.starttls(context = ssl.create_default_context())
+                smtp.ehlo()
+
+            if self.user is not None :
+                smtp.login(self.user, self.password)
+        except BaseException :
+            smtp.close()
+
+            raise
+
+        self.connects += 1
+
+        return smtp
+
+    # __DISCONNECT
+    # ====================
+    #
+    # Close the connection to the mail server, if any.
+    #
+    def __disconnect(self) :
+        if self.smtp is not None :
+            try :
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError) :
+                self.smtp.close()
+
+            self.smtp = None
+
+    # __COMPOSE
+    # ====================
+    #
+    # Compose a digest message of alerts.
+    #
+    def __compose(self, alerts) :
+        msg = MIMEMultipart()
+
+        if len(alerts) == 1 :
+            msg["Subject"] = alerts[0][0]
+        else :
+            msg["Subject"] = str(len(alerts)) + " Alerts: " + ", ".join(sorted(set(alert[0] for alert in alerts)))
+
+        msg["From"] = self.sender
+        msg["To"] = ", ".join(self.recipients)
+        msg["Date"] = formatdate(localtime = True)
+
+        msg.attach(MIMEText("\n\n".join(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stamp)) + " " + subject + "\n" + text for subject, text, _, stamp in alerts)))
+
+        count = 0
+
+        for _, _, attachments, _ in alerts :
+            for name, content in attachments :
+                if count >= MAX_ATTACHMENTS :
+                    break
+
+                part = MIMEImage(content, "jpeg")
+                part.add_header("Content-Disposition", "attachment", filename = name)
+
+                msg.attach(part)
+
+                count += 1
+
+        return msg
+
+    # __SEND
+    # ====================
+    #
+    # Send a digest message, reconnecting and retrying upon failures.
+    #
+    # @ret           A boolean value of whether the message has been sent.
+    #
+    def __send(self, msg) :
+        for attempt in range(self.retries) :
+            if attempt > 0 :
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            try :
+                if self.smtp is None :
+                    self.smtp = self.__connect()
+
+                self.smtp.sendmail(self.sender, self.recipients, msg.as_string())
+
+                return True
+            except smtplib.SMTPRecipientsRefused :
+                # Retrying does not help with addresses the server does not accept.
+                #
+                break
+            except (smtplib.SMTPException, OSError) as error :
+                print("Mailer: " + type(error).__name__ + " " + str(error) + ", attempt " + str(attempt + 1) + " of " + str(self.retries))
+
+                # The connection may be left in an unknown state by the failure, a
+                #  new connection is set up for the next attempt.
+                #
+                self.__disconnect()
+
+        return False
+
+    # __RUN
+    # ====================
+    #
+    # Body of the sender thread, gathering alerts into digests and sending them.
+    #
+    def __run(self) :
+        stopping = False
+
+        while stopping is not True :
+            try :
+                alert = self.messages.get(timeout = self.idle if self.smtp is not None else None)
+            except queue.Empty :
+                self.__disconnect()
+
+                continue
+
+            if alert is None :
+                break
+
+            alerts = [alert]
+            due = alert[3] + self.window
+
+            while True :
+                try :
+                    alert = self.messages.get(timeout = max(due - time.time(), 0))
+                except queue.Empty :
+                    break
+
+                if alert is None :
+                    stopping = True
+
+                    break
+
+                alerts.append(alert)
+
+            if self.__send(self.__compose(alerts)) is True :
+                self.sent += len(alerts)
+            else :
+                self.failed += len(alerts)
+
+        self.__disconnect()
+
+#
+# (END OF) MAILING ROUTINES
+#
@@ -0,0 +1,323 @@
+#
+# Name: metrics.py
+#
+# Description: Library keeping telemetry of the program, i.e., counters, gauges
+#  and latency histograms of fixed buckets, cheap enough to be updated for every
+#  frame. The metrics are served in Prometheus text format over HTTP on the local
+#  machine and written to a rolling file, so the stage holding back a Raspberry Pi
+#  in the field is found by looking at either.
+#
+#  Usage: curl http://localhost:9915/metrics
+#
+
+import threading, time, os, bisect
+import http.server
+
+# PARAMETERS
+# ====================
+#
+METRICS_PORT = 9915        # PORT OF THE HTTP ENDPOINT SERVING THE METRICS, CLEAR OF NODE_EXPORTER ON 9100
+LOG_INTERVAL = 60          # PERIOD (IN SECOND) BETWEEN SNAPSHOTS WRITTEN TO THE METRICS FILE
+LOG_SIZE = 1048576         # SIZE (IN BYTE) OF THE METRICS FILE BEFORE IT IS ROLLED OVER
+LOG_BACKUPS = 3            # NUMBER OF ROLLED OVER METRICS FILES KEPT
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#
+# METRIC ROUTINES
+#
+
+# Updates of a metric take no lock, an addition to an attribute costs a fraction
+#  of a microsecond while taking a lock costs as much again. Metrics are updated by
+#  one stage each, should two threads update the same metric at the very same time
+#  one update may be lost, which is of no concern for telemetry.
+#
+
+# COUNTER
+# ====================
+#
+# A value that only goes up, e.g., the number of frames captured.
+#
+class Counter :
+    kind = "counter"
+
+    def __init__(self) :
+        self.value = 0
+
+    def inc(self, amount = 1) :
+        self.value += amount
+
+    def samples(self) :
+        return [("", None, self.value)]
+
+# GAUGE
+# ====================
+#
+# A value that goes up and down, e.g., the number of frames waiting.
+#
+class Gauge :
+    kind = "gauge"
+
+    def __init__(self) :
+        self.value = 0
+
+    def set(self, value) :
+        self.value = value
+
+    def inc(self, amount = 1) :
+        self.value += amount
+
+    def dec(self, amount = 1) :
+        self.value -= amount
+
+    def samples(self) :
+        return [("", None, self.value)]
+
+# HISTOGRAM
+# ====================
+#
+# A distribution of observed values, e.g., latencies, counted into buckets of fixed
+#  upper bounds.
+#
+# @param buckets A tuple of numbers of the upper bounds of the buckets in ascending
+#                 order. Values above the last bound are counted in an extra bucket.
+#
+class Histogram :
+    kind = "histogram"
+
+    def __init__(self, buckets = LATENCY_BUCKETS) :
+        if buckets is not None and (type(buckets) is tuple or type(buckets) is list) and len(buckets) > 0 :
+            if list(buckets) != sorted(buckets) :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    # OBSERVE
+    # ====================
+    #
+    # @param value   A number of the value observed, e.g., seconds taken by a stage.
+    #
+    def observe(self, value) :
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # SINCE
+    # ====================
+    #
+    # Observe the time elapsed since a moment.
+    #
+    # @param ent     A number of seconds of the moment, as returned from
+    #                 time.perf_counter().
+    #
+    def since(self, ent) :
+        self.observe(time.perf_counter() - ent)
+
+    def samples(self) :
+        ret = []
+        total = 0
+
+        for bound, count in zip(self.bounds + ["+Inf"], list(self.counts)) :
+            total += count
+
+            ret.append(("_bucket", ("le", str(bound)), total))
+
+        ret.append(("_sum", None, self.sum))
+        ret.append(("_count", None, total))
+
+        return ret
+
+# REGISTRY
+# ====================
+#
+# A collection of metrics by name and labels, rendered together.
+#
+class Registry :
+    def __init__(self) :
+        self.metrics = {}
+        self.helps = {}
+        self.kinds = {}
+        self.lock = threading.Lock()
+
+    # __GET
+    # ====================
+    #
+    # Look up a metric, creating it upon first use.
+    #
+    def __get(self, cls, name, doc, labels, *args) :
+        if name is not None and type(name) is str and (labels is None or type(labels) is dict) :
+            pass
+        else :
+            raise TypeError
+
+        key = (name, tuple(sorted(labels.items())) if labels is not None else ())
+
+        with self.lock :
+            if self.kinds.setdefault(name, cls.kind) != cls.kind :
+                raise ValueError("Metric " + name + " Registered as " + self.kinds[name])
+
+            metric = self.metrics.get(key)
+
+            if metric is None :
+                metric = cls(*args)
+
+                self.metrics[key] = metric
+                self.helps.setdefault(name, doc)
+
+        return metric
+
+    # COUNTER / GAUGE / HISTOGRAM
+    # ====================
+    #
+    # @param name    A string of the metric name, e.g., "lifeline_frames_total".
+    # @param doc     A string describing the metric.
+    # @param labels  None or a dictionary of strings of label names and values
+    #                 telling apart metrics of a name, e.g., {"kind" : "Knife"}.
+    # @param buckets A tuple of numbers of the upper bounds of the histogram buckets.
+    #
+    # @ret           The metric registered by the name and labels, created if there
+    #                 is none yet.
+    #
+    def counter(self, name, doc = "", labels = None) :
+        return self.__get(Counter, name, doc, labels)
+
+    def gauge(self, name, doc = "", labels = None) :
+        return self.__get(Gauge, name, doc, labels)
+
+    def histogram(self, name, doc = "", labels = None, buckets = LATENCY_BUCKETS) :
+        return self.__get(Histogram, name, doc, labels, buckets)
+
+    # RENDER
+    # ====================
+    #
+    # @ret           A string of all metrics in Prometheus text format.
+    #
+    def render(self) :
+        with self.lock :
+            items = sorted(self.metrics.items(), key = lambda item : item[0])
+
+        lines = []
+        last = None
+
+        for (name, labels), metric in items :
+            if name != last :
+                lines.append("# HELP " + name + " " + self.helps[name].replace("\\", "\\\\").replace("\n", "\\n"))
+                lines.append("# TYPE " + name + " " + metric.kind)
+
+                last = name
+
+            for suffix, extra, value in metric.samples() :
+                pairs = list(labels) + ([extra] if extra is not None else [])
+
+                if len(pairs) > 0 :
+                    tag = "{" + ",".join(label + "=\"" + str(text).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") + "\"" for label, text in pairs) + "}"
+                else :
+                    tag = ""
+
+                lines.append(name + suffix + tag + " " + str(value))
+
+        return "\n".join(lines) + "\n"
+
+    # SERVE
+    # ====================
+    #
+    # Serve the metrics over HTTP in a background thread, at "/metrics". A port that
+    #  cannot be listened on, e.g., taken by another program, is reported and the
+    #  metrics are left unserved, telemetry never stops the program.
+    #
+    # @param port    An integer of the port listened to.
+    # @param host    A string of the address listened on. The metrics are kept to the
+    #                 machine itself by default.
+    #
+    # @ret           The http.server.ThreadingHTTPServer object, which is shut down by
+    #                 calling its shutdown(), or None if the port cannot be listened on.
+    #
+    def serve(self, port = METRICS_PORT, host = "127.0.0.1") :
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler) :
+            def do_GET(self) :
+                if self.path.split("?")[0] not in ("/", "/metrics") :
+                    self.send_error(404)
+
+                    return
+
+                body = registry.render().encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) :
+                pass
+
+        try :
+            server = http.server.ThreadingHTTPServer((host, port), Handler)
+        except OSError as error :
+            print("Metrics: " + host + ":" + str(port) + " " + str(error))
+
+            return None
+
+        server.daemon_threads = True
+
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+
+        return server
+
+    # LOG
+    # ====================
+    #
+    # Write snapshots of the metrics to a file every interval seconds in a background
+    #  thread. The file is rolled over once it grows beyond size bytes, i.e., renamed
+    #  to ofile.1 with ofile.1 renamed to ofile.2 and so on, keeping backups files.
+    #
+    # @param ofile   A string of file location path of the metrics file.
+    # @param interval A number of seconds between snapshots.
+    # @param size    An integer of the size (in byte) of the file before it is rolled.
+    # @param backups An integer of the number of rolled over files kept.
+    #
+    # @ret           A threading.Event object, which stops the logging when set.
+    #
+    def log(self, ofile, interval = LOG_INTERVAL, size = LOG_SIZE, backups = LOG_BACKUPS) :
+        if ofile is not None and type(ofile) is str :
+            pass
+        else :
+            raise TypeError
+
+        stopped = threading.Event()
+
+        def run() :
+            while not stopped.wait(interval) :
+                try :
+                    if os.path.exists(ofile) and os.path.getsize(ofile) >= size :
+                        for i in range(backups - 1, 0, -1) :
+                            if os.path.exists(ofile + "." + str(i)) :
+                                os.replace(ofile + "." + str(i), ofile + "." + str(i + 1))
+
+                        if backups > 0 :
+                            os.replace(ofile, ofile + ".1")
+                        else :
+                            os.remove(ofile)
+
+                    with open(ofile, "a") as logfile :
+                        logfile.write("# " + time.strftime("%Y-%m-%d %H:%M:%S") + "\n" + self.render() + "\n")
+                except OSError as error :
+                    print("Metrics: " + ofile + " " + str(error))
+
+        threading.Thread(target = run, daemon = True).start()
+
+        return stopped
+
+# The registry shared by the modules of the program.
+#
+REGISTRY = Registry()
+
+#
+# (END OF) METRIC ROUTINES
+#
@@ -0,0 +1,647 @@
+#
+# Name: pipeline.py
+#
+# Description: Library running the capture, inference and render stages of a
+#  realtime video analysis program concurrently, joined by bounded queues, so
+#  that the video keeps refreshing at camera rate while a slow inference, e.g.,
+#  a Google Vision API round trip, is in flight.
+#
+
+import threading, queue, time, math
+import metrics, tracing
+
+# PARAMETERS
+# ====================
+#
+RENDER_DEPTH = 2           # NUMBER OF CAPTURED FRAMES ALLOWED TO WAIT FOR RENDERING
+POLL_INTERVAL = 0.1        # INTERVAL (IN SECOND) FOR IDLE STAGES TO CHECK FOR STOPPING
+MIN_RATE = 0.2             # MINIMUM NUMBER OF FRAMES SAMPLED FOR IDENTIFICATION PER SECOND
+MAX_RATE = 5               # MAXIMUM NUMBER OF FRAMES SAMPLED FOR IDENTIFICATION PER SECOND
+RESPONSE_TIME = 2          # TIME CONSTANT (IN SECOND) OF LATENCY AND FRAME RATE AVERAGES
+
+# Time spent rendering and frames handled by pipelines, reported by `metrics'.
+#
+RENDER_SECONDS = metrics.REGISTRY.histogram("lifeline_render_seconds", "Time taken by the render stage for a frame, including showing it.")
+RENDER_FRAMES = metrics.REGISTRY.counter("lifeline_render_frames_total", "Number of frames rendered.")
+DROPPED_FRAMES = metrics.REGISTRY.counter("lifeline_dropped_frames_total", "Number of captured frames dropped before being rendered.")
+SAMPLED_FRAMES = metrics.REGISTRY.counter("lifeline_sampled_frames_total", "Number of frames sampled for identification.")
+
+#
+# QUEUE ROUTINES
+#
+
+# PUT_LATEST
+# ====================
+#
+# Place an item into a bounded queue without blocking the producer. Should the queue
+#  be full, the oldest items are discarded to make room, so the consumer always finds
+#  the newest item at the tail of the queue.
+#
+# @param q       A queue.Queue object with a bounded size.
+# @param item    An object to be placed into the queue.
+# @param discard None or a function called with every stale item discarded.
+#
+# @ret           An integer of the number of stale items discarded.
+#
+def put_latest(q, item, discard = None) :
+    dropped = 0
+
+    while True :
+        try :
+            q.put_nowait(item)
+
+            return dropped
+        except queue.Full :
+            try :
+                stale = q.get_nowait()
+
+                dropped += 1
+
+                if discard is not None :
+                    discard(stale)
+            except queue.Empty :
+                pass
+
+#
+# (END OF) QUEUE ROUTINES
+#
+
+#
+# SCHEDULING ROUTINES
+#
+
+# SAMPLESCHEDULER
+# ====================
+#
+# A scheduler choosing how many captured frames apart the frames sampled for
+#  identification should be. It keeps running averages of the inference round trip
+#  time and of the capture frame interval, and samples a frame about when the
+#  previous inference is due to return. The inference stage is thus kept busy
+#  without frames waiting for it. The sampling rate is kept within min_rate and
+#  max_rate, and follows the average, i.e., within a few seconds, should the link
+#  slow down or recover.
+#
+# @param min_rate A number of the minimum frames sampled per second.
+# @param max_rate A number of the maximum frames sampled per second.
+# @param response A number of seconds of the time constant of the running averages.
+#
+class SampleScheduler :
+    def __init__(self, min_rate = MIN_RATE, max_rate = MAX_RATE, response = RESPONSE_TIME) :
+        for param in min_rate, max_rate, response :
+            if param is not None and (type(param) is float or type(param) is int) :
+                if param <= 0 :
+                    raise ValueError
+            else :
+                raise TypeError
+
+        if min_rate > max_rate :
+            raise ValueError
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.response = response
+
+        self.latency = None
+        self.frame_time = None
+        self.interval = 1
+
+        self.last_frame = None
+        self.last_latency = None
+        self.count = 0
+
+    # __AVERAGE
+    # ====================
+    #
+    # Fold a sample into a running average, weighting the sample by the time elapsed
+    #  since the previous one so the average follows the response time constant
+    #  regardless of how often samples arrive.
+    #
+    def __average(self, avg, sample, elapsed) :
+        if avg is None :
+            return sample
+
+        weight = 1 - math.exp(-max(elapsed, 0) / self.response)
+
+        return avg + weight * (sample - avg)
+
+    # RECORD_FRAME
+    # ====================
+    #
+    # Account for a captured frame.
+    #
+    # @param now     None or a number of seconds of the time of capture, defaults to
+    #                 the current time.
+    #
+    def record_frame(self, now = None) :
+        if now is None :
+            now = time.time()
+
+        if self.last_frame is not None :
+            self.frame_time = self.__average(self.frame_time, now - self.last_frame, now - self.last_frame)
+
+        self.last_frame = now
+        self.count += 1
+
+    # RECORD_LATENCY
+    # ====================
+    #
+    # Account for a completed inference.
+    #
+    # @param latency A number of seconds the inference has taken.
+    # @param now     None or a number of seconds of the time of completion, defaults
+    #                 to the current time.
+    #
+    def record_latency(self, latency, now = None) :
+        if now is None :
+            now = time.time()
+
+        if self.last_latency is not None :
+            self.latency = self.__average(self.latency, latency, now - self.last_latency)
+        else :
+            self.latency = latency
+
+        self.last_latency = now
+
+    # DUE
+    # ====================
+    #
+    # Decide whether the frame last recorded should be sampled for identification.
+    #
+    # @ret           A boolean value of whether the frame should be sampled.
+    #
+    def due(self) :
+        period = min(max(self.latency if self.latency is not None else 0, 1.0 / self.max_rate), 1.0 / self.min_rate)
+
+        if self.frame_time is not None and self.frame_time > 0 :
+            self.interval = max(int(round(period / self.frame_time)), 1)
+
+        if self.count >= self.interval :
+            self.count = 0
+
+            return True
+        else :
+            return False
+
+#
+# (END OF) SCHEDULING ROUTINES
+#
+
+#
+# PIPELINE ROUTINES
+#
+
+# PIPELINE
+# ====================
+#
+# A three stage runtime. The capture stage and the inference stage run in their own
+#  threads while the render stage runs on the thread calling run(), as GUI toolkits,
+#  e.g., OpenCV HighGUI and Tk, expect to be driven from the main thread.
+#
+# Every captured frame is offered to both the render stage and the inference stage.
+#  The inference stage holds a slot of one frame only, therefore, when it is busy,
+#  newer frames replace the waiting one and stale frames are never processed.
+#
+# The identity of the frame the most recent result was computed from is kept in
+#  origin while render is called, e.g., for the render stage to record spans of
+#  incidents and alerts raised by the result in the trace of that frame. While
+#  render is called with a new result, the frame itself is kept in detected, held
+#  by the pipeline until render returns, e.g., for alerts to present the very
+#  frame an object has been identified in rather than the frame rendered.
+#
+# @param capture A function without argument returning a captured frame, e.g.,
+#                 image.record_frame, or None to end the pipeline.
+# @param infer   A function accepting a frame and returning the inference result,
+#                 e.g., a Google Vision API request over the frame.
+# @param render  A function accepting a frame, the most recent inference result and
+#                 a boolean value indicating whether the result is new since the
+#                 last call, i.e., it has not been presented with any frame before.
+# @param result  The inference result passed to render before the first inference
+#                 completes, e.g., an empty list.
+# @param depth   An integer of the number of captured frames allowed to wait for
+#                 the render stage before the oldest is dropped.
+# @param gate    None or a function accepting a frame and returning whether the
+#                 frame is worth identifying, e.g., an image.MotionGate object.
+#                 Frames not passing the gate are rendered but not identified.
+# @param scheduler None or a SampleScheduler object pacing the frames offered for
+#                 identification. If None is passed, every frame is offered and the
+#                 inference stage runs back to back.
+# @param tracker None or an object with methods seed(frame, result) and update(frame),
+#                 e.g., a tracker.FlowTracker object. Each inference result is seeded
+#                 with the frame it was computed from and render is given the result
+#                 as updated to every frame rendered, instead of the stagnant result.
+# @param pool    None or an object with methods retain(frame) and release(frame),
+#                 e.g., image.FRAME_POOL, counting the references to captured frames.
+#                 The pipeline retains a frame for each stage it is handed to and
+#                 releases it once the stage is done with it or drops it.
+#
+class Pipeline :
+    def __init__(self, capture, infer, render, result = None, depth = RENDER_DEPTH, gate = None, scheduler = None, tracker = None, pool = None) :
+        if callable(capture) and callable(infer) and callable(render) and (gate is None or callable(gate)) :
+            pass
+        else :
+            raise TypeError
+
+        if depth is not None and type(depth) is int :
+            if depth < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.capture = capture
+        self.infer = infer
+        self.render = render
+        self.result = result
+        self.gate = gate
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.pool = pool
+
+        self.frames = queue.Queue(maxsize = depth)
+        self.pending = queue.Queue(maxsize = 1)
+        self.results = queue.Queue(maxsize = 1)
+
+        self.stopped = threading.Event()
+        self.error = None
+        self.threads = []
+
+        self.dropped = 0
+        self.origin = None
+        self.detected = None
+
+        # Events set upon a frame waiting for the render stage or the inference
+        #  stage, by which a MultiPipeline serving the pipeline is woken up.
+        #
+        self.frame_ready = None
+        self.sample_ready = None
+
+    # __STAGE
+    # ====================
+    #
+    # Wrap a stage loop so that an exception raised in a worker thread stops the
+    #  whole pipeline and is re-raised by run() on the calling thread.
+    #
+    def __stage(self, loop) :
+        try :
+            loop()
+        except BaseException as error :
+            if self.error is None :
+                self.error = error
+
+            self.stopped.set()
+
+    # __RETAIN / __RELEASE
+    # ====================
+    #
+    # Count a reference to a frame held by a stage, or drop it.
+    #
+    def __retain(self, frame) :
+        if self.pool is not None :
+            self.pool.retain(frame)
+
+    def __release(self, frame) :
+        if self.pool is not None :
+            self.pool.release(frame)
+
+    def __release_result(self, item) :
+        self.__release(item[0])
+
+    def __capture_loop(self) :
+        while not self.stopped.is_set() :
+            # The reference of the capture stage is handed over to the render stage.
+            #
+            frame = self.capture()
+
+            # A capture source, e.g., a video file, has been exhausted.
+            #
+            if frame is None :
+                self.stopped.set()
+
+                break
+
+            # A reference for the inference stage is taken before the frame is
+            #  handed over, as the render stage may release its reference at once
+            #  while the gate is yet to look at the frame. It is dropped should the
+            #  frame not be sampled.
+            #
+            self.__retain(frame)
+
+            dropped = put_latest(self.frames, frame, self.__release)
+
+            if dropped > 0 :
+                self.dropped += dropped
+
+                DROPPED_FRAMES.inc(dropped)
+
+            if self.frame_ready is not None :
+                self.frame_ready.set()
+
+            if self.scheduler is not None :
+                self.scheduler.record_frame()
+
+                due = self.scheduler.due()
+            else :
+                due = True
+
+            if due is True and (self.gate is None or self.gate(frame)) :
+                put_latest(self.pending, frame, self.__release)
+
+                SAMPLED_FRAMES.inc()
+
+                if self.sample_ready is not None :
+                    self.sample_ready.set()
+            else :
+                self.__release(frame)
+
+    def __infer_loop(self) :
+        while not self.stopped.is_set() :
+            try :
+                frame = self.pending.get(timeout = POLL_INTERVAL)
+            except queue.Empty :
+                continue
+
+            self.identify(frame)
+
+    # IDENTIFY
+    # ====================
+    #
+    # Run the inference stage over a frame taken from pending and hand the result
+    #  over to the render stage.
+    #
+    # @param frame   A frame sampled for identification, whose reference is taken
+    #                 over from the capture stage.
+    #
+    def identify(self, frame) :
+        ent = time.time()
+
+        tracing.TRACER.sample(frame, ent)
+
+        result = self.infer(frame)
+
+        end = time.time()
+
+        if self.scheduler is not None :
+            self.scheduler.record_latency(end - ent)
+
+        # The frame is handed over with its result for seeding the tracker, and the
+        #  time the result came back for tracing its hand over.
+        #
+        put_latest(self.results, (frame, result, end), self.__release_result)
+
+    # START
+    # ====================
+    #
+    # Start the capture and inference stages in background threads.
+    #
+    # @param infer   A boolean variable of whether the inference stage is started. If
+    #                 False is passed, frames in pending are left to be identified by
+    #                 the caller, e.g., a MultiPipeline sharing one inference stage
+    #                 among pipelines.
+    #
+    def start(self, infer = True) :
+        for loop in (self.__capture_loop, self.__infer_loop) if infer is True else (self.__capture_loop, ) :
+            thread = threading.Thread(target = self.__stage, args = (loop, ), daemon = True)
+
+            thread.start()
+
+            self.threads.append(thread)
+
+    # STEP
+    # ====================
+    #
+    # Render the next captured frame with the most recent inference result.
+    #
+    # @param timeout None or a number of seconds to wait for a captured frame.
+    #
+    # @ret           A boolean value of whether a frame has been rendered.
+    #
+    def step(self, timeout = POLL_INTERVAL) :
+        try :
+            frame = self.frames.get(timeout = timeout)
+        except queue.Empty :
+            return False
+
+        try :
+            origin, self.result, answered = self.results.get_nowait()
+
+            fresh = True
+        except queue.Empty :
+            fresh = False
+
+        if fresh is True :
+            if self.tracker is not None :
+                self.tracker.seed(origin, self.result)
+
+            self.origin = getattr(origin, "ident", None)
+
+            tracing.TRACER.span(self.origin, "response", answered)
+
+            self.detected = origin
+
+        ent = time.perf_counter()
+
+        try :
+            if self.tracker is not None :
+                self.render(frame, self.tracker.update(frame), fresh)
+            else :
+                self.render(frame, self.result, fresh)
+        finally :
+            self.__release(frame)
+
+            if fresh is True :
+                self.detected = None
+
+                self.__release(origin)
+
+        RENDER_SECONDS.since(ent)
+        RENDER_FRAMES.inc()
+
+        # The trace of the frame identified ends once its result has been rendered,
+        #  including any incident and alert raised by the render stage.
+        #
+        if fresh is True :
+            tracing.TRACER.finish(self.origin)
+
+        return True
+
+    # RUN
+    # ====================
+    #
+    # Start the pipeline and render frames on the calling thread until stop() is
+    #  called or any stage raises an exception, which is re-raised here.
+    #
+    def run(self) :
+        if len(self.threads) == 0 :
+            self.start()
+
+        try :
+            while not self.stopped.is_set() :
+                self.step()
+        finally :
+            self.stop()
+
+        if self.error is not None :
+            raise self.error
+
+    # STOP
+    # ====================
+    #
+    # Signal all stages to finish. The worker threads exit after their current
+    #  capture or inference returns.
+    #
+    def stop(self) :
+        self.stopped.set()
+
+# MULTIPIPELINE
+# ====================
+#
+# A runtime of several pipelines, e.g., one for each camera, in one process. Every
+#  pipeline captures in a thread of its own, while a single inference stage serves
+#  all of them in turn and the render stages of all of them run on the thread
+#  calling run(). One camera with motion in view therefore cannot keep the others
+#  from being identified, and no more requests are in flight to Google Vision API
+#  at once than with a single camera.
+#
+# The inference function, gate, scheduler, tracker and pool of each pipeline are
+#  its own, e.g., the pool of the image.Camera object it captures from.
+#
+# @param pipelines A list of Pipeline objects, not yet started.
+#
+class MultiPipeline :
+    def __init__(self, pipelines) :
+        if pipelines is not None and (type(pipelines) is list or type(pipelines) is tuple) and len(pipelines) > 0 :
+            for pipe in pipelines :
+                if isinstance(pipe, Pipeline) is not True :
+                    raise TypeError
+        else :
+            raise TypeError
+
+        self.pipelines = list(pipelines)
+
+        self.frame_ready = threading.Event()
+        self.sample_ready = threading.Event()
+
+        for pipe in self.pipelines :
+            pipe.frame_ready = self.frame_ready
+            pipe.sample_ready = self.sample_ready
+
+        self.stopped = threading.Event()
+        self.error = None
+        self.threads = []
+
+        self.turn = 0
+
+    # __INFER_LOOP
+    # ====================
+    #
+    # Body of the shared inference stage, identifying a frame of each pipeline with a
+    #  frame waiting in turn.
+    #
+    def __infer_loop(self) :
+        try :
+            while not self.stopped.is_set() :
+                # The event is cleared before looking, a frame arriving meanwhile
+                #  sets it again and is not missed.
+                #
+                self.sample_ready.clear()
+
+                for i in range(len(self.pipelines)) :
+                    pipe = self.pipelines[(self.turn + i) % len(self.pipelines)]
+
+                    try :
+                        frame = pipe.pending.get_nowait()
+                    except queue.Empty :
+                        continue
+
+                    self.turn = (self.turn + i + 1) % len(self.pipelines)
+
+                    pipe.identify(frame)
+
+                    break
+                else :
+                    self.sample_ready.wait(POLL_INTERVAL)
+        except BaseException as error :
+            if self.error is None :
+                self.error = error
+
+            self.stopped.set()
+
+    # START
+    # ====================
+    #
+    # Start the capture stages of all pipelines and the shared inference stage in
+    #  background threads.
+    #
+    def start(self) :
+        for pipe in self.pipelines :
+            pipe.start(infer = False)
+
+        thread = threading.Thread(target = self.__infer_loop, daemon = True)
+
+        thread.start()
+
+        self.threads.append(thread)
+
+    # STEP
+    # ====================
+    #
+    # Render the next captured frame of every pipeline with a frame waiting.
+    #
+    # @param timeout None or a number of seconds to wait for a captured frame.
+    #
+    # @ret           A boolean value of whether any frame has been rendered.
+    #
+    def step(self, timeout = POLL_INTERVAL) :
+        self.frame_ready.clear()
+
+        rendered = False
+
+        for pipe in self.pipelines :
+            if pipe.step(0) is True :
+                rendered = True
+
+        if rendered is not True :
+            self.frame_ready.wait(timeout)
+
+        return rendered
+
+    # RUN
+    # ====================
+    #
+    # Start the pipelines and render frames on the calling thread until stop() is
+    #  called, every pipeline has ended or any stage raises an exception, which is
+    #  re-raised here.
+    #
+    def run(self) :
+        if len(self.threads) == 0 :
+            self.start()
+
+        try :
+            while not self.stopped.is_set() :
+                self.step()
+
+                for pipe in self.pipelines :
+                    if pipe.error is not None and self.error is None :
+                        self.error = pipe.error
+
+                if self.error is not None or all(pipe.stopped.is_set() for pipe in self.pipelines) :
+                    self.stopped.set()
+        finally :
+            self.stop()
+
+        if self.error is not None :
+            raise self.error
+
+    # STOP
+    # ====================
+    #
+    # Signal all pipelines and the shared inference stage to finish.
+    #
+    def stop(self) :
+        self.stopped.set()
+
+        for pipe in self.pipelines :
+            pipe.stop()
+
+#
+# (END OF) PIPELINE ROUTINES
+#
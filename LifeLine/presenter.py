@@ -0,0 +1,224 @@
+#
+# Name: presenter.py
+#
+# Description: Library presenting alerts in a window of their own, kept by a
+#  thread of its own. Alerts are posted through a queue and shown without the
+#  caller waiting for anyone to read or close them, so video capture and object
+#  identification carry on while an alert is on screen.
+#
+
+import threading, queue, time
+import tkinter as tk
+from PIL import Image, ImageTk
+import numpy
+from frame import Frame
+
+# PARAMETERS
+# ====================
+#
+POLL_INTERVAL = 100        # INTERVAL (IN MILLISECOND) FOR THE WINDOW TO CHECK FOR NEW ALERTS
+SNAPSHOT_SIZE = (320, 180) # MAXIMUM DIMENSION (IN PIXEL) OF SNAPSHOTS SHOWN WITH ALERTS
+MAX_ALERTS = 4             # MAXIMUM NUMBER OF ALERTS STACKED IN THE WINDOW
+
+#
+# PRESENTATION ROUTINES
+#
+
+# ALERTPRESENTER
+# ====================
+#
+# A single persistent window listing the alerts in force, newest on top. An alert
+#  posted again with the same kind, e.g., the same weapon seen in a later frame,
+#  updates its entry in place with a new snapshot and a count instead of opening
+#  another window. An entry stays until dismissed, the window hides itself when
+#  no entry is left.
+#
+# All Tk objects are created and used by the presenter thread only, as Tk expects
+#  to be driven from the thread creating it.
+#
+# @param title   A string of the title of the window.
+# @param action  None or a function without argument called when the action button
+#                 of an entry is pressed, e.g., to call for backup. It is called on
+#                 the presenter thread and should return promptly.
+# @param action_text A string of the caption of the action button.
+# @param limit   An integer of the maximum number of entries stacked, the oldest
+#                 entry is removed to make room for a new one.
+#
+class AlertPresenter :
+    def __init__(self, title = "LifeLine", action = None, action_text = "Call Backup", limit = MAX_ALERTS) :
+        if (action is None or callable(action)) and limit is not None and type(limit) is int :
+            if limit < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.title = title
+        self.action = action
+        self.action_text = action_text
+        self.limit = limit
+
+        self.messages = queue.Queue()
+        self.thread = None
+
+        self.root = None
+        self.entries = {}
+        self.icons = {}
+
+    # START
+    # ====================
+    #
+    # Open the window, hidden until the first alert, in a background thread.
+    #
+    def start(self) :
+        if self.thread is None :
+            self.thread = threading.Thread(target = self.__run, daemon = True)
+
+            self.thread.start()
+
+        return self
+
+    # POST
+    # ====================
+    #
+    # Present an alert. The call returns immediately.
+    #
+    # @param kind    A hashable object identifying the alert, e.g., "Handgun". Alerts
+    #                 of the same kind share one entry.
+    # @param text    A string of the alert message.
+    # @param icon    None or a string of file location path of a PNG or GIF image shown
+    #                 with the alert.
+    # @param snapshot None or a PIL image object or NumPy Array object containing RGB
+    #                 format image or a Frame object of the scene to be shown with the
+    #                 alert. A copy is taken, the caller may reuse the image afterwards.
+    #
+    def post(self, kind, text, icon = None, snapshot = None) :
+        if snapshot is not None and isinstance(snapshot, Frame) is True :
+            snapshot = snapshot.copy().pil
+        elif snapshot is not None and isinstance(snapshot, numpy.ndarray) is True :
+            snapshot = Image.fromarray(snapshot.copy())
+        elif snapshot is not None and isinstance(snapshot, Image.Image) is True :
+            snapshot = snapshot.copy()
+        elif snapshot is not None :
+            raise TypeError
+
+        self.messages.put((kind, text, icon, snapshot, time.time()))
+
+    # STOP
+    # ====================
+    #
+    # Close the window and finish the presenter thread.
+    #
+    def stop(self) :
+        self.messages.put(None)
+
+    # __RUN
+    # ====================
+    #
+    # Body of the presenter thread, creating the window and driving Tk.
+    #
+    def __run(self) :
+        self.root = tk.Tk()
+        self.root.title(self.title)
+        self.root.protocol("WM_DELETE_WINDOW", self.root.withdraw)
+        self.root.withdraw()
+
+        self.root.after(POLL_INTERVAL, self.__poll)
+        self.root.mainloop()
+
+    # __POLL
+    # ====================
+    #
+    # Show the alerts posted since the last poll and schedule the next poll.
+    #
+    def __poll(self) :
+        while True :
+            try :
+                message = self.messages.get_nowait()
+            except queue.Empty :
+                break
+
+            if message is None :
+                self.root.destroy()
+
+                return
+
+            self.__show(*message)
+
+        self.root.after(POLL_INTERVAL, self.__poll)
+
+    # __SHOW
+    # ====================
+    #
+    # Add an entry for an alert or update the entry of an alert of the same kind.
+    #
+    def __show(self, kind, text, icon, snapshot, stamp) :
+        entry = self.entries.get(kind)
+
+        if entry is None :
+            while len(self.entries) >= self.limit :
+                self.__dismiss(min(self.entries, key = lambda key : self.entries[key]["stamp"]))
+
+            frame = tk.Frame(self.root, bd = 2, relief = "groove")
+
+            entry = {"frame" : frame, "count" : 0, "snapshot" : None}
+
+            if icon is not None :
+                if icon not in self.icons :
+                    self.icons[icon] = tk.PhotoImage(file = icon)
+
+                tk.Label(frame, image = self.icons[icon]).pack(side = "left")
+
+            entry["picture"] = tk.Label(frame)
+            entry["picture"].pack(side = "left")
+
+            entry["label"] = tk.Label(frame, bg = "red", fg = "white", font = "Times 20 bold", wraplength = 640, justify = "left")
+            entry["label"].pack(side = "top", fill = "x")
+
+            if self.action is not None :
+                tk.Button(frame, text = self.action_text, command = self.action, font = "Times 20 bold").pack(side = "left")
+
+            tk.Button(frame, text = "Dismiss", command = lambda : self.__dismiss(kind), font = "Times 20 bold").pack(side = "left")
+
+            # Newest entries are stacked on top.
+            #
+            if len(self.root.pack_slaves()) > 0 :
+                frame.pack(side = "top", fill = "x", before = self.root.pack_slaves()[0])
+            else :
+                frame.pack(side = "top", fill = "x")
+
+            self.entries[kind] = entry
+
+        entry["count"] += 1
+        entry["stamp"] = stamp
+
+        entry["label"].configure(text = text + " (" + time.strftime("%H:%M:%S", time.localtime(stamp)) + (", seen " + str(entry["count"]) + " times)" if entry["count"] > 1 else ")"))
+
+        if snapshot is not None :
+            snapshot.thumbnail(SNAPSHOT_SIZE)
+
+            # The PhotoImage object is kept with the entry, Tk shows nothing once
+            #  it is garbage collected.
+            #
+            entry["snapshot"] = ImageTk.PhotoImage(snapshot)
+            entry["picture"].configure(image = entry["snapshot"])
+
+        self.root.deiconify()
+        self.root.lift()
+
+    # __DISMISS
+    # ====================
+    #
+    # Remove the entry of an alert, hiding the window when no entry is left.
+    #
+    def __dismiss(self, kind) :
+        entry = self.entries.pop(kind, None)
+
+        if entry is not None :
+            entry["frame"].destroy()
+
+        if len(self.entries) == 0 :
+            self.root.withdraw()
+
+#
+# (END OF) PRESENTATION ROUTINES
+#
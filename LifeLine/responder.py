@@ -0,0 +1,196 @@
+#
+# Name: responder.py
+#
+# Description: Library of the render and alert stages of LifeLine, i.e., framing
+#  the objects identified on the video frames shown and raising alerts for the
+#  weapons among them. The stages are run by `Lifeline.py' and measured by
+#  `benchmark.py' with the very same code.
+#
+
+import os, time
+import image, metrics, tracing
+
+# PARAMETERS
+# ====================
+#
+BANNER = "LifeLine 1.0 "   # CAPTION DRAWN AT THE TOP LEFT OF EVERY FRAME SHOWN
+
+# Kind of weapon every object name identified by Google Vision stands for.
+#
+WEAPON_KINDS = {"Handgun" : "Handgun", "Rifle" : "Rifle", "Shot gun" : "Rifle",
+    "Kitchen knife" : "Knife", "Knife" : "Knife", "Tableware knife" : "Knife"}
+
+# Caption, snapshot file, alert message and icon of every kind of weapon.
+#
+WEAPONS = {
+    "Handgun" : ("GUN Detected", "/home/student/Desktop/LifeLine/detectedgun.jpg",
+        "GUN ALERT!!! A gun has been detected in LE4 HKU. Click the button to call for Backup!!",
+        "/home/student/Desktop/Classwork/CW4/gun.png"),
+    "Rifle" : ("Rifle/SHotgun Detected", "/home/student/Desktop/LifeLine/detectedshotgun.jpg",
+        "Rifle/ShotGun ALERT!!! A Rifle/ShotGun has been detected in LE4 HKU. Click the button to call for Backup!!",
+        "/home/student/Desktop/Classwork/CW4/rifle.png"),
+    "Knife" : ("Knife Detected", "/home/student/Desktop/Classwork/CW4/detectedknife.jpg",
+        "Knife Alert. A Knife has been detected in LE4 HKU. Click the Button to call for Backup!!",
+        "/home/student/Desktop/Classwork/CW4/knife.png")
+}
+
+ALERT_SECONDS = metrics.REGISTRY.histogram("lifeline_alert_seconds", "Time taken to raise the alerts of a result.")
+
+#
+# RESPONSE ROUTINES
+#
+
+# RESPONDER
+# ====================
+#
+# The render and alert stages of LifeLine. Alerts of an incident are shown by a
+#  `presenter.AlertPresenter', recorded as a clip by a `clip.ClipRecorder' and
+#  emailed by a `mailer.Mailer', each of which may be left out.
+#
+# @param incidents An incident.IncidentEngine object turning the objects identified
+#                 into incidents, e.g., of the kinds in WEAPON_KINDS.
+# @param weapons A dictionary mapping kinds of incident to tuples of the caption,
+#                 snapshot file location path, alert message and icon file location
+#                 path, as WEAPONS.
+# @param banner  None or a string of the caption drawn on every frame shown.
+# @param alerts  None or a presenter.AlertPresenter object.
+# @param clips   None or a clip.ClipRecorder object.
+# @param mail    None or a mailer.Mailer object.
+# @param folder  None or a string of a folder location path snapshots and clips are
+#                 written into instead of the folders in weapons.
+# @param display A boolean variable of whether frames rendered are shown in a video
+#                 window.
+# @param verbose A boolean variable of whether alerts are printed as well.
+#
+class Responder :
+    def __init__(self, incidents, weapons = WEAPONS, banner = BANNER, alerts = None, clips = None, mail = None, folder = None, display = True, verbose = True) :
+        if weapons is not None and type(weapons) is dict :
+            pass
+        else :
+            raise TypeError
+
+        self.incidents = incidents
+        self.weapons = weapons
+        self.alerts = alerts
+        self.clips = clips
+        self.mail = mail
+        self.folder = folder
+        self.display = display
+        self.verbose = verbose
+
+        # The caption is drawn into a layer once, which is then blended onto every
+        #  frame rather than the text being drawn again and again.
+        #
+        self.banner = None
+
+        if banner is not None :
+            self.banner = image.OverlayLayer()
+            self.banner.add_text(banner, (10, 20), (0, 0, 0), False)
+
+    # ALERT
+    # ====================
+    #
+    # Raise alerts for weapons found among the objects identified by Google Vision.
+    #
+    # The snapshot shown, saved and emailed is the very frame the weapon is found
+    #  in, not the frame on screen at the time, and no separate picture is taken by
+    #  the camera. Alerts are handed to the presenter, recorder and mailer, which
+    #  work in threads of their own, the pipeline carries on in the meantime.
+    #
+    # @param frm     The video frame the objects have been identified in
+    # @param ret     The list of objects identified by Google Vision in `frm'
+    # @param origin  None or the identity of `frm' traced by `tracing'.
+    #
+    # @ret           A list of the tuples of events and incidents alerted for, as
+    #                 returned by incident.IncidentEngine.update().
+    #
+    def alert(self, frm, ret, origin = None) :
+        ent = time.perf_counter()
+        start = time.time()
+
+        events = self.incidents.update(ret)
+
+        tracing.TRACER.span(origin, "incident", start)
+
+        for event, incident_ in events :
+            kind = incident_.kind
+
+            if event == "close" :
+                if self.verbose is True :
+                    print(kind + " no longer seen...")
+
+                continue
+
+            start = time.time()
+
+            caption, path, text, icon = self.weapons[kind]
+
+            if self.folder is not None :
+                path = os.path.join(self.folder, os.path.basename(path))
+
+            snapshot = image.overlay_text(frm, caption, (10, 20), (0, 0, 0), False)
+
+            if self.verbose is True :
+                print(caption + "...")
+
+            image.save_image(snapshot, path)
+
+            if self.alerts is not None :
+                self.alerts.post(kind, text, icon if icon is not None and os.path.isfile(icon) else None, snapshot)
+
+            if self.clips is not None :
+                self.clips.trigger(os.path.splitext(path)[0] + time.strftime("-%Y%m%d-%H%M%S") + ".mjpeg")
+
+            self.send_an_email(snapshot, os.path.basename(path))
+
+            metrics.REGISTRY.counter("lifeline_alerts_total", "Number of alerts raised.", {"kind" : kind}).inc()
+
+            tracing.TRACER.span(origin, "alert", start)
+
+        ALERT_SECONDS.since(ent)
+
+        return events
+
+    # SEND_AN_EMAIL
+    # ====================
+    #
+    # Email an alert with the frame the weapon is found in attached. The image is
+    #  attached from memory, not read back from the SD card.
+    #
+    # @param frm     The video frame the weapon is found in
+    # @param name    A string of the file name of the attachment
+    #
+    def send_an_email(self, frm, name = "detectedgun.jpg") :
+        if self.mail is not None :
+            self.mail.post("Weapon Detection", "A weapon has been detected in LE4 HKU.", [(name, frm)])
+
+    # RENDER
+    # ====================
+    #
+    # Frame the objects identified on a video frame and show it.
+    #
+    # The caption and the framing are applied together onto one copy of the frame
+    #  by a compositor, the frame itself may still be waiting for Google Vision and
+    #  is left untouched.
+    #
+    # @param frm     A video frame captured by `record_frame()'
+    # @param ret     The most recent list of objects identified by Google Vision
+    #
+    # @ret           The frame rendered, a copy of `frm'.
+    #
+    def render(self, frm, ret) :
+        overlays = image.Compositor()
+
+        if self.banner is not None :
+            overlays.add_layer(self.banner)
+
+        out = overlays.add_boxes(ret, txttag = "name").apply(frm)
+
+        if self.display is True :
+            image.replay_video(out)
+
+        return out
+
+#
+# (END OF) RESPONSE ROUTINES
+#
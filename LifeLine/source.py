@@ -0,0 +1,363 @@
+#
+# Name: source.py
+#
+# Description: Library of capture sources feeding video frames to the `image'
+#  module in place of the Raspberry Pi camera, i.e., USB webcams and other video
+#  devices, video files, folders of images and synthetic frames. A source is set
+#  by `image.set_source()', or `set_source()' of an `image.Camera', after which
+#  `record_video()' and `record_image()' take frames from it. Recorded footage
+#  and synthetic frames can be played as fast as the program consumes them, for
+#  measuring its throughput on any machine.
+#
+
+import time, os, glob
+import numpy, cv2
+import image
+
+# PARAMETERS
+# ====================
+#
+SYNTHETIC_SIZE = (480, 272)    # DIMENSION (IN PIXEL) OF SYNTHETIC FRAMES
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+#
+# CAPTURE SOURCE ROUTINES
+#
+
+# CAPTURESOURCE
+# ====================
+#
+# Base of capture sources. A source offers read() for video frames, snapshot() for
+#  pictures and close(). Frames are NumPy Array objects containing RGB format image,
+#  taken from pool where the source is able to fill a buffer. The pool is that of
+#  the camera the source is set to, image.FRAME_POOL until then.
+#
+# @param fps     None or a number of frames per second the source is paced at. If
+#                 None is passed, frames are produced as fast as they are read.
+#
+class CaptureSource :
+    def __init__(self, fps = None) :
+        if fps is None or ((type(fps) is float or type(fps) is int) and fps > 0) :
+            pass
+        else :
+            raise ValueError
+
+        self.fps = fps
+        self.due = None
+        self.count = 0
+        self.pool = image.FRAME_POOL
+
+    # PACE
+    # ====================
+    #
+    # Wait until the next frame is due at the pace of the source, if any.
+    #
+    def pace(self) :
+        if self.fps is None :
+            return
+
+        now = time.time()
+
+        if self.due is None or now - self.due > 1.0 / self.fps :
+            # The reader fell behind by more than a frame, the pace restarts from
+            #  now instead of frames being rushed out to catch up.
+            #
+            self.due = now
+        elif self.due > now :
+            time.sleep(self.due - now)
+
+        self.due += 1.0 / self.fps
+
+    # TO_POOL
+    # ====================
+    #
+    # Convert a frame decoded by OpenCV in BGR order into a buffer of the frame pool
+    #  in RGB order, resizing it if required.
+    #
+    # @param bgr     A NumPy Array object containing BGR format image.
+    # @param resolution None or a tuple of two integer elements of the frame width and
+    #                 height.
+    #
+    # @ret           A NumPy Array object containing RGB format image.
+    #
+    def to_pool(self, bgr, resolution = None) :
+        if resolution is not None and (bgr.shape[1], bgr.shape[0]) != tuple(resolution) :
+            bgr = cv2.resize(bgr, tuple(resolution), interpolation = cv2.INTER_AREA)
+
+        ret = self.pool.acquire(bgr.shape)
+
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst = ret)
+
+        return ret
+
+    # READ
+    # ====================
+    #
+    # @ret           A NumPy Array object containing RGB format image of the next
+    #                 video frame, or None once the source is exhausted.
+    #
+    def read(self) :
+        raise NotImplementedError
+
+    # SNAPSHOT
+    # ====================
+    #
+    # @ret           A NumPy Array object containing RGB format image of a picture,
+    #                 not taken from the frame pool, or None once the source is
+    #                 exhausted.
+    #
+    def snapshot(self) :
+        frame = self.read()
+
+        if frame is None :
+            return None
+
+        ret = frame.copy()
+
+        self.pool.release(frame)
+
+        return ret
+
+    # CLOSE
+    # ====================
+    #
+    # Release the device or file behind the source.
+    #
+    def close(self) :
+        pass
+
+# PICAMERASOURCE
+# ====================
+#
+# The Raspberry Pi camera, as used by an image.Camera object when no source is set,
+#  streaming from the video port. Pictures are taken from the video stream as well,
+#  sparing the switch over to the still port.
+#
+# @param resolution None or a tuple of two integer elements of the frame width and
+#                 height, resized by the camera hardware.
+# @param camera  None or an image.Camera object streaming the frames, whose pool the
+#                 frames are taken from. If None is passed, image.CAMERA is used.
+#
+class PiCameraSource(CaptureSource) :
+    def __init__(self, resolution = None, camera = None) :
+        CaptureSource.__init__(self)
+
+        self.resolution = resolution
+        self.camera = camera if camera is not None else image.CAMERA
+        self.stream = None
+
+    def read(self) :
+        if self.stream is None :
+            self.stream = self.camera.stream_video("rgb", self.resolution)
+
+        self.count += 1
+
+        return next(self.stream)
+
+    def close(self) :
+        if self.stream is not None :
+            self.stream.close()
+
+            self.stream = None
+
+# VIDEOCAPTURESOURCE
+# ====================
+#
+# A video device, e.g., a USB webcam through V4L2, or a network stream opened by
+#  OpenCV VideoCapture. Frames come at the pace of the device.
+#
+# @param device  An integer of the device index, e.g., 0 for /dev/video0, or a string
+#                 of a device path or stream URL.
+# @param resolution None or a tuple of two integer elements of the frame width and
+#                 height requested from the device. Frames are resized should the
+#                 device not support it.
+#
+class VideoCaptureSource(CaptureSource) :
+    def __init__(self, device = 0, resolution = None, fps = None) :
+        CaptureSource.__init__(self, fps)
+
+        self.device = device
+        self.resolution = resolution
+
+        self.capture = cv2.VideoCapture(device)
+
+        if self.capture.isOpened() is not True :
+            raise ValueError("Capture Source " + str(device) + " Cannot be Opened")
+
+        if resolution is not None :
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+
+    # GRAB
+    # ====================
+    #
+    # @ret           A NumPy Array object containing BGR format image of the next
+    #                 frame decoded, or None if there is none.
+    #
+    def grab(self) :
+        ok, bgr = self.capture.read()
+
+        return bgr if ok is True else None
+
+    def read(self) :
+        bgr = self.grab()
+
+        if bgr is None :
+            return None
+
+        self.pace()
+
+        self.count += 1
+
+        return self.to_pool(bgr, self.resolution)
+
+    def close(self) :
+        self.capture.release()
+
+# VIDEOFILESOURCE
+# ====================
+#
+# A video file, e.g., recorded footage, decoded by OpenCV VideoCapture.
+#
+# @param path    A string of file location path of the video.
+# @param resolution None or a tuple of two integer elements of the frame width and
+#                 height frames are resized to.
+# @param realtime A boolean variable of whether frames are paced at the frame rate
+#                 of the video. If False is passed, frames are decoded as fast as
+#                 they are read.
+# @param loop    A boolean variable of whether the video starts over at its end. If
+#                 False is passed, the source is exhausted at the end of the video.
+#
+class VideoFileSource(VideoCaptureSource) :
+    def __init__(self, path, resolution = None, realtime = True, loop = False) :
+        if path is not None and type(path) is str and os.path.isfile(path) :
+            pass
+        else :
+            raise ValueError("Video File " + str(path) + " Not Found")
+
+        VideoCaptureSource.__init__(self, path, None)
+
+        self.resolution = resolution
+        self.loop = loop
+
+        rate = self.capture.get(cv2.CAP_PROP_FPS)
+
+        self.fps = (rate if rate > 0 else 25.0) if realtime is True else None
+
+    def grab(self) :
+        bgr = VideoCaptureSource.grab(self)
+
+        if bgr is None and self.loop is True :
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+            bgr = VideoCaptureSource.grab(self)
+
+        return bgr
+
+# IMAGEFOLDERSOURCE
+# ====================
+#
+# A folder of images played as video frames in the order of their file names.
+#
+# @param path    A string of the folder location path.
+# @param fps     None or a number of frames per second the images are paced at. If
+#                 None is passed, images are decoded as fast as they are read.
+# @param resolution None or a tuple of two integer elements of the frame width and
+#                 height images are resized to.
+# @param loop    A boolean variable of whether the images start over after the
+#                 last one. If False is passed, the source is exhausted then.
+#
+class ImageFolderSource(CaptureSource) :
+    def __init__(self, path, fps = None, resolution = None, loop = False) :
+        CaptureSource.__init__(self, fps)
+
+        self.files = sorted(set(sum([glob.glob(os.path.join(path, pattern)) for pattern in IMAGE_PATTERNS + tuple(pattern.upper() for pattern in IMAGE_PATTERNS)], [])))
+
+        if len(self.files) == 0 :
+            raise ValueError("No Image Found in " + str(path))
+
+        self.resolution = resolution
+        self.loop = loop
+        self.index = 0
+
+    def read(self) :
+        if self.index >= len(self.files) :
+            if self.loop is True :
+                self.index = 0
+            else :
+                return None
+
+        bgr = cv2.imread(self.files[self.index], cv2.IMREAD_COLOR)
+
+        self.index += 1
+
+        if bgr is None :
+            raise ValueError("Image " + self.files[self.index - 1] + " Cannot be Decoded")
+
+        self.pace()
+
+        self.count += 1
+
+        return self.to_pool(bgr, self.resolution)
+
+# SYNTHETICSOURCE
+# ====================
+#
+# Frames generated on the fly, a textured background with a bright block moving
+#  across it and the frame number printed. No device or file is needed and every
+#  frame differs from the previous one, e.g., for motion detection to pass it.
+#
+# @param resolution A tuple of two integer elements of the frame width and height.
+# @param fps     None or a number of frames per second the frames are paced at. If
+#                 None is passed, frames are generated as fast as they are read.
+# @param count   None or an integer of the number of frames before the source is
+#                 exhausted. If None is passed, frames are generated endlessly.
+#
+class SyntheticSource(CaptureSource) :
+    def __init__(self, resolution = SYNTHETIC_SIZE, fps = None, count = None) :
+        CaptureSource.__init__(self, fps)
+
+        if count is None or (type(count) is int and count >= 0) :
+            pass
+        else :
+            raise ValueError
+
+        self.resolution = tuple(resolution)
+        self.limit = count
+
+        width, height = self.resolution
+
+        # The background is drawn once, every frame starts from a copy of it.
+        #
+        ramp_x = numpy.linspace(0, 255, width, dtype = numpy.float32)[None, :]
+        ramp_y = numpy.linspace(0, 255, height, dtype = numpy.float32)[:, None]
+
+        self.background = numpy.dstack([numpy.broadcast_to(ramp_x, (height, width)), numpy.broadcast_to(ramp_y, (height, width)), (ramp_x + ramp_y) / 2]).astype(numpy.uint8)
+
+    def read(self) :
+        if self.limit is not None and self.count >= self.limit :
+            return None
+
+        self.pace()
+
+        width, height = self.resolution
+
+        ret = self.pool.acquire(self.background.shape)
+
+        ret[...] = self.background
+
+        side = max(min(width, height) // 5, 1)
+        left = (self.count * 4) % max(width - side, 1)
+        top = (height - side) // 2
+
+        ret[top : top + side, left : left + side] = 255
+
+        cv2.putText(ret, str(self.count), (8, height - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255))
+
+        self.count += 1
+
+        return ret
+
+#
+# (END OF) CAPTURE SOURCE ROUTINES
+#
@@ -0,0 +1,340 @@
+#
+# Name: standin.py
+#
+# Description: Library of local stand-ins for the remote services LifeLine talks
+#  to, served on the local machine, so the code talking to them is exercised by
+#  benchmarks and tests without credentials, network or a quota being used up.
+#
+
+import threading, socketserver, email, random, time
+
+# PARAMETERS
+# ====================
+#
+STANDIN_HOST = "127.0.0.1" # ADDRESS THE STAND-INS LISTEN ON
+VISION_WORKERS = 8         # NUMBER OF REQUESTS THE VISION STAND-IN SERVES AT ONCE
+
+# Boxes, in normalised coordinates, of the objects the Vision stand-in finds.
+#
+PERSON_BOX = [(0.1, 0.1), (0.4, 0.1), (0.4, 0.9), (0.1, 0.9)]
+WEAPON_BOX = [(0.5, 0.4), (0.7, 0.4), (0.7, 0.6), (0.5, 0.6)]
+
+#
+# STAND-IN ROUTINES
+#
+
+# SMTPSERVER
+# ====================
+#
+# A mail server speaking enough of SMTP for smtplib, i.e., EHLO, AUTH, MAIL, RCPT,
+#  DATA, RSET, NOOP and QUIT, keeping the messages received in memory. STARTTLS is
+#  not offered, a client is to be set up without it. Failures are injected by
+#  fail(), answering the next messages with a transient error, or by drop(),
+#  closing the next connections as soon as a message is sent over them.
+#
+class SmtpServer :
+    def __init__(self) :
+        self.messages = []
+        self.connects = 0
+        self.logins = 0
+        self.failing = 0
+        self.dropping = 0
+
+        self.lock = threading.Lock()
+        self.server = None
+        self.port = None
+
+    # START
+    # ====================
+    #
+    # Listen for connections in a background thread.
+    #
+    # @param port    An integer of the port listened to, 0 for any free port.
+    #
+    # @ret           An integer of the port listened to.
+    #
+    def start(self, port = 0) :
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler) :
+            def reply(self, line) :
+                self.wfile.write((line + "\r\n").encode("ascii"))
+
+            def handle(self) :
+                with standin.lock :
+                    standin.connects += 1
+
+                self.reply("220 localhost LifeLine stand-in")
+
+                while True :
+                    line = self.rfile.readline()
+
+                    if len(line) == 0 :
+                        return
+
+                    verb = line.decode("ascii", "replace").strip().split(" ")[0].upper()
+
+                    if verb == "EHLO" :
+                        self.reply("250-localhost")
+                        self.reply("250 AUTH PLAIN LOGIN")
+                    elif verb == "HELO" :
+                        self.reply("250 localhost")
+                    elif verb == "AUTH" :
+                        with standin.lock :
+                            standin.logins += 1
+
+                        self.reply("235 Authentication successful")
+                    elif verb == "DATA" :
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+
+                        lines = []
+
+                        while True :
+                            data = self.rfile.readline()
+
+                            if len(data) == 0 or data in (b".\r\n", b".\n") :
+                                break
+
+                            lines.append(data[1:] if data.startswith(b"..") else data)
+
+                        with standin.lock :
+                            if standin.dropping > 0 :
+                                standin.dropping -= 1
+
+                                return
+
+                            if standin.failing > 0 :
+                                standin.failing -= 1
+
+                                self.reply("451 Requested action aborted")
+
+                                continue
+
+                            standin.messages.append(email.message_from_bytes(b"".join(lines)))
+
+                        self.reply("250 OK")
+                    elif verb == "QUIT" :
+                        self.reply("221 Bye")
+
+                        return
+                    elif verb in ("MAIL", "RCPT", "RSET", "NOOP") :
+                        self.reply("250 OK")
+                    else :
+                        self.reply("502 Command not implemented")
+
+        self.server = socketserver.ThreadingTCPServer((STANDIN_HOST, port), Handler)
+        self.server.daemon_threads = True
+
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+
+        self.port = self.server.server_address[1]
+
+        return self.port
+
+    # FAIL / DROP
+    # ====================
+    #
+    # @param count   An integer of the number of messages answered with a transient
+    #                 error, or of connections closed upon a message.
+    #
+    def fail(self, count = 1) :
+        with self.lock :
+            self.failing += count
+
+    def drop(self, count = 1) :
+        with self.lock :
+            self.dropping += count
+
+    # STOP
+    # ====================
+    #
+    # Stop listening.
+    #
+    def stop(self) :
+        if self.server is not None :
+            self.server.shutdown()
+            self.server.server_close()
+
+            self.server = None
+
+# VISIONSERVER
+# ====================
+#
+# A Google Vision API ImageAnnotator service served over gRPC, answering the
+#  BatchAnnotateImages requests that every `gvision' request is sent as. The real
+#  client is pointed at it by `gvision.set_endpoint()', so the channel, the
+#  encoding of requests and the retries of `gvision' are exercised as they are
+#  against Google. Each image is answered with a person, and with a handgun as
+#  well in every weapon_every-th request, for object localisation.
+#
+# Every request takes a round trip time drawn from a log-normal distribution, as
+#  network latency has a long tail. A request fails as a whole with the given
+#  probability, with UNAVAILABLE or DEADLINE_EXCEEDED alike, raised on the client
+#  as ServiceUnavailable or DeadlineExceeded. An image of a request fails on its
+#  own with the given probability, as Google Vision reports a corrupted image.
+#  Failures are injected by fail() as well, failing the next requests.
+#
+# The google-cloud-vision and grpcio packages are needed by start() only, the
+#  SMTP stand-in is used without them.
+#
+# @param latency A number of seconds of the median round trip time.
+# @param jitter  A number of the sigma of the log-normal distribution, 0 for a fixed
+#                 round trip time.
+# @param failure A float (0-1) of the probability of a request failing.
+# @param corrupt A float (0-1) of the probability of an image failing.
+# @param weapon_every An integer, every such request is answered with a handgun, 0
+#                 for never.
+# @param seed    None or an integer seeding the random generator for repeatable runs.
+#
+class VisionServer :
+    def __init__(self, latency = 0, jitter = 0, failure = 0, corrupt = 0, weapon_every = 0, seed = None) :
+        self.latency = latency
+        self.jitter = jitter
+        self.failure = failure
+        self.corrupt = corrupt
+        self.weapon_every = weapon_every
+
+        self.calls = 0
+        self.images = 0
+        self.failures = 0
+        self.failing = []
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.server = None
+        self.port = None
+
+    # START
+    # ====================
+    #
+    # Serve the ImageAnnotator service in background threads.
+    #
+    # @param port    An integer of the port listened to, 0 for any free port.
+    #
+    # @ret           An integer of the port listened to.
+    #
+    def start(self, port = 0) :
+        import grpc
+        from concurrent import futures
+        from google.cloud.vision import types
+
+        self.types = types
+        self.codes = {"unavailable" : grpc.StatusCode.UNAVAILABLE, "deadline" : grpc.StatusCode.DEADLINE_EXCEEDED}
+
+        handler = grpc.method_handlers_generic_handler("google.cloud.vision.v1.ImageAnnotator", {
+            "BatchAnnotateImages" : grpc.unary_unary_rpc_method_handler(self.__annotate,
+                request_deserializer = types.BatchAnnotateImagesRequest.FromString,
+                response_serializer = types.BatchAnnotateImagesResponse.SerializeToString)})
+
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers = VISION_WORKERS))
+        self.server.add_generic_rpc_handlers((handler,))
+
+        self.port = self.server.add_insecure_port(STANDIN_HOST + ":" + str(port))
+
+        self.server.start()
+
+        return self.port
+
+    # ENDPOINT
+    # ====================
+    #
+    # @ret           A string of the host and port served on, for `gvision.set_endpoint()'.
+    #
+    def endpoint(self) :
+        return STANDIN_HOST + ":" + str(self.port)
+
+    # FAIL
+    # ====================
+    #
+    # @param count   An integer of the number of requests failed.
+    # @param kind    A string of how they fail, "unavailable" or "deadline".
+    #
+    def fail(self, count = 1, kind = "unavailable") :
+        if kind in ("unavailable", "deadline") :
+            pass
+        else :
+            raise ValueError
+
+        with self.lock :
+            self.failing.extend([kind] * count)
+
+    # STOP
+    # ====================
+    #
+    # Stop serving, requests in flight are cancelled.
+    #
+    def stop(self) :
+        if self.server is not None :
+            self.server.stop(None)
+
+            self.server = None
+
+    # __ANNOTATE
+    # ====================
+    #
+    # Serve a BatchAnnotateImages request.
+    #
+    # @param request A Google Vision BatchAnnotateImagesRequest object.
+    # @param context A gRPC ServicerContext object of the request.
+    #
+    # @ret           A Google Vision BatchAnnotateImagesResponse object.
+    #
+    def __annotate(self, request, context) :
+        with self.lock :
+            self.calls += 1
+            self.images += len(request.requests)
+
+            calls = self.calls
+            delay = self.latency * self.random.lognormvariate(0, self.jitter) if self.jitter > 0 else self.latency
+
+            if len(self.failing) > 0 :
+                failed = self.failing.pop(0)
+            elif self.random.random() < self.failure :
+                failed = self.random.choice(["unavailable", "deadline"])
+            else :
+                failed = None
+
+            corrupted = [self.random.random() < self.corrupt for _ in request.requests]
+
+        time.sleep(delay)
+
+        if failed is not None :
+            with self.lock :
+                self.failures += 1
+
+            context.abort(self.codes[failed], "Injected " + failed + " failure")
+
+        response = self.types.BatchAnnotateImagesResponse()
+
+        for req, bad in zip(request.requests, corrupted) :
+            res = response.responses.add()
+
+            # An image that is empty or taken as corrupted is failed on its own, as
+            #  Google Vision does with INVALID_ARGUMENT, the other images are answered.
+            #
+            if bad is True or len(req.image.content) == 0 :
+                res.error.code = 3
+                res.error.message = "Bad image data."
+
+                continue
+
+            objects = [("Person", 0.9, PERSON_BOX)]
+
+            if self.weapon_every > 0 and calls % self.weapon_every == 0 :
+                objects.append(("Handgun", 0.8, WEAPON_BOX))
+
+            for feature in req.features :
+                if feature.type != self.types.Feature.OBJECT_LOCALIZATION :
+                    continue
+
+                for name, score, box in objects[:feature.max_results if feature.max_results > 0 else None] :
+                    obj = res.localized_object_annotations.add(name = name, score = score)
+
+                    for x, y in box :
+                        obj.bounding_poly.normalized_vertices.add(x = x, y = y)
+
+        return response
+
+#
+# (END OF) STAND-IN ROUTINES
+#
@@ -0,0 +1,12 @@
+#
+# Name: conftest.py
+#
+# Description: Test set up, making the modules of the program importable by the
+#  tests the way the program itself imports them, i.e., from its folder.
+#
+#  Usage: python -m pytest -q tests
+#
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+#
+# Name: test_cache.py
+#
+# Description: Tests of results being reused for images looking alike by
+#  cache.ResultCache.
+#
+
+import io
+import numpy, cv2
+import cache, image
+
+def scene() :
+    ramp = numpy.linspace(0, 255, 64, dtype = numpy.uint8)
+
+    return numpy.dstack([numpy.tile(ramp, (36, 1))] * 3).copy()
+
+def test_result_is_reused_for_a_frame_looking_alike() :
+    results = cache.ResultCache()
+    calls = []
+
+    first = scene()
+    second = scene()
+    second[0, 0] = 0
+
+    assert results.fetch(first, "object", lambda : calls.append(1) or ["first"]) == ["first"]
+    assert results.fetch(second, "object", lambda : calls.append(2) or ["second"]) == ["first"]
+    assert calls == [1]
+    assert results.hits == 1
+
+def test_result_is_not_reused_for_another_request_or_once_expired() :
+    results = cache.ResultCache(ttl = 5)
+    key = image.dhash(scene())
+
+    results.store(key, "object", ["object"], now = 100)
+
+    assert results.lookup(key, "label", now = 101) == (False, None)
+    assert results.lookup(key, "object", now = 104) == (True, ["object"])
+    assert results.lookup(key, "object", now = 106) == (False, None)
+
+def test_result_is_not_reused_for_a_frame_looking_different() :
+    results = cache.ResultCache()
+
+    results.store(image.dhash(scene()), "object", ["object"])
+
+    assert results.lookup(image.dhash(scene()[:, ::-1].copy()), "object") == (False, None)
+
+def test_least_recently_used_result_is_evicted() :
+    results = cache.ResultCache(distance = 0, capacity = 2)
+
+    results.store(1, "object", ["one"])
+    results.store(2, "object", ["two"])
+    results.lookup(1, "object")
+    results.store(4, "object", ["four"])
+
+    assert results.lookup(2, "object") == (False, None)
+    assert results.lookup(1, "object") == (True, ["one"])
+
+def test_jpeg_bytes_are_hashed_as_the_image_they_hold() :
+    results = cache.ResultCache()
+    jpeg = cv2.imencode(".jpg", scene(), [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+    assert image.dhash(jpeg) == image.dhash(io.BytesIO(jpeg))
+    assert bin(image.dhash(jpeg) ^ image.dhash(scene())).count("1") <= 2
+
+    assert results.fetch(jpeg, "object", lambda : ["first"]) == ["first"]
+    assert results.fetch(scene(), "object", lambda : ["second"]) == ["first"]
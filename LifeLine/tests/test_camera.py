@@ -0,0 +1,38 @@
+#
+# Name: test_camera.py
+#
+# Description: Tests of the JPEG images encoded by the camera hardware being put
+#  together and paired with video frames by an image.Camera object.
+#
+
+import image
+
+SOI = b"\xff\xd8"
+EOI = b"\xff\xd9"
+
+def test_image_written_in_parts_is_put_together() :
+    output = image.Camera._Camera__JpegOutput()
+
+    output.write(SOI + b"head")
+    output.write(b"tail" + EOI)
+
+    assert output.take(0) == SOI + b"headtail" + EOI
+
+def test_image_already_taken_is_not_handed_out_again() :
+    output = image.Camera._Camera__JpegOutput()
+
+    output.write(SOI + b"first" + EOI)
+
+    assert output.take(0) == SOI + b"first" + EOI
+    assert output.take(0.01) is None
+
+    output.write(SOI + b"second" + EOI)
+
+    assert output.take(0) == SOI + b"second" + EOI
+
+def test_incomplete_image_is_not_handed_out() :
+    output = image.Camera._Camera__JpegOutput()
+
+    output.write(SOI + b"head")
+
+    assert output.take(0.01) is None
@@ -0,0 +1,81 @@
+#
+# Name: test_clip.py
+#
+# Description: Tests of the ring of frames kept and the clips written around
+#  events by clip.ClipRecorder.
+#
+
+import time
+import numpy, cv2
+import clip
+from frame import Frame
+
+def frame_of(value) :
+    return numpy.full((16, 16, 3), value, dtype = numpy.uint8)
+
+def wait_for(condition, timeout = 5) :
+    due = time.time() + timeout
+
+    while condition() is not True and time.time() < due :
+        time.sleep(0.01)
+
+    return condition()
+
+# The brightness of every frame of a Motion JPEG clip.
+#
+def values_of(path) :
+    with open(path, "rb") as clipfile :
+        parts = clipfile.read().split(b"\xff\xd8")[1 :]
+
+    return [int(round(cv2.imdecode(numpy.frombuffer(b"\xff\xd8" + part, dtype = numpy.uint8), cv2.IMREAD_GRAYSCALE).mean())) for part in parts]
+
+def test_clip_holds_pre_event_ring_and_post_event_frames(tmp_path) :
+    recorder = clip.ClipRecorder(pre = 1, post = 1, rate = 10).start()
+
+    for i, stamp in enumerate([0, 0.5, 1, 1.5, 2, 2.5, 3]) :
+        recorder.record(frame_of(i * 20), now = stamp)
+
+        # Frames are compressed one at a time, none is dropped for the backlog.
+        #
+        assert wait_for(lambda : len(recorder.ring) > 0 and recorder.ring[-1][0] == stamp)
+
+    recorder.trigger(str(tmp_path / "event.mjpeg"), now = 3)
+
+    for i, stamp in enumerate([3.5, 4, 4.5], 7) :
+        recorder.record(frame_of(i * 20), now = stamp)
+
+    recorder.stop(5)
+
+    assert recorder.written == 1
+    assert values_of(str(tmp_path / "event.mjpeg")) == [80, 100, 120, 140, 160]
+
+def test_frames_recorded_too_often_are_skipped() :
+    recorder = clip.ClipRecorder(pre = 10, post = 0, rate = 10)
+
+    recorder.record(frame_of(0), now = 0)
+    recorder.record(frame_of(0), now = 0.05)
+    recorder.record(frame_of(0), now = 0.1)
+
+    assert recorder.frames.qsize() == 2
+
+def test_recorded_frame_is_copied() :
+    recorder = clip.ClipRecorder()
+    pixels = frame_of(10)
+
+    recorder.record(pixels, now = 0)
+
+    pixels[...] = 200
+
+    _, kept = recorder.frames.get_nowait()
+
+    assert int(kept.mean()) == 10
+
+def test_jpeg_content_at_hand_is_kept_as_it_is() :
+    recorder = clip.ClipRecorder()
+    jpeg = Frame(frame_of(10)).jpeg
+
+    recorder.record(Frame(frame_of(10), jpeg = jpeg), now = 0)
+
+    _, kept = recorder.frames.get_nowait()
+
+    assert kept is jpeg
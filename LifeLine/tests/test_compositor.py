@@ -0,0 +1,64 @@
+#
+# Name: test_compositor.py
+#
+# Description: Tests of an image.Compositor object drawing the very pixels the
+#  routines of the same effect draw one after another, without touching the frame
+#  drawn onto unless asked to.
+#
+
+import types
+import numpy
+import image
+from frame import Frame
+
+def scene() :
+    rng = numpy.random.RandomState(0)
+
+    return rng.randint(0, 256, (120, 200, 3)).astype(numpy.uint8)
+
+def objects() :
+    box = [(0.1, 0.2), (0.4, 0.2), (0.4, 0.8), (0.1, 0.8)]
+
+    return [types.SimpleNamespace(name = "Person", bounding_poly = types.SimpleNamespace(normalized_vertices = [types.SimpleNamespace(x = x, y = y) for x, y in box], vertices = []))]
+
+def test_stack_is_pixel_identical_to_routines_in_turn() :
+    frm = scene()
+    logo = numpy.zeros((20, 30, 3), dtype = numpy.uint8)
+    logo[4 : 16, 5 : 25] = (0, 128, 255)
+
+    banner = image.OverlayLayer()
+    banner.add_text("LifeLine 1.0", (10, 20), (0, 0, 0), False)
+
+    out = image.Compositor().add_layer(banner).add_boxes(objects(), txttag = "name").add_image(logo, (-1, -1)).add_text("GUN", (1, -1), (255, 255, 0), True).apply(frm)
+
+    ref = image.overlay_text(frm, "LifeLine 1.0", (10, 20), (0, 0, 0), False)
+    ref = image.highlight_image(ref, objects(), txttag = "name")
+    ref = image.overlay_image(ref, logo, (-1, -1))
+    ref = image.overlay_text(ref, "GUN", (1, -1), (255, 255, 0), True)
+
+    assert numpy.array_equal(out, ref)
+
+def test_apply_leaves_frame_untouched() :
+    frm = scene()
+    orig = frm.copy()
+    stack = image.Compositor().add_boxes(objects(), txttag = "name").add_text("GUN", (1, 1), (255, 0, 0), True)
+
+    out = stack.apply(frm)
+
+    assert numpy.array_equal(frm, orig)
+    assert not numpy.array_equal(out, orig)
+
+    stack.apply(frm, inplace = True)
+
+    assert numpy.array_equal(frm, out)
+
+def test_apply_onto_frame_object_keeps_it_and_its_identity() :
+    frm = Frame(scene(), ident = 7, stamp = 1.5)
+    orig = frm.array.copy()
+
+    out = image.Compositor().add_boxes(objects(), txttag = "name").apply(frm)
+
+    assert isinstance(out, Frame)
+    assert (out.ident, out.stamp) == (7, 1.5)
+    assert numpy.array_equal(out.array, image.highlight_image(orig, objects(), txttag = "name"))
+    assert numpy.array_equal(frm.array, orig)
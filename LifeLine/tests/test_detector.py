@@ -0,0 +1,31 @@
+#
+# Name: test_detector.py
+#
+# Description: Tests of the images accepted by a detector.DnnDetector object, the
+#  same as gvision() accepts. No model is loaded, the conversion of images alone
+#  is tested.
+#
+
+import io
+import numpy, cv2
+from PIL import Image
+import detector
+from frame import Frame
+
+def test_images_of_every_type_are_converted_to_rgb() :
+    to_array = detector.DnnDetector._DnnDetector__to_array
+    dnn = detector.DnnDetector.__new__(detector.DnnDetector)
+
+    rgb = numpy.zeros((16, 24, 3), dtype = numpy.uint8)
+    rgb[..., 0] = 200
+
+    png = io.BytesIO()
+    Image.fromarray(rgb).save(png, "PNG")
+
+    jpeg = cv2.imencode(".jpg", cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+    for img in rgb, Frame(rgb), Image.fromarray(rgb), png, jpeg, Frame(jpeg) :
+        ret = to_array(dnn, img)
+
+        assert ret.shape == (16, 24, 3)
+        assert numpy.abs(ret.astype(int) - rgb).max() <= 4
@@ -0,0 +1,57 @@
+#
+# Name: test_frame.py
+#
+# Description: Tests of the representations of a frame.Frame object and of frames
+#  derived from it by drawing.
+#
+
+import numpy
+import image
+from frame import Frame
+
+def captured() :
+    return Frame(numpy.full((32, 64, 3), 100, dtype = numpy.uint8), ident = 7, stamp = 1234.5)
+
+def test_jpeg_is_encoded_once_and_discarded_when_drawn_on() :
+    frm = captured()
+
+    assert frm.encoded is False
+
+    jpeg = frm.jpeg
+
+    assert frm.encoded is True
+    assert frm.jpeg is jpeg
+
+    frm.array[0, 0] = 0
+    frm.invalidate()
+
+    assert frm.encoded is False
+
+def test_jpeg_given_is_used_as_it_is() :
+    jpeg = captured().jpeg
+    frm = Frame(numpy.zeros((32, 64, 3), dtype = numpy.uint8), jpeg = jpeg)
+
+    assert frm.encoded is True
+    assert frm.jpeg is jpeg
+
+def test_copy_keeps_identity_and_leaves_the_frame_alone() :
+    frm = captured()
+    other = frm.copy()
+
+    other.array[...] = 0
+
+    assert (other.ident, other.stamp) == (7, 1234.5)
+    assert int(frm.array.mean()) == 100
+
+def test_frames_drawn_keep_identity() :
+    frm = captured()
+
+    drawn = [
+        image.overlay_text(frm, "GUN Detected", (10, 20), (0, 0, 0), False),
+        image.pixelate_regions(frm, [(0.1, 0.1, 0.5, 0.5)]),
+        image.Compositor().add_boxes([]).apply(frm)
+    ]
+
+    for other in drawn :
+        assert other is not frm
+        assert (other.ident, other.stamp) == (7, 1234.5)
@@ -0,0 +1,146 @@
+#
+# Name: test_framebus.py
+#
+# Description: Tests of the drop policies of framebus.FrameBus and of consumers
+#  being removed once their process has died.
+#
+
+import multiprocessing, os
+import numpy
+import pytest
+import framebus
+
+SHAPE = (8, 8, 3)
+
+@pytest.fixture
+def bus() :
+    frames = framebus.FrameBus(slots = 3, shape = SHAPE, consumers = 4)
+
+    yield frames
+
+    frames.close(unlink = True)
+
+def publish(bus, count, timeout = 0) :
+    return [bus.publish(numpy.full(SHAPE, i, dtype = numpy.uint8), timeout) for i in range(count)]
+
+def read_all(sub) :
+    ret = []
+
+    while True :
+        frm = sub.read_frame(timeout = 0)
+
+        if frm is None :
+            return ret
+
+        ret.append(int(frm.array[0, 0, 0]))
+
+        sub.release(frm)
+
+def test_latest_consumer_gets_the_newest_frame(bus) :
+    sub = bus.subscribe("latest")
+
+    publish(bus, 5)
+
+    assert read_all(sub) == [4]
+    assert bus.stats()["consumers"][sub.index] == 4
+
+def test_oldest_consumer_gets_frames_left_in_order(bus) :
+    sub = bus.subscribe("oldest")
+
+    publish(bus, 5)
+
+    assert read_all(sub) == [2, 3, 4]
+
+def test_block_consumer_holds_the_writer_back(bus) :
+    sub = bus.subscribe("block")
+
+    assert None not in publish(bus, 3)
+    assert bus.publish(numpy.zeros(SHAPE, dtype = numpy.uint8), timeout = 0.05) is None
+    assert bus.stats()["dropped"] == 1
+
+    assert read_all(sub) == [0, 1, 2]
+    assert bus.publish(numpy.zeros(SHAPE, dtype = numpy.uint8), timeout = 0.05) is not None
+
+def test_slot_held_is_not_written_over(bus) :
+    sub = bus.subscribe("latest")
+
+    publish(bus, 1)
+
+    frm = sub.read_frame(timeout = 0)
+
+    publish(bus, 6)
+
+    assert int(frm.array[0, 0, 0]) == 0
+    assert frm.ident is None
+
+    sub.release(frm)
+
+    assert bus.pins.sum() == 0
+
+def test_frame_identity_is_kept(bus) :
+    from frame import Frame
+
+    sub = bus.subscribe("oldest")
+
+    bus.publish(Frame(numpy.zeros(SHAPE, dtype = numpy.uint8), ident = 42, stamp = 100.5))
+
+    frm = sub.read_frame(timeout = 0)
+
+    assert (frm.ident, frm.stamp) == (42, 100.5)
+
+# Read a frame and end without releasing it nor unsubscribing, as upon a crash.
+#
+def die_holding(sub) :
+    sub.read_frame(timeout = 5)
+
+    os._exit(0)
+
+def test_consumer_of_dead_process_is_removed(bus) :
+    sub = bus.subscribe("block")
+
+    publish(bus, 1)
+
+    worker = multiprocessing.get_context("fork").Process(target = die_holding, args = (sub, ))
+    worker.start()
+    worker.join(5)
+
+    assert bus.readers[sub.index, 4] == worker.pid
+    assert bus.pins[:, sub.index].sum() == 1
+
+    # Without the consumer removed, the writer would wait for it for ever.
+    #
+    assert None not in publish(bus, 4, timeout = 5)
+    assert bus.pins.sum() == 0
+    assert sub.index not in bus.stats()["consumers"]
+
+def test_consumer_not_read_from_yet_is_kept(bus) :
+    sub = bus.subscribe("block")
+
+    publish(bus, 3)
+
+    assert bus.publish(numpy.zeros(SHAPE, dtype = numpy.uint8), timeout = 0.05) is None
+    assert sub.index in bus.stats()["consumers"]
+
+def state(pid) :
+    try :
+        with open("/proc/" + str(pid) + "/stat") as statfile :
+            return statfile.read().rsplit(")", 1)[1].split()[0]
+    except OSError :
+        return None
+
+def test_alive() :
+    assert framebus.alive(os.getpid()) is True
+
+    worker = multiprocessing.get_context("fork").Process(target = os._exit, args = (0, ))
+    worker.start()
+
+    # The process has ended but is yet to be joined, i.e., a zombie.
+    #
+    while state(worker.pid) not in ("Z", None) :
+        pass
+
+    assert framebus.alive(worker.pid) is False
+
+    worker.join()
+
+    assert framebus.alive(worker.pid) is False
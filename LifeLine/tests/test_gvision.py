@@ -0,0 +1,116 @@
+#
+# Name: test_gvision.py
+#
+# Description: Tests of the batch requests of the `gvision' module, against a client
+#  standing in for Google Vision API, and of requests over the real client, against
+#  `standin.VisionServer'. The tests are skipped on machines without the Google Cloud
+#  client library, or without gRPC for the latter.
+#
+
+import types
+import numpy, cv2
+import pytest
+
+pytest.importorskip("google.cloud.vision")
+
+import gvision, standin, cache
+from google.api_core import exceptions
+
+JPEG = b"\xff\xd8jpeg\xff\xd9"
+
+# A client answering every image of a batch with the object named by the image,
+#  or with an error for images named in failures.
+#
+class Client :
+    def __init__(self, failures = ()) :
+        self.failures = failures
+        self.batches = []
+
+    def batch_annotate_images(self, requests) :
+        self.batches.append(requests)
+
+        responses = []
+
+        for request in requests :
+            if request.image.content in self.failures :
+                responses.append(types.SimpleNamespace(error = types.SimpleNamespace(code = 3, message = "Bad image data."), localized_object_annotations = []))
+            else :
+                responses.append(types.SimpleNamespace(error = types.SimpleNamespace(code = 0, message = ""), localized_object_annotations = [request.image.content]))
+
+        return types.SimpleNamespace(responses = responses)
+
+    def object_localization(self, image) :
+        self.batches.append([image])
+
+        return types.SimpleNamespace(localized_object_annotations = [image.content])
+
+def test_failing_image_is_reported_in_its_own_slot() :
+    imgs = [JPEG + b"1", JPEG + b"2", JPEG + b"3"]
+
+    ret = gvision.gvision_batch(imgs, ["object"], client = Client(failures = (imgs[1], )))
+
+    assert ret[0] == {"object" : [imgs[0]]}
+    assert isinstance(ret[1], exceptions.GoogleAPICallError)
+    assert "Bad image data." in str(ret[1])
+    assert ret[2] == {"object" : [imgs[2]]}
+
+def test_batch_is_split_at_batch_limit() :
+    imgs = [JPEG + bytes([i]) for i in range(gvision.BATCH_LIMIT + 1)]
+    client = Client()
+
+    ret = gvision.gvision_batch(imgs, ["object"], client = client)
+
+    assert [len(batch) for batch in client.batches] == [gvision.BATCH_LIMIT, 1]
+    assert [entry["object"] for entry in ret] == [[img] for img in imgs]
+
+def test_jpeg_bytes_go_through_the_cache() :
+    jpeg = cv2.imencode(".jpg", numpy.tile(numpy.arange(0, 256, 4, dtype = numpy.uint8), (36, 1)))[1].tobytes()
+    client = Client()
+    results = cache.ResultCache()
+
+    assert gvision.gvision(jpeg, "object", client = client, cache = results) == [jpeg]
+    assert gvision.gvision(jpeg, "object", client = client, cache = results) == [jpeg]
+    assert len(client.batches) == 1
+
+def test_empty_op_types_are_rejected() :
+    with pytest.raises(ValueError) :
+        gvision.gvision_batch([JPEG], [], client = Client())
+
+    with pytest.raises(ValueError) :
+        gvision.gvision_batch([JPEG, JPEG], [["object"], []], client = Client())
+
+@pytest.fixture
+def vision() :
+    pytest.importorskip("grpc")
+
+    server = standin.VisionServer()
+    server.start()
+
+    gvision.set_endpoint(server.endpoint(), secure = False)
+
+    yield server
+
+    gvision.set_endpoint()
+    server.stop()
+
+def test_unavailable_service_is_retried_over_a_new_channel(vision) :
+    vision.fail(1, "unavailable")
+
+    ret = gvision.gvision(JPEG, "object")
+
+    assert [obj.name for obj in ret] == ["Person"]
+    assert vision.calls == 2
+
+def test_deadline_exceeded_is_raised(vision) :
+    vision.fail(1, "deadline")
+
+    with pytest.raises(exceptions.DeadlineExceeded) :
+        gvision.gvision(JPEG, "object")
+
+def test_failing_image_of_a_batch_over_the_channel(vision) :
+    vision.weapon_every = 1
+
+    ret = gvision.gvision_batch([JPEG, b""], ["object"])
+
+    assert [obj.name for obj in ret[0]["object"]] == ["Person", "Handgun"]
+    assert isinstance(ret[1], exceptions.GoogleAPICallError)
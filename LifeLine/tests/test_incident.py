@@ -0,0 +1,94 @@
+#
+# Name: test_incident.py
+#
+# Description: Tests of objects being followed from sample to sample and turned
+#  into incidents by incident.IncidentEngine.
+#
+
+import types
+import incident
+
+# An object as found by Google Vision "object" detection, of a box of the given
+#  left, top, width and height.
+#
+def found(name, left, top, width = 0.1, height = 0.2) :
+    vertices = [types.SimpleNamespace(x = x, y = y) for x, y in ((left, top), (left + width, top), (left + width, top + height), (left, top + height))]
+
+    return types.SimpleNamespace(name = name, bounding_poly = types.SimpleNamespace(normalized_vertices = vertices))
+
+def engine(**params) :
+    return incident.IncidentEngine({"Handgun" : "Handgun", "Knife" : "Knife"}, **params)
+
+def test_incident_opens_after_open_hits_and_closes_after_close_misses() :
+    incidents = engine(open_hits = 2, close_misses = 2)
+
+    assert incidents.update([found("Handgun", 0.1, 0.1)], now = 0) == []
+
+    events = incidents.update([found("Handgun", 0.1, 0.1)], now = 1)
+
+    assert [event for event, _ in events] == ["open"]
+    assert incidents.update([], now = 2) == []
+    assert [event for event, _ in incidents.update([], now = 3)] == ["close"]
+    assert incidents.active == []
+
+def test_single_miss_before_opening_starts_over() :
+    incidents = engine(open_hits = 2)
+
+    incidents.update([found("Handgun", 0.1, 0.1)], now = 0)
+    incidents.update([], now = 1)
+
+    assert incidents.update([found("Handgun", 0.1, 0.1)], now = 2) == []
+
+def test_object_moving_without_overlap_between_samples_stays_one_incident() :
+    incidents = engine(open_hits = 1)
+
+    events = incidents.update([found("Handgun", 0.1, 0.1)], now = 0)
+
+    assert [event for event, _ in events] == ["open"]
+
+    # The box moves by more than its width between samples, no overlap is left.
+    #
+    for step in range(1, 5) :
+        assert incidents.update([found("Handgun", 0.1 + 0.12 * step, 0.1)], now = step) == []
+
+    assert len(incidents.active) == 1
+    assert incidents.active[0].ident == events[0][1].ident
+
+def test_two_objects_of_a_kind_are_two_incidents() :
+    incidents = engine(open_hits = 1)
+
+    events = incidents.update([found("Handgun", 0.1, 0.1), found("Handgun", 0.7, 0.6)], now = 0)
+
+    assert [event for event, _ in events] == ["open", "open"]
+
+    assert incidents.update([found("Handgun", 0.12, 0.1), found("Handgun", 0.68, 0.6)], now = 1) == []
+    assert len(incidents.active) == 2
+
+def test_incident_is_resumed_where_it_was_last_seen_only() :
+    incidents = engine(open_hits = 1, close_misses = 1, cooldown = 30)
+
+    first = incidents.update([found("Handgun", 0.1, 0.1)], now = 0)[0][1]
+
+    assert [event for event, _ in incidents.update([], now = 1)] == ["close"]
+
+    # The object back in place resumes the incident silently.
+    #
+    assert incidents.update([found("Handgun", 0.12, 0.1)], now = 2) == []
+    assert incidents.active[0].ident == first.ident
+
+    assert [event for event, _ in incidents.update([], now = 3)] == ["close"]
+
+    # An object of the kind elsewhere is another incident.
+    #
+    events = incidents.update([found("Handgun", 0.8, 0.7)], now = 4)
+
+    assert [event for event, _ in events] == ["open"]
+    assert events[0][1].ident != first.ident
+
+def test_incident_is_not_resumed_after_cooldown() :
+    incidents = engine(open_hits = 1, close_misses = 1, cooldown = 5)
+
+    incidents.update([found("Knife", 0.1, 0.1)], now = 0)
+    incidents.update([], now = 1)
+
+    assert [event for event, _ in incidents.update([found("Knife", 0.1, 0.1)], now = 10)] == ["open"]
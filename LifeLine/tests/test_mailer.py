@@ -0,0 +1,94 @@
+#
+# Name: test_mailer.py
+#
+# Description: Tests of the digests, retries and reconnection of mailer.Mailer,
+#  against a local SMTP stand-in.
+#
+
+import time
+import numpy
+import pytest
+import mailer, standin
+
+@pytest.fixture
+def server() :
+    smtp = standin.SmtpServer()
+    smtp.start()
+
+    yield smtp
+
+    smtp.stop()
+
+def wait_for(condition, timeout = 5) :
+    due = time.time() + timeout
+
+    while condition() is not True and time.time() < due :
+        time.sleep(0.01)
+
+    return condition()
+
+def test_alerts_within_window_are_sent_as_one_digest(server) :
+    mail = mailer.Mailer(standin.STANDIN_HOST, server.port, "lifeline@localhost", ["guard@localhost"], user = "lifeline", password = "secret", starttls = False, window = 0.3).start()
+
+    mail.post("Handgun", "A gun has been detected.", [("gun.jpg", numpy.zeros((16, 16, 3), dtype = numpy.uint8))])
+    mail.post("Knife", "A knife has been detected.", [("knife.jpg", b"\xff\xd8\xff\xd9")])
+
+    assert wait_for(lambda : mail.sent == 2)
+
+    mail.stop(5)
+
+    assert len(server.messages) == 1
+    assert server.messages[0]["Subject"] == "2 Alerts: Handgun, Knife"
+    assert [part.get_filename() for part in server.messages[0].walk() if part.get_filename() is not None] == ["gun.jpg", "knife.jpg"]
+    assert server.logins == 1
+
+def test_connection_is_reused_between_digests(server) :
+    mail = mailer.Mailer(standin.STANDIN_HOST, server.port, "lifeline@localhost", ["guard@localhost"], starttls = False, window = 0).start()
+
+    mail.post("Handgun", "First.")
+
+    assert wait_for(lambda : mail.sent == 1)
+
+    mail.post("Handgun", "Second.")
+
+    assert wait_for(lambda : mail.sent == 2)
+
+    mail.stop(5)
+
+    assert len(server.messages) == 2
+    assert server.connects == 1
+
+def test_failed_digest_is_retried_with_backoff_over_a_new_connection(server) :
+    mail = mailer.Mailer(standin.STANDIN_HOST, server.port, "lifeline@localhost", ["guard@localhost"], starttls = False, window = 0, retries = 3, backoff = 0.2).start()
+
+    server.fail(1)
+    server.drop(1)
+
+    ent = time.time()
+
+    mail.post("Handgun", "Retried.")
+
+    assert wait_for(lambda : mail.sent == 1)
+
+    # The second retry waits twice as long as the first one.
+    #
+    assert time.time() - ent >= 0.2 + 0.4
+
+    mail.stop(5)
+
+    assert len(server.messages) == 1
+    assert server.connects == 3
+    assert mail.failed == 0
+
+def test_digest_is_given_up_after_retries(server) :
+    mail = mailer.Mailer(standin.STANDIN_HOST, server.port, "lifeline@localhost", ["guard@localhost"], starttls = False, window = 0, retries = 2, backoff = 0).start()
+
+    server.fail(2)
+
+    mail.post("Handgun", "Lost.")
+
+    assert wait_for(lambda : mail.failed == 1)
+
+    mail.stop(5)
+
+    assert len(server.messages) == 0
@@ -0,0 +1,114 @@
+#
+# Name: test_metrics.py
+#
+# Description: Tests of the metrics of `metrics' as a Prometheus scrape reads them,
+#  i.e., histogram buckets, the text format rendered, metrics registered under a
+#  name twice, the metrics file rolled over and the HTTP endpoint.
+#
+
+import os, socket, time, urllib.request
+import pytest
+import metrics
+
+def test_value_on_a_bound_is_counted_in_that_bucket() :
+    histogram = metrics.Histogram((0.1, 1))
+
+    for value in 0.1, 0.1000001, 1, 5, 0 :
+        histogram.observe(value)
+
+    # Buckets are "less than or equal" to their bound, a value over the last
+    #  bound goes into the "+Inf" bucket.
+    #
+    assert histogram.counts == [2, 2, 1]
+
+def test_histogram_samples_are_cumulative() :
+    histogram = metrics.Histogram((0.1, 1))
+
+    for value in 0.05, 0.5, 0.5, 3 :
+        histogram.observe(value)
+
+    assert histogram.samples() == [
+        ("_bucket", ("le", "0.1"), 1),
+        ("_bucket", ("le", "1"), 3),
+        ("_bucket", ("le", "+Inf"), 4),
+        ("_sum", None, pytest.approx(4.05)),
+        ("_count", None, 4)]
+
+def test_render_in_text_format() :
+    registry = metrics.Registry()
+
+    registry.counter("lifeline_alerts_total", "Number of alerts\nraised.", {"kind" : "Kni\"fe\\\n"}).inc(2)
+    registry.histogram("lifeline_stage_seconds", "Time taken.", {"stage" : "render"}, buckets = (0.5, )).observe(0.2)
+
+    assert registry.render() == "\n".join([
+        "# HELP lifeline_alerts_total Number of alerts\\nraised.",
+        "# TYPE lifeline_alerts_total counter",
+        "lifeline_alerts_total{kind=\"Kni\\\"fe\\\\\\n\"} 2",
+        "# HELP lifeline_stage_seconds Time taken.",
+        "# TYPE lifeline_stage_seconds histogram",
+        "lifeline_stage_seconds_bucket{stage=\"render\",le=\"0.5\"} 1",
+        "lifeline_stage_seconds_bucket{stage=\"render\",le=\"+Inf\"} 1",
+        "lifeline_stage_seconds_sum{stage=\"render\"} 0.2",
+        "lifeline_stage_seconds_count{stage=\"render\"} 1"]) + "\n"
+
+def test_metric_is_shared_by_name_and_labels() :
+    registry = metrics.Registry()
+
+    assert registry.counter("frames_total", labels = {"stage" : "a"}) is registry.counter("frames_total", labels = {"stage" : "a"})
+    assert registry.counter("frames_total", labels = {"stage" : "a"}) is not registry.counter("frames_total", labels = {"stage" : "b"})
+
+def test_name_registered_as_another_kind_is_rejected() :
+    registry = metrics.Registry()
+
+    registry.counter("frames_total")
+
+    with pytest.raises(ValueError) :
+        registry.gauge("frames_total")
+
+    with pytest.raises(ValueError) :
+        registry.histogram("frames_total", labels = {"stage" : "a"})
+
+def test_log_rolls_over(tmp_path) :
+    registry = metrics.Registry()
+    registry.counter("frames_total").inc()
+
+    ofile = str(tmp_path / "metrics.prom")
+
+    # Every snapshot outgrows the size, the file is rolled over upon every write.
+    #
+    stopped = registry.log(ofile, interval = 0.02, size = 1, backups = 2)
+
+    due = time.time() + 5
+
+    while not os.path.exists(ofile + ".2") and time.time() < due :
+        time.sleep(0.01)
+
+    time.sleep(0.1)
+    stopped.set()
+
+    assert sorted(os.listdir(str(tmp_path))) == ["metrics.prom", "metrics.prom.1", "metrics.prom.2"]
+
+    with open(ofile) as logfile :
+        assert "frames_total 1" in logfile.read()
+
+def test_served_over_http() :
+    registry = metrics.Registry()
+    registry.gauge("queue_depth").set(3)
+
+    server = registry.serve(0)
+
+    try :
+        with urllib.request.urlopen("http://127.0.0.1:" + str(server.server_address[1]) + "/metrics") as response :
+            assert "queue_depth 3" in response.read().decode("utf-8")
+    finally :
+        server.shutdown()
+
+def test_port_taken_is_reported_not_raised() :
+    taken = socket.socket()
+    taken.bind(("127.0.0.1", 0))
+    taken.listen(1)
+
+    try :
+        assert metrics.Registry().serve(taken.getsockname()[1]) is None
+    finally :
+        taken.close()
@@ -0,0 +1,57 @@
+#
+# Name: test_motion_gate.py
+#
+# Description: Tests of the frames passed and blocked by an image.MotionGate object
+#  for still scenes, motion, heartbeats and scenes changing for good.
+#
+
+import numpy
+import image
+
+def scene(block = None) :
+    frm = numpy.full((180, 320, 3), 64, dtype = numpy.uint8)
+
+    # A bright block covering about a tenth of the frame, in motion when moved.
+    #
+    if block is not None :
+        frm[40 : 100, block : block + 60] = 220
+
+    return frm
+
+def test_still_scene_is_blocked() :
+    gate = image.MotionGate(heartbeat = 10)
+
+    assert gate.check(scene(40), now = 0) is True
+    assert gate.check(scene(40), now = 1) is False
+    assert gate.check(scene(40), now = 2) is False
+
+def test_motion_passes() :
+    gate = image.MotionGate(heartbeat = 10)
+
+    gate.check(scene(40), now = 0)
+
+    assert gate.check(scene(200), now = 1) is True
+    assert gate.motion >= gate.area
+
+def test_still_scene_passes_at_heartbeat() :
+    gate = image.MotionGate(heartbeat = 10)
+
+    gate.check(scene(40), now = 0)
+
+    assert gate.check(scene(40), now = 9.9) is False
+    assert gate.check(scene(40), now = 10) is True
+    assert gate.check(scene(40), now = 11) is False
+
+def test_changed_scene_is_learnt_into_background() :
+    gate = image.MotionGate(heartbeat = 1000, rate = 0.5)
+
+    gate.check(scene(), now = 0)
+
+    # A block put down and left there passes at first, then blocks once the
+    #  background has taken it in.
+    #
+    passed = [gate.check(scene(40), now = 1 + i) for i in range(10)]
+
+    assert passed[0] is True
+    assert passed[-1] is False
+    assert passed.index(False) > 1
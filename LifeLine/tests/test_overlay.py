@@ -0,0 +1,75 @@
+#
+# Name: test_overlay.py
+#
+# Description: Tests of image.OverlayLayer and image.DynamicText objects blending
+#  the very pixels overlay_text() and overlay_image() draw, without touching the
+#  frame blended onto unless asked to.
+#
+
+import numpy
+import image
+
+def scene() :
+    rng = numpy.random.RandomState(0)
+
+    return rng.randint(0, 256, (120, 200, 3)).astype(numpy.uint8)
+
+def logo() :
+    ret = numpy.zeros((20, 30, 3), dtype = numpy.uint8)
+    ret[4 : 16, 5 : 25] = (0, 128, 255)
+
+    return ret
+
+def test_text_layer_is_pixel_identical_to_overlay_text() :
+    frm = scene()
+    layer = image.OverlayLayer()
+    layer.add_text("LifeLine 1.0", (10, 20), (0, 0, 0), False)
+
+    assert numpy.array_equal(layer.blend(frm), image.overlay_text(frm, "LifeLine 1.0", (10, 20), (0, 0, 0), False))
+
+def test_labelled_text_layer_is_pixel_identical_to_overlay_text() :
+    frm = scene()
+    layer = image.OverlayLayer()
+    layer.add_text("GUN", (-1, -1), (255, 255, 0), True)
+
+    assert numpy.array_equal(layer.blend(frm), image.overlay_text(frm, "GUN", (-1, -1), (255, 255, 0), True))
+
+def test_image_layer_is_pixel_identical_to_overlay_image() :
+    frm = scene()
+
+    for paste in False, True :
+        layer = image.OverlayLayer()
+        layer.add_image(logo(), (5, 5), paste)
+
+        assert numpy.array_equal(layer.blend(frm), image.overlay_image(frm, logo(), (5, 5), paste))
+
+def test_blend_leaves_frame_untouched() :
+    frm = scene()
+    orig = frm.copy()
+    layer = image.OverlayLayer()
+    layer.add_text("LifeLine 1.0", (10, 20), (0, 0, 0), False)
+
+    out = layer.blend(frm)
+
+    assert numpy.array_equal(frm, orig)
+    assert not numpy.array_equal(out, orig)
+
+    layer.blend(frm, inplace = True)
+
+    assert numpy.array_equal(frm, out)
+
+def test_layer_follows_frame_dimension() :
+    layer = image.OverlayLayer()
+    layer.add_text("LifeLine 1.0", (10, 20), (0, 0, 0), False)
+
+    for frm in scene(), scene()[: 80, : 150].copy() :
+        assert numpy.array_equal(layer.blend(frm), image.overlay_text(frm, "LifeLine 1.0", (10, 20), (0, 0, 0), False))
+
+def test_dynamic_text_is_drawn_again_on_change_only() :
+    frm = scene()
+    text = image.DynamicText((10, 20), (255, 0, 0))
+
+    for caption in "1 FPS", "1 FPS", "2 FPS" :
+        assert numpy.array_equal(text.blend(frm, caption), image.overlay_text(frm, caption, (10, 20), (255, 0, 0), False))
+
+    assert numpy.array_equal(text.blend(frm, "2 FPS", (0, 255, 0)), image.overlay_text(frm, "2 FPS", (10, 20), (0, 255, 0), False))
@@ -0,0 +1,176 @@
+#
+# Name: test_pipeline.py
+#
+# Description: Tests of the hand over of pooled frames between the stages of a
+#  pipeline.Pipeline, and of the sampling intervals of a pipeline.SampleScheduler.
+#
+
+import math
+import pytest
+import image, pipeline
+
+SHAPE = (16, 32, 3)
+
+# A capture function handing out count buffers of pool, then None.
+#
+def capture_from(pool, count) :
+    captured = [0]
+
+    def capture() :
+        if captured[0] >= count :
+            return None
+
+        captured[0] += 1
+
+        frame = pool.acquire(SHAPE)
+        frame[...] = captured[0]
+
+        return frame
+
+    return capture
+
+def held(pool, frame) :
+    entry = pool.refs.get(id(frame))
+
+    return entry[1] if entry is not None and entry[0] is frame else 0
+
+def test_frame_released_by_render_is_still_held_for_the_gate() :
+    pool = image.FramePool(2)
+    seen = []
+
+    # The render stage runs in between the frame being handed over and the gate
+    #  looking at it, releasing its reference.
+    #
+    def gate(frame) :
+        lifeline.step(0)
+
+        seen.append(held(pool, frame))
+
+        return True
+
+    lifeline = pipeline.Pipeline(capture_from(pool, 1), lambda frame : [], lambda frame, ret, fresh : None, result = [], gate = gate, pool = pool)
+
+    lifeline.start(infer = False)
+    lifeline.threads[0].join(1)
+
+    assert seen == [1]
+
+    frame = lifeline.pending.get_nowait()
+
+    assert held(pool, frame) == 1
+    assert all(buf is not frame for buf in pool.free)
+
+def test_frame_not_sampled_is_released() :
+    pool = image.FramePool(2)
+
+    lifeline = pipeline.Pipeline(capture_from(pool, 3), lambda frame : [], lambda frame, ret, fresh : None, result = [], gate = lambda frame : False, pool = pool)
+
+    lifeline.start(infer = False)
+    lifeline.threads[0].join(1)
+
+    while lifeline.step(0) is True :
+        pass
+
+    assert len(pool.refs) == 0
+    assert len(pool.free) == 2
+    assert lifeline.pending.empty()
+
+def test_every_reference_is_released_after_identify_and_render() :
+    pool = image.FramePool(4)
+
+    lifeline = pipeline.Pipeline(capture_from(pool, 5), lambda frame : int(frame[0, 0, 0]), lambda frame, ret, fresh : None, result = None, pool = pool)
+
+    lifeline.start(infer = False)
+    lifeline.threads[0].join(1)
+
+    while lifeline.step(0) is True :
+        pass
+
+    while lifeline.pending.empty() is not True :
+        lifeline.identify(lifeline.pending.get_nowait())
+
+    frame = pool.acquire(SHAPE)
+    frame[...] = 0
+    lifeline.frames.put(frame)
+
+    assert lifeline.step(0) is True
+    assert lifeline.result == 5
+    assert len(pool.refs) == 0
+
+def test_detected_frame_is_held_while_rendering_a_new_result() :
+    pool = image.FramePool(4)
+    seen = []
+
+    def render(frame, ret, fresh) :
+        if fresh is True :
+            seen.append((lifeline.detected is not frame, int(lifeline.detected[0, 0, 0]), held(pool, lifeline.detected), ret))
+
+    lifeline = pipeline.Pipeline(capture_from(pool, 2), lambda frame : int(frame[0, 0, 0]), render, result = None, gate = lambda frame : int(frame[0, 0, 0]) == 1, pool = pool)
+
+    lifeline.start(infer = False)
+    lifeline.threads[0].join(1)
+
+    # The first frame is rendered before its result comes back, the result is
+    #  rendered with the second one.
+    #
+    assert lifeline.step(0) is True
+
+    lifeline.identify(lifeline.pending.get_nowait())
+
+    assert lifeline.step(0) is True
+    assert seen == [(True, 1, 1, 1)]
+    assert lifeline.detected is None
+    assert len(pool.refs) == 0
+
+# Frames captured at fps frames per second, with inferences taking latency seconds,
+#  returning the indices of the frames sampled.
+#
+def sampled(scheduler, fps, latency, count) :
+    ret = []
+
+    for i in range(count) :
+        scheduler.record_frame(now = i / fps)
+        scheduler.record_latency(latency, now = i / fps)
+
+        if scheduler.due() is True :
+            ret.append(i)
+
+    return ret
+
+def test_frames_are_sampled_as_often_as_inferences_return() :
+    scheduler = pipeline.SampleScheduler(min_rate = 0.2, max_rate = 5)
+
+    ret = sampled(scheduler, 30, 1.0, 120)
+
+    assert scheduler.interval == 30
+    assert [b - a for a, b in zip(ret[1:], ret[2:])] == [30] * (len(ret) - 2)
+
+def test_sampling_is_capped_at_max_rate() :
+    scheduler = pipeline.SampleScheduler(min_rate = 0.2, max_rate = 5)
+
+    sampled(scheduler, 30, 0.05, 60)
+
+    assert scheduler.interval == 6
+
+def test_sampling_is_kept_above_min_rate() :
+    scheduler = pipeline.SampleScheduler(min_rate = 0.2, max_rate = 5)
+
+    sampled(scheduler, 30, 20.0, 60)
+
+    assert scheduler.interval == 150
+
+def test_latency_average_is_weighted_by_time_elapsed() :
+    scheduler = pipeline.SampleScheduler(response = 2)
+
+    scheduler.record_latency(1.0, now = 0)
+    scheduler.record_latency(3.0, now = 2)
+
+    assert scheduler.latency == pytest.approx(1.0 + (1 - math.exp(-1)) * 2.0)
+
+    # A sample at the same time as the previous one carries no weight.
+    #
+    latency = scheduler.latency
+
+    scheduler.record_latency(100.0, now = 2)
+
+    assert scheduler.latency == pytest.approx(latency)
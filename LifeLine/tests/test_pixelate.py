@@ -0,0 +1,64 @@
+#
+# Name: test_pixelate.py
+#
+# Description: Tests of the regions obscured by image.pixelate_regions(), every mode
+#  changing the pixels within the regions only and regions past the edges of the
+#  frame being clipped.
+#
+
+import types
+import numpy
+import pytest
+import image
+
+MODES = ["pixelate", "blur", "fill", "noise"]
+
+def scene() :
+    rng = numpy.random.RandomState(0)
+
+    return rng.randint(0, 256, (120, 200, 3)).astype(numpy.uint8)
+
+def outside(img, *boxes) :
+    mask = numpy.ones(img.shape[: 2], dtype = bool)
+
+    for box in boxes :
+        mask[box[1] : box[3], box[0] : box[2]] = False
+
+    return img[mask]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_mode_changes_boxed_region_only(mode) :
+    frm = scene()
+    box = (32, 16, 96, 80)
+
+    out = image.pixelate_regions(frm, [box], block = 16, mode = mode, colour = (1, 2, 3))
+
+    assert numpy.array_equal(outside(out, box), outside(frm, box))
+    assert not numpy.array_equal(out[16 : 80, 32 : 96], frm[16 : 80, 32 : 96])
+
+    if mode == "fill" :
+        assert (out[16 : 80, 32 : 96] == (1, 2, 3)).all()
+
+@pytest.mark.parametrize("mode", MODES)
+def test_box_past_the_edges_is_clipped(mode) :
+    frm = scene()
+
+    # Boxes over the top left and the bottom right corners are clipped to the
+    #  frame, a box wholly outside is skipped.
+    #
+    out = image.pixelate_regions(frm, [(-20, -10, 48, 40), (180, 100, 260, 300), (300, 300, 400, 400)], block = 8, mode = mode)
+
+    assert out.shape == frm.shape
+    assert numpy.array_equal(outside(out, (0, 0, 48, 40), (180, 100, 200, 120)), outside(frm, (0, 0, 48, 40), (180, 100, 200, 120)))
+    assert not numpy.array_equal(out[: 40, : 48], frm[: 40, : 48])
+    assert not numpy.array_equal(out[100 :, 180 :], frm[100 :, 180 :])
+
+def test_object_past_the_edges_is_clipped() :
+    frm = scene()
+    box = [(0.8, 0.5), (1.3, 0.5), (1.3, 1.4), (0.8, 1.4)]
+    obj = types.SimpleNamespace(bounding_poly = types.SimpleNamespace(normalized_vertices = [types.SimpleNamespace(x = x, y = y) for x, y in box], vertices = []))
+
+    out = image.pixelate_regions(frm, [obj], mode = "fill", colour = (1, 2, 3))
+
+    assert (out[60 :, 160 :] == (1, 2, 3)).all()
+    assert numpy.array_equal(outside(out, (160, 60, 200, 120)), outside(frm, (160, 60, 200, 120)))
@@ -0,0 +1,56 @@
+#
+# Name: test_responder.py
+#
+# Description: Tests of the alerts raised by a responder.Responder object, handed to
+#  the presenter, clip recorder and mailer given, with the snapshot of the frame
+#  the weapon is identified in.
+#
+
+import os, types
+import numpy
+import incident, responder
+
+# A presenter, clip recorder and mailer keeping what they are handed.
+#
+class Recorder :
+    def __init__(self) :
+        self.calls = []
+
+    def post(self, *args) :
+        self.calls.append(args)
+
+    def trigger(self, ofile) :
+        self.calls.append(ofile)
+
+def gun() :
+    box = [(0.5, 0.4), (0.7, 0.4), (0.7, 0.6), (0.5, 0.6)]
+
+    return types.SimpleNamespace(name = "Handgun", score = 0.8, bounding_poly = types.SimpleNamespace(normalized_vertices = [types.SimpleNamespace(x = x, y = y) for x, y in box], vertices = []))
+
+def test_weapon_raises_one_alert_per_incident(tmp_path) :
+    alerts, clips, mail = Recorder(), Recorder(), Recorder()
+    respond = responder.Responder(incident.IncidentEngine(responder.WEAPON_KINDS, open_hits = 1), alerts = alerts, clips = clips, mail = mail,
+        folder = str(tmp_path), display = False, verbose = False)
+    frm = numpy.full((120, 160, 3), 128, dtype = numpy.uint8)
+
+    assert [event for event, _ in respond.alert(frm, [gun()])] == ["open"]
+    assert respond.alert(frm, [gun()]) == []
+
+    assert os.path.isfile(str(tmp_path / "detectedgun.jpg"))
+
+    kind, text, icon, snapshot = alerts.calls[0]
+
+    assert (kind, text) == ("Handgun", responder.WEAPONS["Handgun"][2])
+    assert snapshot.shape == frm.shape and (snapshot != 128).any()
+    assert (frm == 128).all()
+
+    assert len(clips.calls) == 1 and clips.calls[0].startswith(str(tmp_path / "detectedgun-"))
+    assert mail.calls[0][2][0][0] == "detectedgun.jpg"
+
+def test_render_leaves_frame_untouched() :
+    respond = responder.Responder(incident.IncidentEngine(responder.WEAPON_KINDS), display = False)
+    frm = numpy.zeros((120, 160, 3), dtype = numpy.uint8)
+
+    out = respond.render(frm, [gun()])
+
+    assert out.any() and not frm.any()
@@ -0,0 +1,79 @@
+#
+# Name: test_source.py
+#
+# Description: Tests of the frames handed out by the capture sources of `source',
+#  and of the pace they are handed out at.
+#
+
+import numpy, cv2
+import pytest
+import source
+
+def test_synthetic_source_is_exhausted_after_count() :
+    src = source.SyntheticSource(resolution = (64, 48), count = 3)
+
+    frames = [src.read() for _ in range(3)]
+
+    assert all(frm is not None and frm.shape == (48, 64, 3) for frm in frames)
+    assert src.read() is None
+    assert src.read() is None
+
+def test_image_folder_is_played_in_file_name_order(tmp_path) :
+    # Written out of order, in BGR, blue, green and red.
+    #
+    for name, bgr in ("b.png", (0, 255, 0)), ("c.png", (0, 0, 255)), ("a.png", (255, 0, 0)) :
+        cv2.imwrite(str(tmp_path / name), numpy.full((8, 8, 3), bgr, dtype = numpy.uint8))
+
+    src = source.ImageFolderSource(str(tmp_path))
+
+    assert [tuple(src.read()[0, 0]) for _ in range(3)] == [(0, 0, 255), (0, 255, 0), (255, 0, 0)]
+    assert src.read() is None
+
+def test_image_folder_loops(tmp_path) :
+    for name, bgr in ("a.jpg", (255, 255, 255)), ("b.png", (0, 0, 0)) :
+        cv2.imwrite(str(tmp_path / name), numpy.full((8, 8, 3), bgr, dtype = numpy.uint8))
+
+    src = source.ImageFolderSource(str(tmp_path), loop = True)
+
+    assert [int(src.read()[0, 0, 0]) > 127 for _ in range(5)] == [True, False, True, False, True]
+
+def test_to_pool_resizes_and_swaps_to_rgb() :
+    src = source.CaptureSource()
+    bgr = numpy.zeros((40, 60, 3), dtype = numpy.uint8)
+    bgr[..., 2] = 200
+
+    ret = src.to_pool(bgr, (30, 20))
+
+    assert ret.shape == (20, 30, 3)
+    assert (ret == (200, 0, 0)).all()
+
+    src.pool.release(ret)
+
+def test_pace_does_not_catch_up_after_falling_behind(monkeypatch) :
+    clock = [100.0]
+    sleeps = []
+
+    def sleep(seconds) :
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(source.time, "time", lambda : clock[0])
+    monkeypatch.setattr(source.time, "sleep", sleep)
+
+    src = source.CaptureSource(fps = 10)
+
+    src.pace()
+    clock[0] += 0.04
+    src.pace()
+
+    assert sleeps == [pytest.approx(0.06)]
+
+    # A reader 1 second late gets the next frame at once, and the one after a
+    #  frame interval later, not 10 frames rushed out.
+    #
+    clock[0] += 1.0
+    src.pace()
+    src.pace()
+
+    assert len(sleeps) == 2
+    assert sleeps[1] == pytest.approx(0.1)
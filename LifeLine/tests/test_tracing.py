@@ -0,0 +1,79 @@
+#
+# Name: test_tracing.py
+#
+# Description: Tests of the traces written by a tracing.Tracer object, read back by
+#  load_traces() and summarised by breakdown(), i.e., the trace log format shared
+#  with the replay tool, the sampling of frames and traces left unfinished.
+#
+
+import types
+import pytest
+import tracing
+
+def frame(ident, stamp) :
+    return types.SimpleNamespace(ident = ident, stamp = stamp)
+
+def test_trace_round_trip(tmp_path) :
+    ofile = str(tmp_path / "traces.log")
+    tracer = tracing.Tracer().start(ofile, every = 1)
+
+    assert tracer.sample(frame(7, 100.0), now = 100.010) is True
+
+    tracer.span(7, "upload", 100.020, 100.120)
+    tracer.span(7, "alert", 100.130, 100.140)
+    tracer.span(8, "upload", 100.020, 100.120)
+    tracer.finish(7)
+    tracer.stop(5)
+
+    with open(ofile) as tracefile :
+        assert tracefile.read() == "7\t100.000000\tqueue:0.000:10.000\tupload:20.000:100.000\talert:130.000:10.000\n"
+
+    traces = tracing.load_traces(ofile)
+
+    assert traces == [(7, 100.0, [("queue", 0.0, 10.0), ("upload", 20.0, 100.0), ("alert", 130.0, 10.0)])]
+
+    summary = tracing.breakdown(traces)
+
+    assert summary["upload"] == {"count" : 1, "duration" : (100.0, 100.0, 100.0), "since_capture" : (120.0, 120.0, 120.0)}
+    assert summary["total"]["duration"] == (140.0, 140.0, 140.0)
+
+def test_one_in_every_frames_is_sampled(tmp_path) :
+    tracer = tracing.Tracer().start(str(tmp_path / "traces.log"), every = 3)
+
+    assert [tracer.sample(frame(i, 0.0), now = 0.0) for i in range(1, 7)] == [False, False, True, False, False, True]
+    assert tracer.sample(frame(None, 0.0), now = 0.0) is False
+
+    tracer.stop(5)
+
+def test_unfinished_trace_is_written_after_ttl(tmp_path) :
+    ofile = str(tmp_path / "traces.log")
+    tracer = tracing.Tracer().start(ofile, every = 1, ttl = 5)
+
+    tracer.sample(frame(1, 0.0), now = 0.0)
+    tracer.span(1, "upload", 0.5, 1.0)
+
+    tracer.sample(frame(2, 4.0), now = 4.0)
+
+    assert sorted(tracer.traces) == [1, 2]
+
+    # Sampling a frame past the TTL of the first writes the first as it is.
+    #
+    tracer.sample(frame(3, 5.5), now = 5.5)
+
+    assert sorted(tracer.traces) == [2, 3]
+
+    tracer.stop(5)
+
+    traces = tracing.load_traces(ofile)
+
+    assert [trace[0] for trace in traces] == [1, 2, 3]
+    assert traces[0][2] == [("queue", 0.0, 0.0), ("upload", pytest.approx(500.0), pytest.approx(500.0))]
+
+def test_nothing_is_traced_until_started() :
+    tracer = tracing.Tracer()
+
+    assert tracer.sample(frame(1, 0.0), now = 0.0) is False
+
+    tracer.span(1, "upload", 0.0, 1.0)
+
+    assert tracer.traces == {}
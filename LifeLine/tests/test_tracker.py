@@ -0,0 +1,41 @@
+#
+# Name: test_tracker.py
+#
+# Description: Tests of the boxes moved by a tracker.FlowTracker object along with
+#  the scene.
+#
+
+import types
+import numpy, cv2
+import pytest
+import tracker
+
+WIDTH, HEIGHT = 320, 240
+
+def textured() :
+    rng = numpy.random.RandomState(0)
+
+    # Blurred noise gives corners everywhere that optical flow can follow.
+    #
+    gray = cv2.GaussianBlur(rng.randint(0, 256, (HEIGHT, WIDTH)).astype(numpy.uint8), (5, 5), 0)
+
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+def test_box_moves_with_the_scene() :
+    frm = textured()
+    dx, dy = 6, 4
+
+    box = [(0.3, 0.3), (0.6, 0.3), (0.6, 0.7), (0.3, 0.7)]
+    obj = types.SimpleNamespace(name = "Person", bounding_poly = tracker.BoundingPoly([tracker.Vertex(x, y) for x, y in box], True))
+
+    flow = tracker.FlowTracker(norm = True)
+    flow.seed(frm, [obj])
+
+    ret = flow.update(numpy.roll(frm, (dy, dx), axis = (0, 1)))
+
+    assert len(ret) == 1
+    assert ret[0].name == "Person"
+
+    for vertex, (x, y) in zip(ret[0].bounding_poly.normalized_vertices, box) :
+        assert vertex.x == pytest.approx(x + dx / WIDTH, abs = 0.5 / WIDTH)
+        assert vertex.y == pytest.approx(y + dy / HEIGHT, abs = 0.5 / HEIGHT)
@@ -0,0 +1,337 @@
+#
+# Name: tracing.py
+#
+# Description: Library following sampled video frames from capture to alert. Every
+#  captured frame carries an identity and the time it was captured, the stages a
+#  sampled frame goes through, i.e., waiting for identification, JPEG encoding,
+#  upload to Google Vision API, handing the response over, incident matching and
+#  alert dispatch, are recorded as spans of its trace. Traces are written to a
+#  compact log, one line a trace, which is summarised into latency breakdowns by
+#  running this file as a program.
+#
+#  Usage: python tracing.py TRACE_FILE [TRACE_FILE ...]
+#
+
+import threading, queue, time, sys
+
+# PARAMETERS
+# ====================
+#
+SAMPLE_EVERY = 10          # ONE IN SO MANY IDENTIFIED FRAMES IS TRACED
+TRACE_TTL = 30             # PERIOD (IN SECOND) A TRACE IS KEPT OPEN BEFORE IT IS WRITTEN AS IT IS
+STAGES = ("queue", "encode", "upload", "response", "incident", "alert")
+
+#
+# TRACING ROUTINES
+#
+
+# TRACER
+# ====================
+#
+# A collector of traces of sampled frames. Tracing is off until start() is called,
+#  recording a span of a frame not sampled costs a dictionary lookup only.
+#
+# A trace is written once finish() is called for it, or as it is should it not be
+#  finished within ttl seconds, e.g., as its result is superseded by a newer one
+#  before being rendered. A line of the log reads
+#
+#     IDENT <TAB> CAPTURE_TIME <TAB> STAGE:OFFSET:DURATION <TAB> ...
+#
+#  with the capture time in seconds since the epoch and the offset of the start of
+#  a span from the capture time and its duration in milliseconds.
+#
+class Tracer :
+    def __init__(self) :
+        self.every = None
+        self.ttl = TRACE_TTL
+        self.ofile = None
+
+        self.traces = {}
+        self.lock = threading.Lock()
+        self.lines = queue.Queue()
+        self.thread = None
+
+        self.count = 0
+        self.written = 0
+
+    # START
+    # ====================
+    #
+    # Start tracing, writing traces to a file by a thread of the tracer.
+    #
+    # @param ofile   A string of file location path of the trace log, appended to.
+    # @param every   An integer, one in so many frames passed to sample() is traced.
+    # @param ttl     A number of seconds a trace is kept open for.
+    #
+    def start(self, ofile, every = SAMPLE_EVERY, ttl = TRACE_TTL) :
+        if ofile is not None and type(ofile) is str and every is not None and type(every) is int :
+            if every < 1 :
+                raise ValueError
+        else :
+            raise TypeError
+
+        self.ofile = ofile
+        self.ttl = ttl
+        self.every = every
+
+        if self.thread is None :
+            self.thread = threading.Thread(target = self.__run, daemon = True)
+
+            self.thread.start()
+
+        return self
+
+    # STOP
+    # ====================
+    #
+    # Stop tracing, writing the traces open as they are.
+    #
+    # @param timeout None or a number of seconds to wait for the log to be written.
+    #
+    def stop(self, timeout = None) :
+        self.every = None
+
+        with self.lock :
+            for ident in list(self.traces) :
+                self.__close(ident)
+
+        self.lines.put(None)
+
+        if self.thread is not None :
+            self.thread.join(timeout)
+
+            self.thread = None
+
+    # SAMPLE
+    # ====================
+    #
+    # Decide whether a frame is traced, opening its trace if so. Frames are sampled
+    #  where they are picked for identification, so the traces are those of frames
+    #  that may lead to an alert.
+    #
+    # @param frame   A Frame object, as returned by image.record_frame(). Objects
+    #                 without an identity are never traced.
+    # @param now     None or a number of seconds of the time the frame is picked,
+    #                 defaults to the current time. The frame is accounted as having
+    #                 waited in "queue" since its capture.
+    #
+    # @ret           A boolean value of whether the frame is traced.
+    #
+    def sample(self, frame, now = None) :
+        ident = getattr(frame, "ident", None)
+
+        if self.every is None or ident is None :
+            return False
+
+        self.count += 1
+
+        if self.count % self.every != 0 :
+            return False
+
+        if now is None :
+            now = time.time()
+
+        with self.lock :
+            # Traces never finished are written as they are after a while.
+            #
+            for other in [other for other, trace in self.traces.items() if now - trace[0] > self.ttl] :
+                self.__close(other)
+
+            self.traces[ident] = (frame.stamp, [("queue", frame.stamp, now)])
+
+        return True
+
+    # SPAN
+    # ====================
+    #
+    # Record a span of a stage of a frame, should the frame be traced.
+    #
+    # @param ident   An integer of the identity of the frame, or None.
+    # @param stage   A string of the stage, e.g., "upload".
+    # @param start   A number of seconds of the time the stage started, as returned
+    #                 from time.time().
+    # @param end     None or a number of seconds of the time the stage ended, defaults
+    #                 to the current time.
+    #
+    def span(self, ident, stage, start, end = None) :
+        trace = self.traces.get(ident)
+
+        if trace is not None :
+            trace[1].append((stage, start, time.time() if end is None else end))
+
+    # FINISH
+    # ====================
+    #
+    # Write the trace of a frame, should the frame be traced.
+    #
+    # @param ident   An integer of the identity of the frame, or None.
+    #
+    def finish(self, ident) :
+        if ident in self.traces :
+            with self.lock :
+                self.__close(ident)
+
+    # __CLOSE
+    # ====================
+    #
+    # Hand the trace of a frame over to the writing thread. The lock is held by the
+    #  caller.
+    #
+    def __close(self, ident) :
+        trace = self.traces.pop(ident, None)
+
+        if trace is None :
+            return
+
+        stamp, spans = trace
+
+        self.lines.put("\t".join([str(ident), format(stamp, ".6f")] + [stage + ":" + format((start - stamp) * 1000, ".3f") + ":" + format((end - start) * 1000, ".3f") for stage, start, end in spans]) + "\n")
+
+    # __RUN
+    # ====================
+    #
+    # Body of the writing thread, appending traces to the log.
+    #
+    def __run(self) :
+        while True :
+            line = self.lines.get()
+
+            if line is None :
+                break
+
+            try :
+                with open(self.ofile, "a") as tracefile :
+                    tracefile.write(line)
+
+                    # Lines waiting are written together while the file is open.
+                    #
+                    while True :
+                        try :
+                            line = self.lines.get_nowait()
+                        except queue.Empty :
+                            break
+
+                        if line is None :
+                            return
+
+                        tracefile.write(line)
+            except OSError as error :
+                print("Tracer: " + self.ofile + " " + str(error))
+
+# The tracer shared by the modules of the program.
+#
+TRACER = Tracer()
+
+# LOAD_TRACES
+# ====================
+#
+# Read traces from a trace log.
+#
+# @param ifile   A string of file location path of the trace log.
+#
+# @ret           A list of tuples of an integer of the frame identity, a number of
+#                 seconds of the capture time and a list of tuples of a string of the
+#                 stage, a number of the offset and a number of the duration (in
+#                 millisecond) of each span.
+#
+def load_traces(ifile) :
+    ret = []
+
+    with open(ifile) as tracefile :
+        for line in tracefile :
+            fields = line.rstrip("\n").split("\t")
+
+            if len(fields) < 2 :
+                continue
+
+            spans = []
+
+            for field in fields[2:] :
+                stage, offset, duration = field.rsplit(":", 2)
+
+                spans.append((stage, float(offset), float(duration)))
+
+            ret.append((int(fields[0]), float(fields[1]), spans))
+
+    return ret
+
+# BREAKDOWN
+# ====================
+#
+# Summarise traces into a latency breakdown.
+#
+# @param traces  A list of traces, as returned by load_traces().
+#
+# @ret           A dictionary mapping stages to dictionaries of the count and the
+#                 p50, p95 and p99 (in millisecond) of the duration of the stage and
+#                 of the time from capture to the end of the stage. The entry
+#                 "total" is the time from capture to the end of the last span of
+#                 traces that raised an alert.
+#
+def breakdown(traces) :
+    durations = {}
+    elapsed = {}
+    totals = []
+
+    for _, _, spans in traces :
+        for stage, offset, duration in spans :
+            durations.setdefault(stage, []).append(duration)
+            elapsed.setdefault(stage, []).append(offset + duration)
+
+        if any(stage == "alert" for stage, _, _ in spans) :
+            totals.append(max(offset + duration for _, offset, duration in spans))
+
+    ret = {}
+
+    for stage in durations :
+        ret[stage] = {"count" : len(durations[stage]), "duration" : percentiles(durations[stage]), "since_capture" : percentiles(elapsed[stage])}
+
+    if len(totals) > 0 :
+        ret["total"] = {"count" : len(totals), "duration" : percentiles(totals), "since_capture" : percentiles(totals)}
+
+    return ret
+
+# PERCENTILES
+# ====================
+#
+# @param values  A list of numbers.
+#
+# @ret           A tuple of the 50th, 95th and 99th percentiles of the numbers, by
+#                 nearest rank.
+#
+def percentiles(values) :
+    values = sorted(values)
+
+    return tuple(values[min(int(len(values) * rank / 100.0), len(values) - 1)] for rank in (50, 95, 99))
+
+#
+# (END OF) TRACING ROUTINES
+#
+
+#
+# USER ROUTINES
+#
+
+if __name__ == "__main__" :
+    if len(sys.argv) < 2 :
+        print("Usage: python tracing.py TRACE_FILE [TRACE_FILE ...]")
+
+        sys.exit(2)
+
+    traces = sum([load_traces(ifile) for ifile in sys.argv[1:]], [])
+
+    print(str(len(traces)) + " traces, " + str(len([trace for trace in traces if any(span[0] == "alert" for span in trace[2])])) + " with alerts")
+    print("STAGE        COUNT   DURATION p50/p95/p99 (MS)     SINCE CAPTURE p50/p95/p99 (MS)")
+
+    summary = breakdown(traces)
+
+    for stage in [stage for stage in STAGES if stage in summary] + sorted(stage for stage in summary if stage not in STAGES) :
+        line = stage.ljust(12) + str(summary[stage]["count"]).rjust(6) + "   "
+        line += "/".join(format(value, ".1f") for value in summary[stage]["duration"]).ljust(28)
+        line += "/".join(format(value, ".1f") for value in summary[stage]["since_capture"])
+
+        print(line)
+
+#
+# (END OF) USER ROUTINES
+#
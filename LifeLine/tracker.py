@@ -0,0 +1,212 @@
+#
+# Name: tracker.py
+#
+# Description: Library following objects identified in a video frame through the
+#  frames captured afterwards, so frames rendered in between two identifications
+#  are framed where the objects are now rather than where they were.
+#
+
+import io
+import numpy, cv2
+from PIL import Image
+from frame import Frame
+
+# PARAMETERS
+# ====================
+#
+CORNERS = 24               # MAXIMUM NUMBER OF FEATURE POINTS FOLLOWED PER OBJECT
+WINDOW = (15, 15)          # DIMENSION (IN PIXEL) OF THE OPTICAL FLOW SEARCH WINDOW
+LEVELS = 3                 # NUMBER OF PYRAMID LEVELS, ALLOWING LARGER MOVEMENT TO BE FOLLOWED
+
+#
+# TRACKING ROUTINES
+#
+
+# VERTEX
+# ====================
+#
+# A vertex of a tracked bounding polygon, offering x, y as Google Vision vertices.
+#
+class Vertex :
+    def __init__(self, x, y) :
+        self.x = x
+        self.y = y
+
+# BOUNDINGPOLY
+# ====================
+#
+# A tracked bounding polygon, offering normalized_vertices or vertices as Google
+#  Vision bounding polygons.
+#
+class BoundingPoly :
+    def __init__(self, vertices, norm) :
+        if norm is True :
+            self.normalized_vertices = vertices
+            self.vertices = []
+        else :
+            self.normalized_vertices = []
+            self.vertices = vertices
+
+# TRACKED
+# ====================
+#
+# An object identified by Google Vision with its bounding polygon moved to where the
+#  object is tracked to. All other fields, e.g., name or score, are those of the
+#  original object.
+#
+class Tracked :
+    def __init__(self, obj, bounding_poly) :
+        self.obj = obj
+        self.bounding_poly = bounding_poly
+
+    def __getattr__(self, name) :
+        if name == "obj" :
+            raise AttributeError(name)
+
+        return getattr(self.obj, name)
+
+# FLOWTRACKER
+# ====================
+#
+# A tracker following objects by sparse optical flow. Upon seeding, feature points,
+#  i.e., corners, are picked within the box of each object. The points are followed
+#  to every newer frame by the pyramidal Lucas-Kanade method and each box is moved
+#  by the median movement of its points, which disregards points lost or drifting.
+#
+# @param norm    A boolean variable informing of the tracker whether the positions
+#                 of objects are normalised against the frame dimension, as objects
+#                 found by "object" detection, or are absolute pixel positions, as
+#                 faces found by "face" detection.
+# @param corners An integer of the maximum number of points followed per object.
+#
+class FlowTracker :
+    def __init__(self, norm = True, corners = CORNERS) :
+        if norm is not None and type(norm) is bool and corners is not None and type(corners) is int :
+            pass
+        else :
+            raise TypeError
+
+        self.norm = norm
+        self.corners = corners
+
+        self.gray = None
+        self.tracks = []
+
+    # __TO_GRAY
+    # ====================
+    #
+    # Convert an input image into a NumPy Array object containing greyscale image.
+    #
+    def __to_gray(self, img) :
+        if img is not None and isinstance(img, Frame) is True :
+            img = img.array
+
+        if img is not None and isinstance(img, numpy.ndarray) is True :
+            return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        elif img is not None and isinstance(img, Image.Image) is True :
+            return numpy.asarray(img.convert("L"))
+        elif img is not None and type(img) is io.BytesIO :
+            img.seek(0)
+
+            return numpy.asarray(Image.open(img).convert("L"))
+        else :
+            raise TypeError
+
+    # SEED
+    # ====================
+    #
+    # Start following objects identified in a frame, replacing those followed so far.
+    #
+    # @param img     A PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object containing JPEG format image
+    #                 on which the objects have been identified.
+    # @param objs    A list of objects found by Google Vision API, as in the format
+    #                 returned from Google Vision API
+    #
+    def seed(self, img, objs) :
+        self.gray = self.__to_gray(img)
+        self.tracks = []
+
+        height, width = self.gray.shape
+
+        for obj in objs :
+            if self.norm is True :
+                box = numpy.array([(width * vertex.x, height * vertex.y) for vertex in obj.bounding_poly.normalized_vertices], numpy.float32)
+            else :
+                box = numpy.array([(vertex.x, vertex.y) for vertex in obj.bounding_poly.vertices], numpy.float32)
+
+            if len(box) == 0 :
+                continue
+
+            mask = numpy.zeros(self.gray.shape, numpy.uint8)
+
+            cv2.fillPoly(mask, [box.astype(numpy.int32).reshape(-1, 1, 2)], 255)
+
+            points = cv2.goodFeaturesToTrack(self.gray, self.corners, 0.01, 3, mask = mask)
+
+            self.tracks.append([obj, box, points if points is not None else numpy.empty((0, 1, 2), numpy.float32)])
+
+    # UPDATE
+    # ====================
+    #
+    # Follow the objects to a newer frame.
+    #
+    # @param img     A PIL image object or NumPy Array object containing RGB format
+    #                 image or a BytesIO streaming object containing JPEG format image
+    #                 captured after the frame last seeded or updated with.
+    #
+    # @ret           A list of Tracked objects, one for each object seeded, carrying
+    #                 the bounding polygon moved to the object's position in img.
+    #
+    def update(self, img) :
+        gray = self.__to_gray(img)
+
+        if self.gray is not None and self.gray.shape == gray.shape :
+            origin = [track[2] for track in self.tracks if len(track[2]) > 0]
+
+            if len(origin) > 0 :
+                origin = numpy.concatenate(origin)
+
+                moved, status, _ = cv2.calcOpticalFlowPyrLK(self.gray, gray, origin, None, winSize = WINDOW, maxLevel = LEVELS)
+
+                status = status.reshape(-1) == 1
+                offset = 0
+
+                for track in self.tracks :
+                    count = len(track[2])
+
+                    found = status[offset : offset + count]
+
+                    if numpy.count_nonzero(found) > 0 :
+                        track[1] += numpy.median((moved[offset : offset + count] - track[2])[found].reshape(-1, 2), axis = 0)
+                        track[2] = moved[offset : offset + count][found]
+                    else :
+                        track[2] = numpy.empty((0, 1, 2), numpy.float32)
+
+                    offset += count
+        elif self.gray is not None :
+            # Frame dimension changed, e.g., by resolution_rescale(), points can
+            #  no longer be followed.
+            #
+            for track in self.tracks :
+                track[2] = numpy.empty((0, 1, 2), numpy.float32)
+
+        self.gray = gray
+
+        height, width = gray.shape
+
+        ret = []
+
+        for obj, box, _ in self.tracks :
+            if self.norm is True :
+                vertices = [Vertex(float(x) / width, float(y) / height) for x, y in box]
+            else :
+                vertices = [Vertex(int(round(x)), int(round(y))) for x, y in box]
+
+            ret.append(Tracked(obj, BoundingPoly(vertices, self.norm)))
+
+        return ret
+
+#
+# (END OF) TRACKING ROUTINES
+#